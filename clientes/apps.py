@@ -1,10 +1,27 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def _garantir_busca(sender, using, **kwargs):
+    from django.db import connections
+    from .busca import garantir_indice_fts
+    garantir_indice_fts(connections[using])
 
 
 class ClientesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clientes'
 
+    def ready(self):
+        # recria FTS/triggers caso uma migração tenha recriado a tabela
+        post_migrate.connect(_garantir_busca, sender=self)
+
+        # qualquer escrita em Cliente invalida o cache do autocomplete
+        from .busca import invalidar_autocomplete
+        Cliente = self.get_model("Cliente")
+        post_save.connect(invalidar_autocomplete, sender=Cliente, dispatch_uid="clientes_autocomplete_save")
+        post_delete.connect(invalidar_autocomplete, sender=Cliente, dispatch_uid="clientes_autocomplete_delete")
+
 
 def ready(self):
-    import clientes.signals
\ No newline at end of file
+    import clientes.signals
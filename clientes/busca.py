@@ -0,0 +1,202 @@
+# clientes/busca.py
+"""
+Índice de busca de clientes.
+
+- `Cliente.busca` guarda nome + e-mail + documento já normalizados
+  (minúsculas, sem acento), preenchido no save() do model.
+- `Cliente.cpf_cnpj_digits` guarda só os dígitos do documento, com índice
+  B-tree para buscas por prefixo (faixa >= / <, que usa o índice).
+- No SQLite, uma tabela virtual FTS5 (tokenizer trigram) espelha a coluna
+  `busca` via triggers, permitindo busca por trecho sem varrer a tabela.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from mca import versoes
+
+FTS_TABLE = "clientes_cliente_fts"
+TABELA = "clientes_cliente"
+
+# trigram só indexa termos com 3+ caracteres
+_FTS_MIN_LEN = 3
+
+_ONLY_DIGITS = re.compile(r"\D+")
+_ESPACOS = re.compile(r"\s+")
+
+_DDL_FTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        busca, content='{TABELA}', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABELA} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, busca) VALUES (new.id, new.busca);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABELA} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, busca) VALUES ('delete', old.id, old.busca);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF busca ON {TABELA} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, busca) VALUES ('delete', old.id, old.busca);
+        INSERT INTO {FTS_TABLE}(rowid, busca) VALUES (new.id, new.busca);
+    END""",
+]
+
+_DROP_FTS = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# cache por banco (NAME) — evita consultar o sqlite_master a cada busca
+_fts_cache: dict[str, bool] = {}
+
+
+def somente_digitos(s) -> str:
+    return _ONLY_DIGITS.sub("", str(s or ""))
+
+
+def normalizar_busca(*partes) -> str:
+    """Junta as partes em minúsculas, sem acentos e com espaços simples."""
+    txt = " ".join(str(p) for p in partes if p)
+    txt = unicodedata.normalize("NFKD", txt.lower())
+    txt = "".join(ch for ch in txt if not unicodedata.combining(ch))
+    return _ESPACOS.sub(" ", txt).strip()
+
+
+def texto_busca_cliente(nome_razao, email, cpf_cnpj) -> str:
+    return normalizar_busca(nome_razao, email, somente_digitos(cpf_cnpj))
+
+
+# ---------------- FTS (SQLite) ----------------
+
+def garantir_indice_fts(connection, *, rebuild: bool = False) -> bool:
+    """
+    Cria (se faltar) a tabela FTS5 e os triggers de sincronização.
+    Idempotente: também roda no post_migrate, pois o SQLite descarta os
+    triggers quando o Django recria a tabela de clientes numa migração.
+
+    Sem a coluna `busca` (migrações revertidas para antes da 0002) o índice
+    não tem o que espelhar: FTS e triggers são removidos e nada é criado.
+    """
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cur:
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=%s", [TABELA])
+        if cur.fetchone() is None:
+            return False
+        colunas = {c.name for c in connection.introspection.get_table_description(cur, TABELA)}
+        if "busca" not in colunas:
+            for sql in _DROP_FTS:
+                cur.execute(sql)
+            _fts_cache.pop(str(connection.settings_dict.get("NAME")), None)
+            return False
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=%s", [FTS_TABLE])
+        existia = cur.fetchone() is not None
+        cur.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='trigger' AND name LIKE %s",
+            [f"{FTS_TABLE}_a_"],
+        )
+        triggers_ok = cur.fetchone()[0] == 3
+        for sql in _DDL_FTS:
+            cur.execute(sql)
+        if rebuild or not existia or not triggers_ok:
+            cur.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    _fts_cache.pop(str(connection.settings_dict.get("NAME")), None)
+    return True
+
+
+def remover_indice_fts(connection) -> None:
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cur:
+        for sql in _DROP_FTS:
+            cur.execute(sql)
+    _fts_cache.pop(str(connection.settings_dict.get("NAME")), None)
+
+
+def fts_disponivel(using: str = "default") -> bool:
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return False
+    key = str(connection.settings_dict.get("NAME"))
+    if key not in _fts_cache:
+        with connection.cursor() as cur:
+            cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=%s", [FTS_TABLE])
+            _fts_cache[key] = cur.fetchone() is not None
+    return _fts_cache[key]
+
+
+# ---------------- Filtro ----------------
+
+def _limite_prefixo(prefixo: str) -> str:
+    # menor string maior que todas as que começam com `prefixo` ("123" -> "124")
+    return prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+
+
+def _fts_match(termo: str) -> str:
+    # frase entre aspas: com trigram equivale a "contém o trecho"
+    return '"' + termo.replace('"', '""') + '"'
+
+
+def filtro_busca(q: str, *, using: str = "default") -> Q:
+    """
+    Monta o Q para buscar clientes por nome, e-mail ou CPF/CNPJ.
+
+    - termos com 3+ caracteres usam o índice FTS (quando disponível);
+    - termos curtos comparam com a coluna normalizada;
+    - dígitos também casam por prefixo no documento (índice B-tree).
+    """
+    termo = normalizar_busca(q)
+    if not termo:
+        return Q()
+
+    if len(termo) >= _FTS_MIN_LEN and fts_disponivel(using):
+        cond = Q(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            (_fts_match(termo),),
+        ))
+    else:
+        cond = Q(busca__contains=termo)
+
+    digitos = somente_digitos(q)
+    if digitos:
+        cond |= Q(cpf_cnpj_digits__gte=digitos, cpf_cnpj_digits__lt=_limite_prefixo(digitos))
+    return cond
+
+
+# ---------------- Cache do autocomplete ----------------
+# Resultados do buscar_clientes_api ficam no cache por termo normalizado.
+# Qualquer escrita em Cliente incrementa a versão (chaves antigas expiram).
+# A versão é de mca/versoes.py: com o cache por processo, nos outros workers
+# ela expira em `versoes.VERSAO_TTL_LOCAL`, não em AUTOCOMPLETE_TTL.
+
+AUTOCOMPLETE_TTL = 60 * 5  # segundos
+_AUTOCOMPLETE_VERSAO = "clientes:autocomplete:versao"
+
+
+def versao_autocomplete() -> int:
+    return versoes.versao(_AUTOCOMPLETE_VERSAO)
+
+
+def invalidar_autocomplete(*args, **kwargs) -> None:
+    """Assinatura livre para poder ser ligada direto em post_save/post_delete."""
+    versoes.incrementar(_AUTOCOMPLETE_VERSAO)
+
+
+def chave_autocomplete(versao: int, termo: str, limit: int) -> str:
+    digest = hashlib.md5(termo.encode("utf-8")).hexdigest()
+    return f"clientes:autocomplete:{versao}:{limit}:{digest}"
+
+
+def casa_busca(row: dict, termo: str) -> bool:
+    """Mesma regra do filtro_busca, aplicada em memória sobre uma linha já carregada."""
+    if termo in (row.get("busca") or ""):
+        return True
+    digitos = somente_digitos(termo)
+    return bool(digitos) and (row.get("cpf_cnpj_digits") or "").startswith(digitos)
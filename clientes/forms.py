@@ -2,13 +2,14 @@
 from django import forms
 from .models import Cliente, UF_CHOICES
 from condominios.models import Condominio
+from mca.lookups import RemoteSelect
 
 class ClienteForm(forms.ModelForm):
     condominio = forms.ModelChoiceField(
         queryset=Condominio.objects.filter(ativo=True).order_by("nome"),
         required=True,
         label="Condomínio",
-        widget=forms.Select(attrs={"class": "form-select"})
+        widget=RemoteSelect("condominios_ativos", attrs={"class": "form-select"})
     )
 
     class Meta:
@@ -31,5 +32,5 @@ class ClienteFiltroForm(forms.Form):
     condominio = forms.ModelChoiceField(
         queryset=Condominio.objects.filter(ativo=True).order_by("nome"),
         required=False, label="Condomínio",
-        widget=forms.Select(attrs={"class": "form-select"})
+        widget=RemoteSelect("condominios_ativos", attrs={"class": "form-select"}, placeholder="Todos")
     )
@@ -0,0 +1,28 @@
+# clientes/jobs.py
+"""Tarefas em segundo plano de clientes (ver mca/jobs.py)."""
+from mca import condicional
+from mca.jobs import tarefa
+
+from . import services as cs
+
+
+@tarefa("clientes.importar", titulo="Importação de clientes")
+def importar(ex, *, entrada: str) -> dict:
+    rel = cs.importar_excel(entrada, progresso=ex.progresso)
+    return {
+        **rel,
+        "mensagem": (f"Importação: criados={rel.get('created', 0)} "
+                     f"atualizados={rel.get('updated', 0)} ignorados={rel.get('skipped', 0)}"),
+    }
+
+
+def _clientes(*, q: str = "", ativos: str = ""):
+    return cs.buscar_clientes(q=q, ativos=None if ativos == "" else ativos == "1")
+
+
+@tarefa("clientes.exportar", titulo="Exportação de clientes", replica=True,
+        validador=lambda **filtros: condicional.validador(_clientes(**filtros)))
+def exportar(ex, **filtros) -> dict:
+    filename, content = cs.exportar_excel(_clientes(**filtros))
+    ex.salvar_arquivo(filename, content)
+    return {"mensagem": "Planilha de clientes gerada."}
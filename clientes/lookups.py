@@ -0,0 +1,17 @@
+# clientes/lookups.py — selects remotos (ver mca/lookups.py)
+from mca.lookups import registrar
+
+from .busca import filtro_busca
+from .models import Cliente
+
+
+def _rotulo(c: Cliente) -> str:
+    return f"{c.nome_razao} — {c.cpf_cnpj}"
+
+
+registrar(
+    "clientes",
+    queryset=lambda: Cliente.objects.only("id", "nome_razao", "cpf_cnpj").order_by("nome_razao", "id"),
+    busca=lambda qs, q: qs.filter(filtro_busca(q)),
+    rotulo=_rotulo,
+)
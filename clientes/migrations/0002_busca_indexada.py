@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-19 07:45
+
+from django.db import migrations, models
+
+from clientes.busca import (
+    garantir_indice_fts, remover_indice_fts, somente_digitos, texto_busca_cliente,
+)
+
+
+def preencher_busca(apps, schema_editor):
+    Cliente = apps.get_model("clientes", "Cliente")
+    lote = []
+    for c in Cliente.objects.only("id", "nome_razao", "email", "cpf_cnpj").iterator(chunk_size=1000):
+        c.busca = texto_busca_cliente(c.nome_razao, c.email, c.cpf_cnpj)
+        c.cpf_cnpj_digits = somente_digitos(c.cpf_cnpj)
+        lote.append(c)
+        if len(lote) >= 1000:
+            Cliente.objects.bulk_update(lote, ["busca", "cpf_cnpj_digits"])
+            lote = []
+    if lote:
+        Cliente.objects.bulk_update(lote, ["busca", "cpf_cnpj_digits"])
+
+
+def criar_fts(apps, schema_editor):
+    garantir_indice_fts(schema_editor.connection, rebuild=True)
+
+
+def remover_fts(apps, schema_editor):
+    remover_indice_fts(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0001_initial'),
+        ('condominios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='busca',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='cpf_cnpj_digits',
+            field=models.CharField(blank=True, default='', editable=False, max_length=18),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['cpf_cnpj_digits'], name='clientes_cl_cpf_cnp_f9d1b8_idx'),
+        ),
+        migrations.RunPython(preencher_busca, migrations.RunPython.noop),
+        migrations.RunPython(criar_fts, remover_fts),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0002_busca_indexada'),
+        ('condominios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cliente',
+            name='clientes_cl_cpf_cnp_0eeb49_idx',
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['nome_razao', 'id'], name='clientes_ativos_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['condominio', 'nome_razao', 'id'], name='clientes_ativos_cond_idx'),
+        ),
+    ]
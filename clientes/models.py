@@ -1,6 +1,10 @@
 # clientes/models.py
 from django.db import models
 
+from mca.alteracoes import RastreiaAlteracoes
+
+from .busca import somente_digitos, texto_busca_cliente
+
 UF_CHOICES = [
     ("AC","AC"),("AL","AL"),("AM","AM"),("AP","AP"),("BA","BA"),("CE","CE"),("DF","DF"),
     ("ES","ES"),("GO","GO"),("MA","MA"),("MG","MG"),("MS","MS"),("MT","MT"),("PA","PA"),
@@ -8,7 +12,7 @@ UF_CHOICES = [
     ("RR","RR"),("RS","RS"),("SC","SC"),("SE","SE"),("SP","SP"),("TO","TO"),
 ]
 
-class Cliente(models.Model):
+class Cliente(RastreiaAlteracoes, models.Model):
     cpf_cnpj = models.CharField(max_length=18, unique=True)  # armazene formatado ou só dígitos; normalize nos services
     nome_razao = models.CharField(max_length=255)
     data_nascimento = models.DateField(null=True, blank=True)
@@ -37,13 +41,32 @@ class Cliente(models.Model):
     #Vinculo direto com condomínio
     condominio = models.ForeignKey('condominios.Condominio', on_delete=models.CASCADE, related_name='clientes', null=False,blank=False)
 
+    # Índice de busca (preenchidos no save; ver clientes/busca.py)
+    busca = models.TextField(blank=True, default="", editable=False)
+    cpf_cnpj_digits = models.CharField(max_length=18, blank=True, default="", editable=False)
+
     class Meta:
         ordering = ["nome_razao", "id"]
         indexes = [
             models.Index(fields=["nome_razao"]),
-            models.Index(fields=["cpf_cnpj"]),
             models.Index(fields=["email"]),
+            models.Index(fields=["cpf_cnpj_digits"]),
+            # autocomplete/matrícula: só ativos, na ordem padrão (e por condomínio)
+            models.Index(fields=["nome_razao", "id"], condition=models.Q(ativo=True),
+                         name="clientes_ativos_nome_idx"),
+            models.Index(fields=["condominio", "nome_razao", "id"], condition=models.Q(ativo=True),
+                         name="clientes_ativos_cond_idx"),
         ]
 
+    _CAMPOS_BUSCA = {"nome_razao", "email", "cpf_cnpj"}
+
+    def save(self, *args, **kwargs):
+        self.busca = texto_busca_cliente(self.nome_razao, self.email, self.cpf_cnpj)
+        self.cpf_cnpj_digits = somente_digitos(self.cpf_cnpj)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self._CAMPOS_BUSCA & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"busca", "cpf_cnpj_digits"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.nome_razao} — {self.cpf_cnpj}"
@@ -1,6 +1,7 @@
 # clientes/services.py
 from __future__ import annotations
-from typing import Optional, Iterable
+import logging
+from typing import Callable, Optional, Iterable
 import re
 from datetime import date
 from django.db.models import Q
@@ -12,7 +13,14 @@ from datetime import timedelta
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
+from mca import alteracoes
+
 from .models import Cliente
+from .busca import (
+    AUTOCOMPLETE_TTL, casa_busca, chave_autocomplete, filtro_busca,
+    normalizar_busca, somente_digitos, versao_autocomplete,
+)
+from django.core.cache import cache
 # clientes/services.py
 from datetime import timedelta
 import secrets
@@ -23,6 +31,8 @@ from django.urls import reverse
 from notificacoes.emails import send_email_html
 # clientes/services.py
 
+logger = logging.getLogger(__name__)
+
 
 _ONLY_DIGITS = re.compile(r"\D+")
 
@@ -39,15 +49,11 @@ def paginar(qs, page: int = 1, per_page: int = 20):
         return p.page(p.num_pages if page > 1 else 1)
 
 def buscar_clientes(q: str = "", ativos: Optional[bool] = None, condominio: Optional[int] = None):
-    qs = Cliente.objects.all()
+    qs = Cliente.objects.select_related("condominio")
     if condominio:
         qs = qs.filter(condominio_id=condominio)
     if q:
-        q_clean = clean_doc(q)
-        cond = Q(nome_razao__icontains=q) | Q(email__icontains=q)
-        if q_clean:
-            cond |= Q(cpf_cnpj__icontains=q_clean)
-        qs = qs.filter(cond)
+        qs = qs.filter(filtro_busca(q))
     if ativos is not None:
         qs = qs.filter(ativo=ativos)
     return qs.order_by("nome_razao", "id")
@@ -89,7 +95,7 @@ def criar_cliente(data: dict) -> Cliente:
 
 @transaction.atomic
 def atualizar_cliente(cliente_id: int, data: dict) -> Cliente:
-    print('atualizando cliente')
+    logger.debug("atualizando cliente", extra={"cliente_id": cliente_id})
     c = Cliente.objects.filter(id=cliente_id).first()
     if not c:
         raise ObjectDoesNotExist("Cliente não encontrado.")
@@ -97,10 +103,7 @@ def atualizar_cliente(cliente_id: int, data: dict) -> Cliente:
         data["cpf_cnpj"] = clean_doc(data["cpf_cnpj"])
         if not data["cpf_cnpj"]:
             raise ValidationError("CPF/CNPJ inválido.")
-    for k, v in data.items():
-        setattr(c, k, v)
-    c.full_clean()
-    c.save()
+    alteracoes.atualizar_campos(c, data)
     return c
 
 @transaction.atomic
@@ -113,11 +116,12 @@ def ativar(cliente_id: int, ativo: bool = True) -> Cliente:
     return c
 
 # ==== Importação/Exportação Excel (openpyxl) ====
-def importar_excel(file) -> dict:
+def importar_excel(file, *, progresso: Optional[Callable[[int, Optional[int]], None]] = None) -> dict:
     """
     Espera um .xlsx com cabeçalhos:
     cpf_cnpj,nome_razao,data_nascimento,telefone_emergencial,telefone_celular,
     cep,numero_id,logradouro,bairro,complemento,municipio,estado,email,ativo,condominio_id
+    `progresso(linhas_lidas, total)` é chamado a cada linha (jobs em segundo plano).
     """
     from openpyxl import load_workbook
     from django.core.exceptions import ValidationError
@@ -143,7 +147,10 @@ def importar_excel(file) -> dict:
             raise ValidationError(f"Coluna obrigatória ausente: {r}")
 
     created = updated = skipped = 0
-    for row in ws.iter_rows(min_row=2):
+    total = ws.max_row - 1 if ws.max_row else None
+    for n, row in enumerate(ws.iter_rows(min_row=2)):
+        if progresso:
+            progresso(n, total)
         get = lambda h: (row[idx[h]].value if h in idx else None)
 
         condominio_id = _to_int(get("condominio_id"))
@@ -282,16 +289,48 @@ def enviar_email_aceite(cliente, request=None):
 
 
 
-def buscar_clientes_api(q: str, limit: int = 15):
-    qs = Cliente.objects.filter(ativo=True)
-    if q:
-        q = q.strip()
-        q_clean = "".join(ch for ch in q if ch.isalnum())  # limpa CPF/CNPJ
-        qs = qs.filter(
-            Q(nome_razao__icontains=q) |
-            Q(email__icontains=q) |
-            Q(cpf_cnpj__icontains=q_clean)
+_CAMPOS_API = ("id", "nome_razao", "cpf_cnpj", "email")
+
+
+def buscar_clientes_api(q: str, limit: int = 15) -> list[dict]:
+    """
+    Autocomplete de clientes ativos (chamado a cada tecla nos modais de matrícula).
+
+    Cache por termo normalizado, invalidado em qualquer escrita de Cliente.
+    Se um prefixo do termo já está no cache com resultado completo (menos de
+    `limit` linhas), o resultado é filtrado em memória sem ir ao banco —
+    digitar "joa" → "joao" → "joao s" gera uma única consulta.
+    """
+    termo = normalizar_busca(q)
+    versao = versao_autocomplete()
+    chave = chave_autocomplete(versao, termo, limit)
+
+    entry = cache.get(chave)
+    if entry is None and termo:
+        # prefixo só serve se também cobre o casamento por documento
+        tem_digitos = bool(somente_digitos(termo))
+        prefixos = {
+            chave_autocomplete(versao, termo[:n], limit): n
+            for n in range(len(termo) - 1, -1, -1)
+            if not tem_digitos or somente_digitos(termo[:n])
+        }
+        achados = cache.get_many(list(prefixos))
+        for k in sorted(achados, key=prefixos.get, reverse=True):
+            base = achados[k]
+            if base["completo"]:
+                entry = {"completo": True, "rows": [r for r in base["rows"] if casa_busca(r, termo)]}
+                cache.set(chave, entry, AUTOCOMPLETE_TTL)
+                break
+
+    if entry is None:
+        qs = Cliente.objects.filter(ativo=True)
+        if termo:
+            qs = qs.filter(filtro_busca(q))
+        rows = list(
+            qs.order_by("nome_razao", "id")
+              .values(*_CAMPOS_API, "busca", "cpf_cnpj_digits")[:limit + 1]
         )
-    return (qs
-            .order_by("nome_razao", "id")
-            .values("id", "nome_razao", "cpf_cnpj", "email")[:limit])
+        entry = {"completo": len(rows) <= limit, "rows": rows[:limit]}
+        cache.set(chave, entry, AUTOCOMPLETE_TTL)
+
+    return [{k: r[k] for k in _CAMPOS_API} for r in entry["rows"][:limit]]
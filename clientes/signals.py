@@ -1,4 +1,6 @@
 # clientes/signals.py
+import logging
+
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.template import Context, Template
@@ -6,6 +8,8 @@ from django.core.mail import EmailMessage
 from .models import Cliente
 from parametros.models import ParametroContrato
 
+logger = logging.getLogger(__name__)
+
 @receiver(post_save, sender=Cliente)
 def enviar_contrato_email(sender, instance, created, **kwargs):
     if not created:
@@ -14,7 +18,8 @@ def enviar_contrato_email(sender, instance, created, **kwargs):
     try:
         contrato = ParametroContrato.objects.filter(ativo=True).first()
         if not contrato:
-            print("⚠️ Nenhum modelo de contrato ativo encontrado.")
+            logger.warning("nenhum modelo de contrato ativo; contrato não enviado",
+                           extra={"cliente_id": instance.pk})
             return
 
         # Renderiza o corpo do email e do contrato com dados do cliente
@@ -30,6 +35,6 @@ def enviar_contrato_email(sender, instance, created, **kwargs):
         email.content_subtype = "html"  # envia como HTML
         email.send(fail_silently=False)
 
-        print(f"✅ Contrato enviado para {instance.email}")
-    except Exception as e:
-        print(f"❌ Erro ao enviar contrato: {e}")
+        logger.info("contrato enviado", extra={"cliente_id": instance.pk})
+    except Exception:
+        logger.exception("erro ao enviar contrato", extra={"cliente_id": instance.pk})
@@ -1,3 +1,33 @@
+import time
+
 from django.test import TestCase
+from django.urls import reverse
+
+from condominios.models import Condominio
+from mca.testes import OrcamentoViewsTestCase, Processo
+
+from . import services
+from .models import Cliente
+
+
+class OrcamentoConsultasTests(OrcamentoViewsTestCase):
+    def test_lista(self):
+        self.assertDentroDoOrcamento(reverse("clientes:list"))
+
+    def test_lista_com_busca(self):
+        self.assertDentroDoOrcamento(reverse("clientes:list"), data={"q": "silva"})
+
 
-# Create your tests here.
+class AutocompleteEntreProcessosTests(TestCase):
+    def test_cliente_criado_em_outro_processo_aparece(self):
+        a, b = Processo.par(self, services)
+        condominio = Condominio.objects.create(cnpj="00000000000191", nome="Central")
+        with a.ativo():
+            self.assertEqual(services.buscar_clientes_api("zeferino"), [])
+        with b.ativo():
+            Cliente.objects.create(cpf_cnpj="12345678909", nome_razao="Zeferino Alves",
+                                   condominio=condominio, ativo=True)
+        with a.ativo():
+            self.assertEqual(services.buscar_clientes_api("zeferino"), [])  # ainda na versão do processo
+            time.sleep(Processo.TTL * 2)
+            self.assertEqual(len(services.buscar_clientes_api("zeferino")), 1)
@@ -7,9 +7,11 @@ app_name = "clientes"
 # urls.py
 urlpatterns = [
     path("clientes/", views.list_clientes, name="list"),
+    path("clientes/tabela/", views.list_clientes, {"parcial": True}, name="tabela"),
     path("clientes/criar/", views.create_cliente, name="create"),
     path("clientes/<int:pk>/atualizar/", views.update_cliente, name="update"),
     path("clientes/<int:pk>/status/", views.toggle_status, name="toggle_status"),
+    path("clientes/api/buscar/", views.buscar_clientes_json, name="api_buscar"),
 
     # Página com termos (GET) + confirmação via POST
     path("clientes/aceite/<str:token>/", views.aceite_contrato, name="aceite"),
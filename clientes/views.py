@@ -3,7 +3,7 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.contrib import messages
-from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.views.decorators.http import require_http_methods, require_POST
 from django.utils import timezone
 
@@ -13,22 +13,19 @@ from . import services as cs
 
 from django.contrib.auth.decorators import login_required, user_passes_test
 
-def is_diretor(user):
-    return user.groups.filter(name='Diretoria').exists() or user.is_superuser
-
-def is_professor(user):
-    return user.groups.filter(name='Professor').exists()
-
-def is_estagiario(user):
-    return user.groups.filter(name='Estagiario').exists()
+from mca.roles import is_diretor, is_professor, is_estagiario
+from mca.query_budget import orcamento_consultas
+from mca.paginacao import paginar_duas_fases, querystring_filtros
+from mca import jobs
 
 # views.py
 UF_LIST = ["AC","AL","AP","AM","BA","CE","DF","ES","GO","MA","MT","MS","MG",
            "PA","PB","PR","PE","PI","RJ","RN","RS","RO","RR","SC","SP","SE","TO"]
 
+@orcamento_consultas(7)
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
-def list_clientes(request: HttpRequest):
+def list_clientes(request: HttpRequest, parcial: bool = False):
     f = ClienteFiltroForm(request.GET or None)
     cd = f.cleaned_data if f.is_valid() else {}
     qs = cs.buscar_clientes(
@@ -36,27 +33,34 @@ def list_clientes(request: HttpRequest):
         ativos=(None if (cd.get("ativos") in (None, "")) else (cd.get("ativos") == "1")),
         condominio=cd.get("condominio")
     )
-    # paginação segura
-    page_str = request.GET.get("page", "1")
-    try:
-        page = max(1, int(page_str))
-    except Exception:
-        page = 1
-    page_obj = cs.paginar(qs, page=page, per_page=20)
+    # cursor (nome_razao, id) em duas fases: ids sem JOIN, depois select_related só da página
+    page_obj = paginar_duas_fases(qs, request.GET.get("cursor"), por_pagina=20)
+    base_qs, suffix = querystring_filtros(request)
+    ctx = {"page_obj": page_obj, "suffix": suffix, "base_qs": base_qs}
 
-    qd = request.GET.copy(); qd.pop("page", None)
-    base_qs = qd.urlencode()
-    suffix = f"&{base_qs}" if base_qs else ""
+    # só tabela + paginação (filtro/página trocados pela própria lista)
+    if parcial:
+        return render(request, "clientes/tabela.html", ctx)
 
     return render(request, "clientes/list.html", {
+        **ctx,
         "filtro_form": f,
-        "page_obj": page_obj,
-        "suffix": suffix,
-        "base_qs": base_qs,
         "cliente_form": ClienteForm(),
         "uf_list": UF_LIST
     })
 
+@require_http_methods(["GET"])
+@login_required
+@user_passes_test(is_diretor,login_url="/turmas/")
+def buscar_clientes_json(request: HttpRequest):
+    """Autocomplete dos modais de matrícula (clientes ativos)."""
+    try:
+        limit = max(1, min(50, int(request.GET.get("limit", 15))))
+    except (TypeError, ValueError):
+        limit = 15
+    rows = cs.buscar_clientes_api(request.GET.get("q", ""), limit=limit)
+    return JsonResponse({"results": rows})
+
 @require_http_methods(["POST"])
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
@@ -112,30 +116,20 @@ def importar_excel_view(request: HttpRequest):
     if not f:
         messages.error(request, "Selecione um arquivo .xlsx")
         return redirect(reverse("clientes:list"))
-    try:
-        rel = cs.importar_excel(f)
-        messages.success(
-            request,
-            f"Importação: criados={rel.get('created',0)} "
-            f"atualizados={rel.get('updated',0)} "
-            f"ignorados={rel.get('skipped',0)}"
-        )
-    except Exception as e:
-        messages.error(request, f"Falha ao importar: {e}")
-    return redirect(reverse("clientes:list"))
+    job = jobs.enfileirar("clientes.importar", entrada=f, usuario=request.user,
+                          voltar_para=reverse("clientes:list"))
+    return redirect(job)
 
 
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
 def exportar(request: HttpRequest):
-    qs = cs.buscar_clientes(
-        q=request.GET.get("q", ""),
-        ativos=None if request.GET.get("ativos", "") == "" else request.GET.get("ativos") == "1"
+    job = jobs.enfileirar(
+        "clientes.exportar",
+        params={"q": request.GET.get("q", ""), "ativos": request.GET.get("ativos", "")},
+        usuario=request.user, voltar_para=reverse("clientes:list"),
     )
-    filename, content = cs.exportar_excel(qs)
-    resp = HttpResponse(content, content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return resp
+    return redirect(job)
 
 
 # --------- Fluxo de aceite (público) ---------
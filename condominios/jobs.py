@@ -0,0 +1,26 @@
+# condominios/jobs.py
+"""Tarefas em segundo plano de condomínios (ver mca/jobs.py)."""
+from mca import condicional
+from mca.jobs import tarefa
+
+from . import services as cs
+from .models import Condominio
+
+
+@tarefa("condominios.importar", titulo="Importação de condomínios")
+def importar(ex, *, entrada: str) -> dict:
+    rel = cs.importar_condominios_de_excel(entrada, progresso=ex.progresso)
+    return {
+        **rel,
+        "mensagem": (f"Importação concluída: {rel.get('sucesso', 0)} OK, "
+                     f"{rel.get('criados', 0)} criados, {rel.get('atualizados', 0)} atualizados. "
+                     f"{len(rel.get('erros', []))} erros."),
+    }
+
+
+@tarefa("condominios.exportar", titulo="Exportação de condomínios", replica=True,
+        validador=lambda: condicional.validador(Condominio.objects.all()))
+def exportar(ex) -> dict:
+    filename, content = cs.exportar_condominios_para_excel()
+    ex.salvar_arquivo(filename, content)
+    return {"mensagem": "Planilha de condomínios gerada."}
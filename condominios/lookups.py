@@ -0,0 +1,42 @@
+# condominios/lookups.py — selects remotos (ver mca/lookups.py)
+from django.db.models import Q
+
+from mca.lookups import registrar
+
+from .models import Condominio
+
+
+def _busca(qs, q: str):
+    cond = Q(nome__icontains=q)
+    digitos = "".join(ch for ch in q if ch.isdigit())
+    if digitos:
+        cond |= Q(cnpj__startswith=digitos)
+    return qs.filter(cond)
+
+
+def _qs():
+    return Condominio.objects.only("id", "nome").order_by("nome", "id")
+
+
+def _rotulo(c: Condominio) -> str:
+    return c.nome
+
+
+registrar("condominios", queryset=_qs, busca=_busca, rotulo=_rotulo, referencia="condominios")
+registrar(
+    "condominios_ativos",
+    queryset=lambda: _qs().filter(ativo=True),
+    busca=_busca,
+    rotulo=_rotulo,
+    referencia="condominios",
+)
+
+# filtro da lista de turmas: só condomínios que têm modalidade (visível a qualquer papel)
+registrar(
+    "condominios_turmas",
+    queryset=lambda: _qs().filter(modalidades__isnull=False).distinct(),
+    busca=_busca,
+    rotulo=_rotulo,
+    permissao=lambda u: u.is_authenticated,
+    referencia="condominios",
+)
@@ -1,6 +1,8 @@
 from django.db import models
 from django.core.validators import RegexValidator, EmailValidator
 
+from mca.alteracoes import RastreiaAlteracoes
+
 # UF (mesmo padrão usado em Clientes)
 UF_CHOICES = [
     ('AC','AC'),('AL','AL'),('AM','AM'),('AP','AP'),('BA','BA'),('CE','CE'),
@@ -15,7 +17,7 @@ CNPJ_VALIDATOR = RegexValidator(
     message="CNPJ deve conter exatamente 14 dígitos (somente números)."
 )
 
-class Condominio(models.Model):
+class Condominio(RastreiaAlteracoes, models.Model):
     # Cadastro
     cnpj = models.CharField("CNPJ", max_length=14, unique=True, validators=[CNPJ_VALIDATOR])
     nome = models.CharField("Nome Completo", max_length=255)
@@ -1,15 +1,15 @@
 from __future__ import annotations
-from typing import Optional, Dict, Any, Tuple
+from typing import Callable, Optional, Dict, Any, Tuple
 from io import BytesIO
 from datetime import datetime
 
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.utils import timezone
 
-from openpyxl import load_workbook, Workbook
-from openpyxl.utils import get_column_letter
+from mca import alteracoes, escrita, referencias
 
 from .models import Condominio, UF_CHOICES
 
@@ -63,15 +63,12 @@ def atualizar_condominio(condominio_id: int, data: Dict[str, Any]) -> Condominio
     data = {**data}
     if "cnpj" in data and data["cnpj"]:
         novo = _only_digits(data["cnpj"])
-        if Condominio.objects.exclude(id=condominio_id).filter(cnpj=novo).exists():
+        if novo != cond.cnpj and Condominio.objects.exclude(id=condominio_id).filter(cnpj=novo).exists():
             raise CondominioJaExiste("Já existe um condomínio com este CNPJ.")
         data["cnpj"] = novo
     if "estado" in data:
         data["estado"] = _normalize_uf(data.get("estado")) or ""
-    for k, v in data.items():
-        setattr(cond, k, v)
-    cond.full_clean()
-    cond.save()
+    alteracoes.atualizar_campos(cond, data)
     return cond
 
 @transaction.atomic
@@ -162,12 +159,16 @@ def atualizar_endereco(
 # =====================
 # Importação / Exportação Excel
 # =====================
-def importar_condominios_de_excel(file_or_path, *, sheet_name: str | None = None, strategy: str = "upsert") -> dict:
+def importar_condominios_de_excel(file_or_path, *, sheet_name: str | None = None, strategy: str = "upsert",
+                                  progresso: Optional[Callable[[int, Optional[int]], None]] = None) -> dict:
     """
     Importa condomínios de planilha Excel.
     Colunas reconhecidas (case-insensitive; acentos ignorados):
       - cnpj, nome, nome_completo, email, cep, numero, logradouro, bairro,
         complemento, municipio, cidade, estado, uf, ativo
+    Lê a planilha em streaming e grava em lotes de LOTE_IMPORTACAO linhas
+    (cada lote commitado via mca.escrita.em_lotes). CNPJ repetido na planilha
+    e linhas inválidas viram erro da linha, sem derrubar o lote.
     Retorna relatório com contagens e erros.
     """
     import unicodedata, re
@@ -198,61 +199,142 @@ def importar_condominios_de_excel(file_or_path, *, sheet_name: str | None = None
         "ativo": "ativo",
     }
 
-    wb = load_workbook(file_or_path, data_only=True)
-    ws = wb[sheet_name] if sheet_name in wb.sheetnames else (wb.active if sheet_name is None else wb.active)
+    from openpyxl import load_workbook
+
+    # read_only: as linhas são lidas do arquivo sob demanda, a planilha não fica inteira na memória
+    wb = load_workbook(file_or_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name in wb.sheetnames else wb.active
+        linhas = ws.iter_rows(values_only=True)
+
+        headers = [norm(v) for v in next(linhas, ())]
+        col_to_field = {}
+        for idx, h in enumerate(headers):
+            if h in header_map:
+                col_to_field[idx] = header_map[h]
+
+        required = {"cnpj", "nome"}
+        if not required.issubset(set(col_to_field.values())):
+            faltando = required - set(col_to_field.values())
+            raise ValidationError(f"Planilha incompleta. Faltam colunas: {', '.join(sorted(faltando))}")
+
+        rel = {"total_linhas": 0, "sucesso": 0, "criados": 0, "atualizados": 0, "erros": []}
+        vistos: Dict[str, int] = {}  # cnpj -> primeira linha da planilha com ele
+
+        def registros():
+            for i, row in enumerate(linhas, start=2):
+                if all(v is None or v == "" for v in row):
+                    continue  # linhas vazias (comuns no fim da planilha)
+                yield i, {field: row[idx] for idx, field in col_to_field.items() if idx < len(row)}
+
+        total = ws.max_row - 1 if ws.max_row else None
+        try:
+            escrita.em_lotes(
+                registros(), lambda lote: _importar_lote(lote, strategy, vistos, rel),
+                tamanho=LOTE_IMPORTACAO,
+                progresso=(lambda feitos, _: progresso(feitos, total)) if progresso else None,
+            )
+        finally:
+            # bulk_create/bulk_update não disparam post_save: combos, nomes e fragmentos
+            referencias.invalidar("condominios")
+    finally:
+        wb.close()
+
+    return rel
+
 
-    headers = [norm(c.value) for c in next(ws.iter_rows(min_row=1, max_row=1))]
-    col_to_field = {}
-    for idx, h in enumerate(headers):
-        if h in header_map:
-            col_to_field[idx] = header_map[h]
+LOTE_IMPORTACAO = 500  # linhas por transação: uma consulta `cnpj__in` + bulk_create/bulk_update
+_CAMPOS_TEXTO = ("nome", "email", "cep", "numero", "logradouro", "bairro", "complemento", "municipio")
 
-    required = {"cnpj", "nome"}
-    if not required.issubset(set(col_to_field.values())):
-        faltando = required - set(col_to_field.values())
-        raise ValidationError(f"Planilha incompleta. Faltam colunas: {', '.join(sorted(faltando))}")
 
-    rel = {"total_linhas": 0, "sucesso": 0, "criados": 0, "atualizados": 0, "erros": []}
+def _texto(val: Any) -> str:
+    if val is None:
+        return ""
+    if isinstance(val, float) and val.is_integer():
+        val = int(val)  # CEP/número digitados como número no Excel
+    return str(val).strip()
 
-    for i, row in enumerate(ws.iter_rows(min_row=2), start=2):
+
+def _importar_lote(lote: list, strategy: str, vistos: Dict[str, int], rel: dict) -> None:
+    """
+    Um lote da importação (já dentro da transação de `em_lotes`): normaliza a
+    fatia, valida linha a linha (erro vai para o relatório, o lote segue) e grava
+    o que passou com bulk_create/bulk_update.
+    """
+    for _, data in lote:
+        data["cnpj"] = _only_digits(data.get("cnpj"))
+        if "estado" in data:
+            data["estado"] = _normalize_uf(data["estado"]) or ""
+        if "ativo" in data:
+            s = str(data["ativo"]).strip().lower() if data["ativo"] is not None else ""
+            data["ativo"] = s in ("1","true","t","sim","s","yes","y")
+        for campo in _CAMPOS_TEXTO:
+            if campo in data:
+                data[campo] = _texto(data[campo])
+
+    cnpjs = {data["cnpj"] for _, data in lote if data["cnpj"]}
+    existentes = {c.cnpj: c for c in Condominio.objects.filter(cnpj__in=cnpjs)}
+    agora = timezone.now()
+
+    validos, campos = [], {"updated_at"}
+    for linha, data in lote:
         rel["total_linhas"] += 1
         try:
-            data = {}
-            for idx, cell in enumerate(row):
-                field = col_to_field.get(idx)
-                if not field:
-                    continue
-                val = cell.value
-                if field == "cnpj":
-                    val = _only_digits(val)
-                elif field == "estado":
-                    val = _normalize_uf(val) or ""
-                elif field == "ativo":
-                    s = str(val).strip().lower() if val is not None else ""
-                    val = s in ("1","true","t","sim","s","yes","y")
-                data[field] = val
-
-            if not data.get("cnpj"):
+            cnpj = data["cnpj"]
+            if not cnpj:
                 raise ValidationError("CNPJ vazio.")
-            if strategy == "create":
-                cond = criar_condominio(data)
-                rel["criados"] += 1
+            if cnpj in vistos:
+                raise ValidationError(f"CNPJ repetido na planilha (linha {vistos[cnpj]}).")
+            vistos[cnpj] = linha
+
+            cond = existentes.get(cnpj)
+            if cond is None:
+                cond = Condominio(**data)
+            elif strategy == "create":
+                raise CondominioJaExiste("Já existe um condomínio com este CNPJ.")
             else:
-                # upsert
-                doc = data["cnpj"]
-                existente = Condominio.objects.filter(cnpj=doc).first()
-                if existente:
-                    cond = atualizar_condominio(existente.id, data)
-                    rel["atualizados"] += 1
-                else:
-                    cond = criar_condominio(data)
-                    rel["criados"] += 1
-
-            rel["sucesso"] += 1
-        except Exception as e:
-            rel["erros"].append({"linha": i, "erro": str(e)})
+                for k, v in data.items():
+                    setattr(cond, k, v)
+                cond.updated_at = agora  # bulk_update não aplica auto_now
+                campos.update(data)
+            cond.full_clean(validate_unique=False)  # CNPJ único: `existentes` + `vistos`
+        except ValidationError as e:
+            rel["erros"].append({"linha": linha, "erro": str(e)})
+            continue
+        validos.append((linha, cond))
+
+    novos = [c for _, c in validos if c.pk is None]
+    alterados = [c for _, c in validos if c.pk is not None]
+    renomeados = [c.pk for c in alterados if "nome" in c.campos_alterados()]
+    try:
+        with transaction.atomic():
+            Condominio.objects.bulk_create(novos)
+            Condominio.objects.bulk_update(alterados, sorted(campos))
+            if renomeados:
+                # bulk_update não dispara o post_save que refaz `Turma.sort_key`
+                from turmas import ordenacao
+                from turmas.models import Turma
+                ordenacao.recalcular_turmas(Turma.objects.filter(modalidade__condominio_id__in=renomeados))
+    except IntegrityError:
+        # o banco recusou algo que passou na validação (ex.: o mesmo CNPJ gravado
+        # por outro processo agora): grava uma a uma para apontar a linha
+        for cond in novos:
+            cond.pk, cond._state.adding = None, True
+        novos, alterados = [], []
+        for linha, cond in validos:
+            criado = cond.pk is None
+            try:
+                with transaction.atomic():
+                    cond.save()
+            except IntegrityError as e:
+                rel["erros"].append({"linha": linha, "erro": str(e)})
+                continue
+            (novos if criado else alterados).append(cond)
+
+    rel["criados"] += len(novos)
+    rel["atualizados"] += len(alterados)
+    rel["sucesso"] += len(novos) + len(alterados)
 
-    return rel
 
 def exportar_condominios_para_excel(queryset=None) -> tuple[str, bytes]:
     """
@@ -260,6 +342,9 @@ def exportar_condominios_para_excel(queryset=None) -> tuple[str, bytes]:
     Aba única "Condominios" com colunas:
       cnpj, nome, email, cep, numero, logradouro, bairro, complemento, municipio, estado, ativo, id, created_at, updated_at
     """
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
     qs = queryset if queryset is not None else Condominio.objects.all().order_by("nome")
 
     wb = Workbook()
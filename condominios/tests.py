@@ -1,3 +1,45 @@
+from io import BytesIO
+
 from django.test import TestCase
+from django.urls import reverse
+from openpyxl import Workbook
+
+from mca.dataset import gerar_dataset
+from mca.testes import DATASET_TESTES, OrcamentoViewsTestCase
+from turmas import ordenacao
+from turmas.models import Turma
+
+from . import services
+from .models import Condominio
+
+
+class OrcamentoConsultasTests(OrcamentoViewsTestCase):
+    def test_lista(self):
+        self.assertDentroDoOrcamento(reverse("condominios:list"))
+
+
+class ImportacaoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        gerar_dataset(DATASET_TESTES)
+
+    def _planilha(self, linhas) -> BytesIO:
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["cnpj", "nome"])
+        for linha in linhas:
+            ws.append(linha)
+        buf = BytesIO()
+        wb.save(buf)
+        buf.seek(0)
+        return buf
+
+    def test_renomear_recalcula_ordenacao_das_turmas(self):
+        cond = Condominio.objects.filter(modalidades__turmas__isnull=False).distinct().first()
+        rel = services.importar_condominios_de_excel(self._planilha([[cond.cnpj, "Zuleika Residencial"]]))
 
-# Create your tests here.
+        self.assertEqual(rel["atualizados"], 1, rel["erros"])
+        turmas = Turma.objects.filter(modalidade__condominio=cond).select_related("modalidade")
+        self.assertTrue(turmas)
+        for t in turmas:
+            self.assertEqual(t.sort_key, ordenacao.chave_turma("Zuleika Residencial", t.modalidade.nome, t.hora_inicio))
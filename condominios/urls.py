@@ -5,6 +5,7 @@ app_name = "condominios"
 
 urlpatterns = [
     path("condominios/", views.list_condominios, name="list"),
+    path("condominios/tabela/", views.list_condominios, {"parcial": True}, name="tabela"),
     path("condominios/criar/", views.create_condominio, name="create"),
     path("condominios/<int:pk>/atualizar/", views.update_condominio, name="update"),
     path("condominios/exportar/", views.exportar_condominios_view, name="exportar"),
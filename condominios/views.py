@@ -10,18 +10,15 @@ from . import services as cs
 
 from django.contrib.auth.decorators import login_required, user_passes_test
 
-def is_diretor(user):
-    return user.groups.filter(name='Diretoria').exists() or user.is_superuser
-
-def is_professor(user):
-    return user.groups.filter(name='Professor').exists()
-
-def is_estagiario(user):
-    return user.groups.filter(name='Estagiario').exists()
+from mca.roles import is_diretor, is_professor, is_estagiario
+from mca.query_budget import orcamento_consultas
+from mca.paginacao import paginar_duas_fases, querystring_filtros
+from mca import jobs
 
+@orcamento_consultas(6)  # sessão, usuário, papel, total (em cache depois), ids, página
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
-def list_condominios(request: HttpRequest):
+def list_condominios(request: HttpRequest, parcial: bool = False):
     # filtros
     q = request.GET.get("q", "").strip()
     cidade = request.GET.get("cidade", "").strip()
@@ -33,26 +30,21 @@ def list_condominios(request: HttpRequest):
 
     qs = cs.buscar_condominios(q=q, uf=uf, cidade=cidade, ativos=ativos)
 
-    # paginação segura
-    page_str = request.GET.get("page", "1")
-    try:
-        page = int(page_str)
-        if page < 1: page = 1
-    except (TypeError, ValueError):
-        page = 1
-    page_obj = cs.paginar_queryset(qs, page=page, per_page=20)
+    # cursor (nome, id) em duas fases: ids primeiro, objetos só da página
+    page_obj = paginar_duas_fases(qs, request.GET.get("cursor"), por_pagina=20)
+    base_qs, suffix = querystring_filtros(request)
 
-    # querystring base (remove page)
-    qd = request.GET.copy()
-    qd.pop("page", None)
-    base_qs = qd.urlencode()
+    # só tabela + paginação (filtro/página trocados pela própria lista)
+    if parcial:
+        return render(request, "condominios/tabela.html", {
+            "page_obj": page_obj, "base_qs": base_qs, "suffix": suffix,
+        })
 
     filtro_form = CondominioFiltroForm(initial={
         "q": q, "cidade": cidade, "uf": uf, "ativos": ativos_param
     })
     cond_form = CondominioForm()
     import_form = ImportacaoExcelForm()
-    suffix = f"&{base_qs}" if base_qs else ""   # 👈 sufixo pronto
 
     return render(request, "condominios/list.html", {
         "page_obj": page_obj,
@@ -100,13 +92,8 @@ def update_condominio(request: HttpRequest, pk: int):
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
 def exportar_condominios_view(request: HttpRequest):
-    filename, content = cs.exportar_condominios_para_excel()
-    resp = HttpResponse(
-        content,
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return resp
+    job = jobs.enfileirar("condominios.exportar", usuario=request.user, voltar_para=reverse("condominios:list"))
+    return redirect(job)
 
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
@@ -118,18 +105,6 @@ def importar_condominios_view(request: HttpRequest):
         messages.error(request, "Envie um arquivo .xlsx válido.")
         return redirect(reverse("condominios:list"))
 
-    try:
-        rel = cs.importar_condominios_de_excel(request.FILES["arquivo"])
-        messages.success(
-            request,
-            f"Importação concluída: {rel.get('sucesso',0)} OK, "
-            f"{rel.get('criados',0)} criados, {rel.get('atualizados',0)} atualizados. "
-            f"{len(rel.get('erros',[]))} erros."
-        )
-        erros = rel.get("erros", [])
-        if erros:
-            preview = "; ".join(f"L{e['linha']}: {e['erro']}" for e in erros[:3])
-            messages.warning(request, f"Erros (parcial): {preview}")
-    except Exception as e:
-        messages.error(request, f"Falha na importação: {e}")
-    return redirect(reverse("condominios:list"))
+    job = jobs.enfileirar("condominios.importar", entrada=request.FILES["arquivo"], usuario=request.user,
+                          voltar_para=reverse("condominios:list"))
+    return redirect(job)
@@ -14,6 +14,7 @@ from clientes.models import Cliente
 from funcionarios.models import Funcionario
 from condominios.models import Condominio
 from turmas.models import Turma
+from mca.lookups import RemoteSelect
 
 
 class LancamentoForm(forms.ModelForm):
@@ -38,6 +39,12 @@ class LancamentoForm(forms.ModelForm):
         widgets = {
             "vencimento": forms.DateInput(attrs={"type": "date"}),
             "observacao": forms.Textarea(attrs={"rows": 2}),
+            # opções sob demanda (mca/lookups.py): nada de despejar tabelas no <select>
+            "cliente": RemoteSelect("clientes"),
+            "funcionario": RemoteSelect("funcionarios"),
+            "condominio": RemoteSelect("condominios"),
+            "turma": RemoteSelect("turmas"),
+            "categoria": RemoteSelect("categorias"),
         }
 
 
@@ -45,7 +52,10 @@ class BaixaForm(forms.ModelForm):
     class Meta:
         model = Baixa
         fields = ["lancamento", "data", "valor", "forma", "observacao"]
-        widgets = {"data": forms.DateInput(attrs={"type": "date"})}
+        widgets = {
+            "data": forms.DateInput(attrs={"type": "date"}),
+            "lancamento": RemoteSelect("lancamentos"),
+        }
 
 
 class FiltroFinanceiroForm(forms.Form):
@@ -57,19 +67,24 @@ class FiltroFinanceiroForm(forms.Form):
 
     # Evitar consultas na importação: começam como .none()
     cliente = forms.ModelChoiceField(
-        queryset=Cliente.objects.none(), required=False, empty_label="Todos"
+        queryset=Cliente.objects.none(), required=False, empty_label="Todos",
+        widget=RemoteSelect("clientes", placeholder="Todos"),
     )
     funcionario = forms.ModelChoiceField(
-        queryset=Funcionario.objects.none(), required=False, empty_label="Todos"
+        queryset=Funcionario.objects.none(), required=False, empty_label="Todos",
+        widget=RemoteSelect("funcionarios", placeholder="Todos"),
     )
     condominio = forms.ModelChoiceField(
-        queryset=Condominio.objects.none(), required=False, empty_label="Todos"
+        queryset=Condominio.objects.none(), required=False, empty_label="Todos",
+        widget=RemoteSelect("condominios", placeholder="Todos"),
     )
     turma = forms.ModelChoiceField(
-        queryset=Turma.objects.none(), required=False, empty_label="Todas"
+        queryset=Turma.objects.none(), required=False, empty_label="Todas",
+        widget=RemoteSelect("turmas", placeholder="Todas"),
     )
     categoria = forms.ModelChoiceField(
-        queryset=CategoriaFinanceira.objects.none(), required=False, empty_label="Todas"
+        queryset=CategoriaFinanceira.objects.none(), required=False, empty_label="Todas",
+        widget=RemoteSelect("categorias", placeholder="Todas"),
     )
 
     ATIVOS_CHOICES = (("", "Todos"), ("1", "Ativos"), ("0", "Inativos"))
@@ -78,7 +93,8 @@ class FiltroFinanceiroForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        # Agora é seguro popular os querysets (app registry pronto)
+        # Agora é seguro popular os querysets (app registry pronto).
+        # Servem só para validar o POST: o RemoteSelect não itera as opções.
         self.fields["cliente"].queryset = Cliente.objects.all().order_by("nome_razao")
         self.fields["funcionario"].queryset = Funcionario.objects.filter(ativo=True).order_by("nome")
         self.fields["condominio"].queryset = Condominio.objects.all().order_by("nome")
@@ -88,7 +104,7 @@ class FiltroFinanceiroForm(forms.Form):
             Turma.objects
             .select_related("modalidade__condominio", "professor")
             .all()
-            .order_by("modalidade__condominio__nome", "modalidade__nome", "hora_inicio", "id")
+            .order_by("sort_key", "id")
         )
 
         self.fields["categoria"].queryset = CategoriaFinanceira.objects.all().order_by("nome")
@@ -103,11 +119,11 @@ class RecorrenciaMensalForm(forms.Form):
     primeiro_mes = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}), label="Mês inicial (qualquer dia)")
 
     # Começam como .none(), populamos no __init__
-    cliente = forms.ModelChoiceField(queryset=Cliente.objects.none(), required=False)
-    funcionario = forms.ModelChoiceField(queryset=Funcionario.objects.none(), required=False)
-    condominio = forms.ModelChoiceField(queryset=Condominio.objects.none(), required=False)
-    turma = forms.ModelChoiceField(queryset=Turma.objects.none(), required=False)
-    categoria = forms.ModelChoiceField(queryset=CategoriaFinanceira.objects.none(), required=False)
+    cliente = forms.ModelChoiceField(queryset=Cliente.objects.none(), required=False, widget=RemoteSelect("clientes"))
+    funcionario = forms.ModelChoiceField(queryset=Funcionario.objects.none(), required=False, widget=RemoteSelect("funcionarios"))
+    condominio = forms.ModelChoiceField(queryset=Condominio.objects.none(), required=False, widget=RemoteSelect("condominios"))
+    turma = forms.ModelChoiceField(queryset=Turma.objects.none(), required=False, widget=RemoteSelect("turmas"))
+    categoria = forms.ModelChoiceField(queryset=CategoriaFinanceira.objects.none(), required=False, widget=RemoteSelect("categorias"))
 
     observacao = forms.CharField(required=False)
 
@@ -123,7 +139,7 @@ class RecorrenciaMensalForm(forms.Form):
             Turma.objects
             .select_related("modalidade__condominio", "professor")
             .all()
-            .order_by("modalidade__condominio__nome", "modalidade__nome", "hora_inicio", "id")
+            .order_by("sort_key", "id")
         )
 
         self.fields["categoria"].queryset = CategoriaFinanceira.objects.all().order_by("nome")
@@ -0,0 +1,62 @@
+# financeiro/jobs.py
+"""Tarefas em segundo plano do financeiro (ver mca/jobs.py)."""
+from mca import condicional, referencias
+from mca.jobs import tarefa
+
+from . import services as fs
+from .forms import FiltroFinanceiroForm
+
+
+def _lancamentos(**filtros):
+    # mesmos filtros da lista (querystring da tela)
+    f = FiltroFinanceiroForm(filtros or None)
+    cd = f.cleaned_data if f.is_valid() else {}
+    qs = fs.buscar_lancamentos(
+        q=cd.get("q", ""),
+        tipo=cd.get("tipo") or None,
+        status=cd.get("status") or None,
+        venc_de=cd.get("venc_de") or None,
+        venc_ate=cd.get("venc_ate") or None,
+        cliente_id=cd.get("cliente").id if cd.get("cliente") else None,
+        funcionario_id=cd.get("funcionario").id if cd.get("funcionario") else None,
+        condominio_id=cd.get("condominio").id if cd.get("condominio") else None,
+        turma_id=cd.get("turma").id if cd.get("turma") else None,
+        categoria_id=cd.get("categoria").id if cd.get("categoria") else None,
+        ativos=(None if (cd.get("ativos") in (None, "")) else (cd.get("ativos") == "1"))
+    )
+    return qs
+
+
+def _validador_lancamentos(**filtros):
+    return condicional.validador(_lancamentos(**filtros), relacionados=("baixas", "cliente"),
+                                 extras=referencias.versoes())
+
+
+@tarefa("financeiro.exportar", titulo="Exportação de lançamentos", replica=True,
+        validador=_validador_lancamentos)
+def exportar(ex, **filtros) -> dict:
+    qs = _lancamentos(**filtros).select_related("cliente", "funcionario", "condominio", "turma", "categoria")
+    filename, content = fs.exportar_lancamentos_excel(qs)
+    ex.salvar_arquivo(filename, content)
+    return {"mensagem": "Planilha de lançamentos gerada."}
+
+
+@tarefa("financeiro.gerar_mensalidades", titulo="Mensalidades e pagamentos do mês")
+def gerar_mensalidades(ex, *, ano: int, mes: int, dia_venc: int = 5, turma_id=None) -> dict:
+    if turma_id:
+        ex.progresso(0, mensagem="Gerando mensalidades da turma...")
+        rel = fs.gerar_cobrancas_mensalidade_turma(turma_id=turma_id, ano=ano, mes=mes, dia_venc=dia_venc)
+        resumo = f"Mensalidades da turma: {rel['criados']} nova(s), {rel['existentes']} já existia(m)."
+    else:
+        ex.progresso(0, mensagem="Gerando mensalidades (todas as turmas)...")
+        rel = fs.gerar_cobrancas_mensalidades_global(ano=ano, mes=mes, dia_venc=dia_venc,
+                                                     progresso=ex.progresso)
+        resumo = f"Mensalidades (todas as turmas): {rel['criados']} nova(s), {rel['existentes']} já existia(m)."
+
+    ex.progresso(rel["criados"] + rel["existentes"], mensagem="Gerando pagamentos a professores...")
+    pag = fs.gerar_pagamentos_professores(ano, mes)
+    return {
+        "mensalidades": {"criados": rel["criados"], "existentes": rel["existentes"]},
+        "pagamentos": {"criados": pag["criados"]},
+        "mensagem": f"{resumo} Pagamentos a professores: {pag['criados']} lançamento(s) criado(s).",
+    }
@@ -0,0 +1,19 @@
+# financeiro/lookups.py — selects remotos (ver mca/lookups.py)
+from mca.lookups import registrar
+
+from .models import CategoriaFinanceira, Lancamento
+
+
+registrar(
+    "categorias",
+    queryset=lambda: CategoriaFinanceira.objects.order_by("nome"),
+    busca=lambda qs, q: qs.filter(nome__icontains=q),
+    rotulo=lambda c: c.nome,
+    referencia="categorias",
+)
+
+registrar(
+    "lancamentos",
+    queryset=lambda: Lancamento.objects.exclude(status="CANCELADO").order_by("-vencimento", "-id"),
+    busca=lambda qs, q: qs.filter(descricao__icontains=q),
+)
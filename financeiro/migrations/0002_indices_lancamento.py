@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0003_indices_parciais'),
+        ('condominios', '0001_initial'),
+        ('financeiro', '0001_initial'),
+        ('funcionarios', '0004_funcionario_data_admissao_funcionario_registro_cref_and_more'),
+        ('turmas', '0007_sort_keys'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='lancamento',
+            name='financeiro__tipo_48eec3_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='lancamento',
+            name='financeiro__cliente_94c5f4_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='lancamento',
+            name='financeiro__condomi_73dae2_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='lancamento',
+            name='financeiro__funcion_9507f6_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='lancamento',
+            name='financeiro__turma_i_7c5a0f_idx',
+        ),
+        migrations.AlterField(
+            model_name='baixa',
+            name='lancamento',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='baixas', to='financeiro.lancamento'),
+        ),
+        migrations.AlterField(
+            model_name='lancamento',
+            name='cliente',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lancamentos', to='clientes.cliente'),
+        ),
+        migrations.AddIndex(
+            model_name='lancamento',
+            index=models.Index(fields=['tipo', 'status', 'vencimento'], name='fin_lanc_tipo_status_venc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lancamento',
+            index=models.Index(condition=models.Q(('status', 'CANCELADO'), _negated=True), fields=['tipo', 'vencimento'], name='fin_lanc_em_uso_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lancamento',
+            index=models.Index(fields=['cliente', 'vencimento'], name='fin_lanc_cliente_venc_idx'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
+from mca.alteracoes import RastreiaAlteracoes
+
 TIPO_CHOICES = (
     ("RECEBER", "A Receber"),
     ("PAGAR", "A Pagar"),
@@ -35,7 +37,7 @@ class CategoriaFinanceira(models.Model):
         return self.nome
 
 
-class Lancamento(models.Model):
+class Lancamento(RastreiaAlteracoes, models.Model):
     tipo = models.CharField(max_length=8, choices=TIPO_CHOICES)
     descricao = models.CharField(max_length=255)
     valor = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(Decimal("0.00"))])
@@ -44,7 +46,8 @@ class Lancamento(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="ABERTO")
 
     # Relacionamentos opcionais (ligue ao que fizer sentido)
-    cliente = models.ForeignKey("clientes.Cliente", null=True, blank=True, on_delete=models.SET_NULL, related_name="lancamentos")
+    cliente = models.ForeignKey("clientes.Cliente", null=True, blank=True, on_delete=models.SET_NULL, related_name="lancamentos",
+                                db_index=False)  # coberto por (cliente, vencimento)
     funcionario = models.ForeignKey("funcionarios.Funcionario", null=True, blank=True, on_delete=models.SET_NULL, related_name="lancamentos")
     condominio = models.ForeignKey("condominios.Condominio", null=True, blank=True, on_delete=models.SET_NULL, related_name="lancamentos")
     turma = models.ForeignKey("turmas.Turma", null=True, blank=True, on_delete=models.SET_NULL, related_name="lancamentos")
@@ -64,12 +67,15 @@ class Lancamento(models.Model):
     class Meta:
         ordering = ["-vencimento", "-id"]
         indexes = [
-            models.Index(fields=["tipo", "status"]),
+            # tipo + status (inclusive status__in) já na ordem de vencimento
+            models.Index(fields=["tipo", "status", "vencimento"], name="fin_lanc_tipo_status_venc_idx"),
+            # lista/dashboard: não cancelados por tipo, ordenados por vencimento
+            models.Index(fields=["tipo", "vencimento"], condition=~models.Q(status="CANCELADO"),
+                         name="fin_lanc_em_uso_idx"),
             models.Index(fields=["vencimento"]),
-            models.Index(fields=["cliente"]),
-            models.Index(fields=["condominio"]),
-            models.Index(fields=["funcionario"]),
-            models.Index(fields=["turma"]),
+            # cobrança já existe no mês? (cliente + faixa de vencimento)
+            models.Index(fields=["cliente", "vencimento"], name="fin_lanc_cliente_venc_idx"),
+            # condominio/funcionario/turma: o índice do próprio ForeignKey basta
         ]
         verbose_name = "Lançamento financeiro"
         verbose_name_plural = "Lançamentos financeiros"
@@ -80,6 +86,9 @@ class Lancamento(models.Model):
 
     @property
     def total_baixado(self) -> Decimal:
+        # buscar_lancamentos já anota a soma; evita 1 aggregate por linha/uso no template
+        if "total_baixado_agg" in self.__dict__:
+            return self.total_baixado_agg or Decimal("0.00")
         from django.db.models import Sum
         s = self.baixas.aggregate(s=Sum("valor"))["s"] or Decimal("0.00")
         return s
@@ -95,7 +104,8 @@ class Lancamento(models.Model):
 
 
 class Baixa(models.Model):
-    lancamento = models.ForeignKey(Lancamento, on_delete=models.CASCADE, related_name="baixas")
+    lancamento = models.ForeignKey(Lancamento, on_delete=models.CASCADE, related_name="baixas",
+                                   db_index=False)  # coberto por (lancamento, data)
     data = models.DateField()
     valor = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(Decimal("0.01"))])
     forma = models.CharField(max_length=10, choices=FORMA_PGTO, default="PIX")
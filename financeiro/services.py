@@ -1,14 +1,20 @@
 from __future__ import annotations
-from typing import Optional, Dict, Any, Iterable, Tuple
+from typing import Callable, Optional, Dict, Any, Iterable, Tuple
 from datetime import date, timedelta
 from decimal import Decimal
 from calendar import monthrange
 
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.db import transaction
-from django.db.models import Q, Sum, F
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum
 
 from .models import Lancamento, Baixa, CategoriaFinanceira  # financeiro
+from mca import alteracoes, escrita, metricas, referencias
+from mca.paginacao import paginar_duas_fases
+
+GERADOS = metricas.Contador("mca_financeiro_lancamentos_gerados_total",
+                            "Lançamentos criados pelos geradores do mês.", ("origem",))
+
 # ===== Helpers =====
 def paginar_queryset(qs, page: int = 1, per_page: int = 20):
     from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
@@ -47,13 +53,10 @@ def atualizar_lancamento(lancamento_id: int, data: Dict[str, Any]) -> Lancamento
     # não permitir alterar valor para abaixo do já baixado
     if "valor" in data:
         novo_valor = Decimal(str(data["valor"]))
-        if novo_valor < l.total_baixado:
+        if novo_valor < l.valor and novo_valor < l.total_baixado:
             raise ValidationError("Valor não pode ser inferior ao total já baixado.")
-    for k, v in data.items():
-        setattr(l, k, v)
-    l.full_clean()
-    l.save()
-    _atualizar_status(l)
+    if {"valor", "status"} & alteracoes.atualizar_campos(l, data):
+        _atualizar_status(l)
     return l
 
 @transaction.atomic
@@ -130,9 +133,28 @@ def buscar_lancamentos(
     if categoria_id: qs = qs.filter(categoria_id=categoria_id)
     if ativos is not None: qs = qs.filter(ativo=ativos)
 
-    qs = qs.annotate(total_baixado_agg=Sum("baixas__valor")).order_by("-vencimento", "-id")
+    # soma das baixas por Subquery (não agregada): sem GROUP BY sobre a listagem
+    # inteira, e a fase 1 da paginação (só ids) nem chega a calculá-la
+    qs = qs.annotate(total_baixado_agg=_soma_baixas()).order_by("-vencimento", "-id")
     return qs
 
+
+def _soma_baixas():
+    return Subquery(
+        Baixa.objects.filter(lancamento=OuterRef("pk"))
+        .order_by().values("lancamento")
+        .annotate(s=Sum("valor")).values("s"),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+def paginar_lancamentos(qs, cursor: Optional[str] = None, per_page: int = 20):
+    """
+    Página da listagem por cursor (-vencimento, -id), em duas fases:
+    1) ids da página direto em Lancamento (índice de vencimento, sem JOINs);
+    2) só esses ids com select_related + soma das baixas.
+    """
+    return paginar_duas_fases(qs, cursor, por_pagina=per_page)
+
 # ===== Recorrência mensal (manual) =====
 @transaction.atomic
 def gerar_recorrencia_mensal(
@@ -252,34 +274,33 @@ def _clamp_vencimento(ano: int, mes: int, dia_venc: int) -> _date:
 
 def _matriculas_ativas_no_mes_global(ano: int, mes: int):
     """Todas matrículas ativas que cruzam a competência (qualquer dia no mês)."""
-    inicio_mes, fim_mes = _primeiro_ultimo_dia(ano, mes)
-    return (Matricula.objects
-            .select_related("cliente", "turma", "turma__modalidade", "turma__modalidade__condominio")
-            .filter(ativa=True)
-            .filter(Q(data_fim__isnull=True) | Q(data_fim__gte=inicio_mes))
-            .filter(data_inicio__lte=fim_mes))
+    return (Matricula.objects.ativas_no_mes(ano, mes)
+            .select_related("cliente", "turma", "turma__modalidade", "turma__modalidade__condominio"))
 
 def _matriculas_ativas_no_mes_da_turma(turma: Turma, ano: int, mes: int):
     """Matrículas ativas no mês, apenas da turma informada."""
-    inicio_mes, fim_mes = _primeiro_ultimo_dia(ano, mes)
-    return (Matricula.objects
+    return (Matricula.objects.ativas_no_mes(ano, mes)
             .select_related("cliente", "turma", "turma__modalidade", "turma__modalidade__condominio")
-            .filter(turma=turma, ativa=True)
-            .filter(Q(data_fim__isnull=True) | Q(data_fim__gte=inicio_mes))
-            .filter(data_inicio__lte=fim_mes))
+            .filter(turma=turma))
 
 def _get_or_create_categoria(nome: str = "Mensalidades") -> CategoriaFinanceira:
-    cat, _ = CategoriaFinanceira.objects.get_or_create(nome=nome)
+    # cache de referências: sem consulta quando a categoria já existe
+    cat = referencias.instancia("categorias", referencias.id_por_nome("categorias", nome))
+    if cat is None:
+        cat, _ = CategoriaFinanceira.objects.get_or_create(nome=nome)
     return cat
 
-def _ja_existe_cobranca_cliente_mes(cliente_id: int, ano: int, mes: int) -> bool:
-    """Evita duplicidade por (cliente, mês). Ignora CANCELADO."""
+def _cobrancas_cliente_mes(cliente_id: int, ano: int, mes: int):
     return Lancamento.objects.filter(
         tipo="RECEBER",
         cliente_id=cliente_id,
         vencimento__year=ano,
         vencimento__month=mes
-    ).exclude(status="CANCELADO").exists()
+    ).exclude(status="CANCELADO")
+
+def _ja_existe_cobranca_cliente_mes(cliente_id: int, ano: int, mes: int) -> bool:
+    """Evita duplicidade por (cliente, mês). Ignora CANCELADO."""
+    return _cobrancas_cliente_mes(cliente_id, ano, mes).exists()
 
 def _desconto_percent_por_modalidades(qtd_modalidades: int) -> Decimal:
     if qtd_modalidades >= 4:
@@ -401,9 +422,9 @@ def gerar_cobrancas_mensalidade_turma(
         )
         criados += 1
 
+    transaction.on_commit(lambda: GERADOS.inc(criados, origem="mensalidade_turma"))
     return {"criados": criados, "existentes": existentes, "turma": turma_id, "vencimento": venc}
 
-@transaction.atomic
 def gerar_cobrancas_mensalidades_global(
     *,
     ano: int,
@@ -412,10 +433,13 @@ def gerar_cobrancas_mensalidades_global(
     categoria_nome: str = "Mensalidades",
     descricao_tpl: str = "Mensalidades ({mes:02d}/{ano})",
     observacao_padrao: str = "Gerado automaticamente (global, agregado por cliente)",
+    progresso: Optional[Callable[[int, Optional[int]], None]] = None,
 ) -> dict:
     """
     Cria UMA cobrança por cliente (no mês), considerando TODAS as matrículas ativas.
     Se já existir cobrança daquele cliente no mês, não cria novamente.
+    Grava em lotes curtos (mca/escrita.py) para não travar o banco; como pula
+    clientes já cobrados, rodar de novo após uma falha completa o mês.
     Retorna: {"criados": X, "existentes": Y, "ano": ano, "mes": mes, "dia_venc": dia_venc}
     """
     cat = _get_or_create_categoria(categoria_nome)
@@ -424,45 +448,56 @@ def gerar_cobrancas_mensalidades_global(
     mats = _matriculas_ativas_no_mes_global(ano, mes)
     por_cliente = _agrupar_totais_por_cliente(mats)
 
-    criados = existentes = 0
-    for cid, dados in por_cliente.items():
-        if _ja_existe_cobranca_cliente_mes(cid, ano, mes):
-            existentes += 1
-            continue
+    def _gravar(lote) -> tuple[int, int]:
+        criados = existentes = 0
+        for cid, dados in lote:
+            if _ja_existe_cobranca_cliente_mes(cid, ano, mes):
+                existentes += 1
+                continue
+            _criar_cobranca_global(cid, dados, ano=ano, mes=mes, venc=venc, cat=cat,
+                                   descricao_tpl=descricao_tpl, observacao_padrao=observacao_padrao)
+            criados += 1
+        return criados, existentes
+
+    parciais = escrita.em_lotes(por_cliente.items(), _gravar, progresso=progresso)
+    criados = sum(c for c, _ in parciais)
+    existentes = sum(e for _, e in parciais)
+    GERADOS.inc(criados, origem="mensalidade_global")
+    return {"criados": criados, "existentes": existentes, "ano": ano, "mes": mes, "dia_venc": dia_venc}
 
-        subtotal = dados["subtotal"]
-        qtd_modalidades = dados["qtd_modalidades"]
-        desc_pct = _desconto_percent_por_modalidades(qtd_modalidades)
-        desconto = (subtotal * desc_pct).quantize(Decimal("0.01"))
-        total = (subtotal - desconto).quantize(Decimal("0.01"))
 
-        cliente = dados["cliente"]
-        descricao = descricao_tpl.format(ano=ano, mes=mes)
+def _criar_cobranca_global(cid, dados, *, ano, mes, venc, cat, descricao_tpl, observacao_padrao):
+    subtotal = dados["subtotal"]
+    qtd_modalidades = dados["qtd_modalidades"]
+    desc_pct = _desconto_percent_por_modalidades(qtd_modalidades)
+    desconto = (subtotal * desc_pct).quantize(Decimal("0.01"))
+    total = (subtotal - desconto).quantize(Decimal("0.01"))
 
-        parts = []
-        for info in dados["modalidades"].values():
-            parts.append(f"{info['nome']} x{info['qtd']} @ {Decimal(info['valor_unit']):.2f}")
-        breakdown = "; ".join(parts)
-        obs = (f"{observacao_padrao}. competência={ano}-{mes:02d}; "
-               f"modalidades={qtd_modalidades}; desconto={desc_pct*Decimal('100')}%; "
-               f"itens=[{breakdown}]")
+    cliente = dados["cliente"]
+    descricao = descricao_tpl.format(ano=ano, mes=mes)
 
-        Lancamento.objects.create(
-            tipo="RECEBER",
-            descricao=f"{descricao} — {cliente.nome_razao}",
-            valor=total,
-            vencimento=venc,
-            status="ABERTO",
-            cliente_id=cid,
-            turma_id=None,
-            categoria_id=cat.id,
-            observacao=obs,
-            contraparte_nome=cliente.nome_razao,
-            contraparte_doc=cliente.cpf_cnpj,
-        )
-        criados += 1
+    parts = []
+    for info in dados["modalidades"].values():
+        parts.append(f"{info['nome']} x{info['qtd']} @ {Decimal(info['valor_unit']):.2f}")
+    breakdown = "; ".join(parts)
+    obs = (f"{observacao_padrao}. competência={ano}-{mes:02d}; "
+           f"modalidades={qtd_modalidades}; desconto={desc_pct*Decimal('100')}%; "
+           f"itens=[{breakdown}]")
+
+    Lancamento.objects.create(
+        tipo="RECEBER",
+        descricao=f"{descricao} — {cliente.nome_razao}",
+        valor=total,
+        vencimento=venc,
+        status="ABERTO",
+        cliente_id=cid,
+        turma_id=None,
+        categoria_id=cat.id,
+        observacao=obs,
+        contraparte_nome=cliente.nome_razao,
+        contraparte_doc=cliente.cpf_cnpj,
+    )
 
-    return {"criados": criados, "existentes": existentes, "ano": ano, "mes": mes, "dia_venc": dia_venc}
 
 from decimal import Decimal
 from datetime import timedelta
@@ -561,4 +596,5 @@ def gerar_pagamentos_professores(ano: int, mes: int) -> dict:
         )
         criados += 1
 
+    transaction.on_commit(lambda: GERADOS.inc(criados, origem="pagamento_professor"))
     return {"criados": criados, "mes": mes, "ano": ano}
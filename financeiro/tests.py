@@ -1,3 +1,8 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from mca.testes import OrcamentoViewsTestCase
+
+
+class OrcamentoConsultasTests(OrcamentoViewsTestCase):
+    def test_lista(self):
+        self.assertDentroDoOrcamento(reverse("financeiro:list"))
@@ -5,6 +5,7 @@ app_name = "financeiro"
 
 urlpatterns = [
     path("financeiro/", views.list_financeiro, name="list"),
+    path("financeiro/tabela/", views.list_financeiro, {"parcial": True}, name="tabela"),
     path("financeiro/criar/", views.create_lancamento, name="create"),
     path("financeiro/<int:pk>/atualizar/", views.update_lancamento, name="update"),
     path("financeiro/<int:pk>/cancelar/", views.cancelar_lancamento_view, name="cancelar"),
@@ -13,18 +13,15 @@ from . import services as fs
 
 from django.contrib.auth.decorators import login_required, user_passes_test
 
-def is_diretor(user):
-    return user.groups.filter(name='Diretoria').exists() or user.is_superuser
-
-def is_professor(user):
-    return user.groups.filter(name='Professor').exists()
-
-def is_estagiario(user):
-    return user.groups.filter(name='Estagiario').exists()
+from mca.roles import is_diretor, is_professor, is_estagiario
+from mca.query_budget import orcamento_consultas
+from mca.paginacao import querystring_filtros
+from mca import condicional, jobs, referencias
 
+@orcamento_consultas(10)
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
-def list_financeiro(request: HttpRequest):
+def list_financeiro(request: HttpRequest, parcial: bool = False):
     f = FiltroFinanceiroForm(request.GET or None)
     cd = f.cleaned_data if f.is_valid() else {}
 
@@ -42,29 +39,30 @@ def list_financeiro(request: HttpRequest):
         ativos=(None if (cd.get("ativos") in (None,"")) else (cd.get("ativos") == "1"))
     )
 
-    # paginação segura
-    page_str = request.GET.get("page", "1")
-    try:
-        page = int(page_str); page = 1 if page < 1 else page
-    except (TypeError, ValueError):
-        page = 1
-    page_obj = fs.paginar_queryset(qs, page=page, per_page=20)
+    # 304 se nada mudou: lançamentos filtrados, baixas e clientes deles,
+    # referências (categorias/condomínios... nos combos e formulários)
+    validador = condicional.para_request(request, qs, relacionados=("baixas", "cliente"),
+                                         extras=referencias.versoes())
+    if (nao_modificado := condicional.nao_modificado(request, validador)) is not None:
+        return nao_modificado
+
+    # paginação por cursor (-vencimento, -id) + total estimado (COUNT em cache)
+    page_obj = fs.paginar_lancamentos(qs, request.GET.get("cursor"), per_page=20)
+    base_qs, suffix = querystring_filtros(request)
+    ctx = {"page_obj": page_obj, "suffix": suffix, "base_qs": base_qs}
 
-    # querystring base sem page
-    qd = request.GET.copy(); qd.pop("page", None)
-    base_qs = qd.urlencode()
-    suffix = f"&{base_qs}" if base_qs else ""
+    # só tabela + paginação (filtro/página trocados pela própria lista)
+    if parcial:
+        return condicional.aplicar(render(request, "financeiro/tabela.html", ctx), validador)
 
-    return render(request, "financeiro/list.html", {
+    return condicional.aplicar(render(request, "financeiro/list.html", {
+        **ctx,
         "filtro_form": f,
-        "page_obj": page_obj,
-        "suffix": suffix,
-        "base_qs": base_qs,
         "lancamento_form": LancamentoForm(),
         "baixa_form": BaixaForm(),
         "recorr_form": RecorrenciaMensalForm(),
         "categoria_form": CategoriaFinanceiraForm(),  # 👈 novo
-    })
+    }), validador)
 
 
 @login_required
@@ -176,27 +174,10 @@ def gerar_recorrencia_view(request: HttpRequest):
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
 def exportar_financeiro_view(request: HttpRequest):
-    # Reaproveita filtros
-    f = FiltroFinanceiroForm(request.GET or None)
-    cd = f.cleaned_data if f.is_valid() else {}
-    qs = fs.buscar_lancamentos(
-        q=cd.get("q",""),
-        tipo=cd.get("tipo") or None,
-        status=cd.get("status") or None,
-        venc_de=cd.get("venc_de") or None,
-        venc_ate=cd.get("venc_ate") or None,
-        cliente_id=cd.get("cliente").id if cd.get("cliente") else None,
-        funcionario_id=cd.get("funcionario").id if cd.get("funcionario") else None,
-        condominio_id=cd.get("condominio").id if cd.get("condominio") else None,
-        turma_id=cd.get("turma").id if cd.get("turma") else None,
-        categoria_id=cd.get("categoria").id if cd.get("categoria") else None,
-        ativos=(None if (cd.get("ativos") in (None,"")) else (cd.get("ativos") == "1"))
-    ).select_related("cliente","funcionario","condominio","turma","categoria")
-
-    filename, content = fs.exportar_lancamentos_excel(qs)
-    resp = HttpResponse(content, content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return resp
+    # Reaproveita filtros (validados pela tarefa, com o FiltroFinanceiroForm)
+    job = jobs.enfileirar("financeiro.exportar", params=request.GET.dict(), usuario=request.user,
+                          voltar_para=reverse("financeiro:list"))
+    return redirect(job)
 
 
 from datetime import date
@@ -225,32 +206,18 @@ def gerar_mensalidades_view(request: HttpRequest):
             ano = int(parts[0])
             mes = int(parts[1])
         dia_venc = max(1, min(31, int(dia_str or "5")))
+        turma_id = int(turma_str) if turma_str else None
     except Exception:
         messages.error(request, "Competência inválida. Use o formato AAAA-MM.")
         return redirect(reverse("financeiro:list"))
 
-    try:
-        if turma_str:
-            rel = fs.gerar_cobrancas_mensalidade_turma(
-                turma_id=int(turma_str),
-                ano=ano, mes=mes, dia_venc=dia_venc,
-            )
-            messages.success(request, f"Mensalidades da turma geradas: {rel['criados']} nova(s), {rel['existentes']} já existia(m).")
-        else:
-            rel = fs.gerar_cobrancas_mensalidades_global(
-                ano=ano, mes=mes, dia_venc=dia_venc,
-            )
-            messages.success(request, f"Mensalidades (todas as turmas): {rel['criados']} nova(s), {rel['existentes']} já existia(m).")
-
-        # 👇 Gera automaticamente os pagamentos aos professores
-        from financeiro.services import gerar_pagamentos_professores
-        pag_rel = gerar_pagamentos_professores(ano, mes)
-        messages.success(request, f"Pagamentos a professores: {pag_rel['criados']} lançamento(s) criado(s).")
-
-    except Exception as e:
-        messages.error(request, f"Falha ao gerar mensalidades/pagamentos: {e}")
-
-    return redirect(reverse("financeiro:list"))
+    # mensalidades + pagamentos aos professores, em segundo plano
+    job = jobs.enfileirar(
+        "financeiro.gerar_mensalidades",
+        params={"ano": ano, "mes": mes, "dia_venc": dia_venc, "turma_id": turma_id},
+        usuario=request.user, voltar_para=reverse("financeiro:list"),
+    )
+    return redirect(job)
 
 
 
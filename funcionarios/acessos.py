@@ -0,0 +1,239 @@
+# funcionarios/acessos.py
+"""
+Usuários de acesso dos funcionários, em lote.
+
+Criar o User do funcionário e mantê-lo no grupo do cargo, para um
+funcionário (post_save em funcionarios/models.py) ou uma fatia deles
+(importação de planilha, `sincronizar_todos`):
+
+- os usuários nascem com senha inutilizável (sem hash nenhum) e recebem por
+  e-mail um link para definir a senha (`link_definir_senha`: token do reset
+  de senha do Django, vale PASSWORD_RESET_TIMEOUT e deixa de valer assim que
+  a senha é definida); sem e-mail, a diretoria gera o mesmo link na lista
+  de funcionários (`services.link_definir_senha`) e entrega em mãos;
+- User, `Funcionario.user` e os vínculos com grupos vão em bulk_create /
+  bulk_update (a tabela intermediária de `User.groups` direto);
+- os ids dos grupos de papel ficam no cache (`ids_grupos`), com a mesma
+  expiração das versões de mca/versoes.py: o sinal do Group só limpa o
+  cache do processo em que rodou, e com cache por processo os outros
+  workers (e o `rodar_jobs`) relêem os ids em poucos segundos em vez de
+  gravar vínculos com o id de um grupo apagado;
+- a troca de grupo compara os vínculos atuais com o esperado e só apaga /
+  insere a diferença (grupos fora de GRUPOS_PAPEL, dados no admin, ficam).
+
+bulk_* não disparam sinais: quem chama invalida o que precisar
+(`referencias.invalidar("funcionarios")`); o papel em cache dos usuários com
+grupos trocados é invalidado aqui.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.contrib.auth.tokens import default_token_generator
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from mca import escrita, versoes
+from mca.roles import GRUPO_DIRETORIA, GRUPO_ESTAGIARIO, GRUPO_PROFESSOR, invalidar_papel
+
+from .models import Funcionario
+
+logger = logging.getLogger(__name__)
+
+GRUPOS_PAPEL = (GRUPO_DIRETORIA, GRUPO_PROFESSOR, GRUPO_ESTAGIARIO)
+_GRUPOS_KEY = "acessos:grupos"
+
+
+def grupo_do_funcionario(cargo: str, regime: str) -> Optional[str]:
+    """Grupo de acesso pelo cargo (ou regime, para estagiário); None = sem grupo."""
+    if cargo == Funcionario.Cargo.DIRETOR:
+        return GRUPO_DIRETORIA
+    if cargo == Funcionario.Cargo.PROFESSOR:
+        return GRUPO_PROFESSOR
+    if regime == Funcionario.RegimeTrabalhista.ESTAGIARIO:
+        return GRUPO_ESTAGIARIO
+    return None
+
+
+def ids_grupos() -> dict[str, int]:
+    """{nome: id} dos grupos de papel, do cache; criando os que faltarem na primeira vez."""
+    ids = cache.get(_GRUPOS_KEY)
+    if ids is not None and all(nome in ids for nome in GRUPOS_PAPEL):
+        return ids
+    ids = dict(Group.objects.filter(name__in=GRUPOS_PAPEL).values_list("name", "id"))
+    faltando = [nome for nome in GRUPOS_PAPEL if nome not in ids]
+    if faltando:
+        Group.objects.bulk_create([Group(name=nome) for nome in faltando], ignore_conflicts=True)
+        ids = dict(Group.objects.filter(name__in=GRUPOS_PAPEL).values_list("name", "id"))
+    cache.set(_GRUPOS_KEY, ids, versoes.VERSAO_TTL)
+    return ids
+
+
+def invalidar_grupos(**kwargs) -> None:
+    """Group salvo/apagado (post_save/post_delete, ver models.py): ids resolvidos de novo."""
+    cache.delete(_GRUPOS_KEY)
+
+
+# ---------------- Usuários ----------------
+
+def _username_base(nome: str) -> str:
+    return (nome or "").strip().lower().replace(" ", ".")[:120] or "funcionario"
+
+
+def _usernames(funcionarios: list[Funcionario]) -> list[str]:
+    """Mesmo padrão do cadastro (nome.com.pontos); repetido ganha o fim do CPF/CNPJ."""
+    candidatos = []
+    for f in funcionarios:
+        base = _username_base(f.nome)
+        candidatos.append((base, f"{base}.{f.cpf_cnpj[-4:]}", f"{base}.{f.cpf_cnpj}"))
+    todos = {c for cs in candidatos for c in cs}
+    usados = set(User.objects.filter(username__in=todos).values_list("username", flat=True))
+    out = []
+    for cs in candidatos:
+        username = next((c for c in cs if c not in usados), None)
+        if username is None:
+            raise ValueError(f"Não há username livre para {cs[0]!r}.")
+        usados.add(username)
+        out.append(username)
+    return out
+
+
+def provisionar_usuarios(funcionarios: Iterable[Funcionario]) -> list[User]:
+    """
+    Cria o User (senha inutilizável) dos funcionários que ainda não têm um,
+    liga `Funcionario.user` e coloca cada um no grupo do cargo. Devolve os
+    usuários criados (para `enviar_convites`).
+    """
+    sem_usuario = [f for f in funcionarios if f.user_id is None]
+    if not sem_usuario:
+        return []
+
+    usuarios = []
+    for f, username in zip(sem_usuario, _usernames(sem_usuario)):
+        partes = (f.nome or "").split(" ")
+        u = User(username=username, email=f.email or "", first_name=partes[0][:150],
+                 last_name=" ".join(partes[1:])[:150])
+        u.set_unusable_password()
+        usuarios.append(u)
+    User.objects.bulk_create(usuarios)
+
+    for f, u in zip(sem_usuario, usuarios):
+        f.user = u
+    Funcionario.objects.bulk_update(sem_usuario, ["user"])
+
+    _gravar_grupos(sem_usuario)
+    return usuarios
+
+
+def sincronizar_grupos(funcionarios: Iterable[Funcionario], *, invalidar_todos: bool = True) -> set[int]:
+    """
+    Deixa cada usuário só no grupo de papel do cargo/regime atual: uma
+    consulta dos vínculos atuais e, se houver diferença, um DELETE e um
+    INSERT. Devolve os ids dos usuários cujos grupos mudaram.
+
+    O papel em cache também guarda o cargo: com `invalidar_todos` (cargo ou
+    regime acabou de mudar) ele é invalidado para todos os usuários; sem,
+    só para os que trocaram de grupo.
+    """
+    por_usuario = {f.user_id: f for f in funcionarios if f.user_id is not None}
+    if not por_usuario:
+        return set()
+    ids = ids_grupos()
+    Vinculo = User.groups.through
+
+    atuais: dict[int, dict[int, int]] = {}  # user_id -> {group_id: id do vínculo}
+    for pk, user_id, group_id in (Vinculo.objects
+                                  .filter(user_id__in=list(por_usuario), group_id__in=list(ids.values()))
+                                  .values_list("pk", "user_id", "group_id")):
+        atuais.setdefault(user_id, {})[group_id] = pk
+
+    remover, inserir, mudaram = [], [], set()
+    for user_id, f in por_usuario.items():
+        grupo = grupo_do_funcionario(f.cargo, f.regime_trabalhista)
+        esperado = {ids[grupo]} if grupo else set()
+        tem = atuais.get(user_id, {})
+        remover.extend(pk for group_id, pk in tem.items() if group_id not in esperado)
+        inserir.extend(Vinculo(user_id=user_id, group_id=g) for g in esperado - tem.keys())
+        if esperado != tem.keys():
+            mudaram.add(user_id)
+
+    # direto na tabela intermediária: sem m2m_changed, a invalidação vem abaixo
+    if remover:
+        Vinculo.objects.filter(pk__in=remover).delete()
+    if inserir:
+        Vinculo.objects.bulk_create(inserir, ignore_conflicts=True)
+    for user_id in (por_usuario if invalidar_todos else mudaram):
+        invalidar_papel(user_id)
+    return mudaram
+
+
+LOTE_SINCRONIZACAO = 500
+
+
+def sincronizar_todos(*, progresso: Optional[Callable[[int, Optional[int]], None]] = None) -> dict:
+    """
+    Refaz os grupos de todos os funcionários com usuário (ex.: depois de
+    mudar `grupo_do_funcionario`). Idempotente: quem já está certo não é tocado.
+    """
+    qs = (Funcionario.objects.filter(user__isnull=False)
+          .only("id", "user_id", "cargo", "regime_trabalhista").order_by("pk"))
+    funcionarios = list(qs)
+    mudaram = escrita.em_lotes(
+        funcionarios, lambda lote: sincronizar_grupos(lote, invalidar_todos=False),
+        tamanho=LOTE_SINCRONIZACAO, progresso=progresso,
+    )
+    return {"funcionarios": len(funcionarios), "alterados": sum(len(m) for m in mudaram)}
+
+
+def _gravar_grupos(funcionarios: list[Funcionario]) -> None:
+    ids = ids_grupos()
+    Vinculo = User.groups.through
+    vinculos = []
+    for f in funcionarios:
+        grupo = grupo_do_funcionario(f.cargo, f.regime_trabalhista)
+        if grupo:
+            vinculos.append(Vinculo(user_id=f.user_id, group_id=ids[grupo]))
+    Vinculo.objects.bulk_create(vinculos, ignore_conflicts=True)
+
+
+# ---------------- Convite (definir senha) ----------------
+
+def link_definir_senha(user: User) -> str:
+    """Link absoluto para o usuário definir a senha (vale uma vez, até PASSWORD_RESET_TIMEOUT)."""
+    path = reverse("password_reset_confirm", kwargs={
+        "uidb64": urlsafe_base64_encode(force_bytes(user.pk)),
+        "token": default_token_generator.make_token(user),
+    })
+    base = getattr(settings, "SITE_URL", "").rstrip("/") or "http://127.0.0.1:8000"
+    if "://" not in base:
+        base = f"http://{base}"
+    return f"{base}{path}"
+
+
+def enviar_convites(user_ids: Iterable[int], *,
+                    progresso: Optional[Callable[[int, Optional[int]], None]] = None) -> dict:
+    """E-mail com o link de definir senha para cada usuário com e-mail e sem senha."""
+    from notificacoes.emails import send_convite_funcionario
+
+    usuarios = list(User.objects.filter(pk__in=list(user_ids)).select_related("funcionario").order_by("pk"))
+    rel = {"enviados": 0, "sem_email": 0, "ja_com_senha": 0, "falhas": 0}
+    for n, u in enumerate(usuarios):
+        if progresso:
+            progresso(n, len(usuarios))
+        if not u.email:
+            rel["sem_email"] += 1
+        elif u.has_usable_password():
+            rel["ja_com_senha"] += 1
+        else:
+            try:
+                send_convite_funcionario(u, link_definir_senha(u))
+                rel["enviados"] += 1
+            except Exception:
+                logger.warning("convite não enviado", extra={"user_id": u.pk}, exc_info=True)
+                rel["falhas"] += 1
+    return rel
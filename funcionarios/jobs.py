@@ -0,0 +1,42 @@
+# funcionarios/jobs.py
+"""Tarefas em segundo plano de funcionários (ver mca/jobs.py)."""
+from mca import condicional
+from mca.jobs import enfileirar, tarefa
+
+from . import acessos
+from . import services as cs
+from .models import Funcionario
+
+
+@tarefa("funcionarios.importar", titulo="Importação de funcionários")
+def importar(ex, *, entrada: str) -> dict:
+    rel = cs.importar_funcionarios_de_excel(entrada, progresso=ex.progresso)
+    usuarios = rel.pop("usuarios_criados", [])
+    if usuarios and ex.job is not None:
+        # e-mails de definir senha em outro job: a importação não espera o SMTP
+        enfileirar("funcionarios.convites", params={"usuarios": usuarios}, usuario=ex.job.usuario)
+    return {
+        **rel,
+        "usuarios_criados": len(usuarios),
+        "mensagem": (f"Importação: {rel.get('sucesso', 0)} OK, "
+                     f"{rel.get('criados', 0)} criados, {rel.get('atualizados', 0)} atualizados. "
+                     f"{len(rel.get('erros', []))} erros. {len(usuarios)} acessos criados."),
+    }
+
+
+@tarefa("funcionarios.convites", titulo="Convites de acesso de funcionários")
+def convites(ex, *, usuarios: list) -> dict:
+    rel = acessos.enviar_convites(usuarios, progresso=ex.progresso)
+    return {
+        **rel,
+        "mensagem": (f"Convites: {rel['enviados']} enviados, {rel['sem_email']} sem e-mail, "
+                     f"{rel['ja_com_senha']} já com senha, {rel['falhas']} falhas."),
+    }
+
+
+@tarefa("funcionarios.exportar", titulo="Exportação de funcionários", replica=True,
+        validador=lambda: condicional.validador(Funcionario.objects.all()))
+def exportar(ex) -> dict:
+    filename, content = cs.exportar_funcionarios_para_excel()
+    ex.salvar_arquivo(filename, content)
+    return {"mensagem": "Planilha de funcionários gerada."}
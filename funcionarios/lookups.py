@@ -0,0 +1,25 @@
+# funcionarios/lookups.py — selects remotos (ver mca/lookups.py)
+from django.db.models import Q
+
+from mca.lookups import registrar
+
+from .models import Funcionario
+
+
+def _busca(qs, q: str):
+    return qs.filter(Q(nome__icontains=q) | Q(cpf_cnpj__startswith=q))
+
+
+def _qs():
+    return Funcionario.objects.filter(ativo=True).only("id", "nome").order_by("nome", "id")
+
+
+registrar("funcionarios", queryset=_qs, busca=_busca, rotulo=lambda f: f.nome, referencia="funcionarios")
+registrar(
+    "professores",
+    queryset=lambda: _qs().filter(cargo=Funcionario.Cargo.PROFESSOR),
+    busca=_busca,
+    rotulo=lambda f: f.nome,
+    permissao=lambda u: u.is_authenticated,  # filtro da lista de turmas
+    referencia="funcionarios",
+)
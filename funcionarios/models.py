@@ -4,13 +4,15 @@ from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import Group
 
+from mca.alteracoes import RastreiaAlteracoes
+
 
 DOC_VALIDATOR = RegexValidator(
     regex=r'^(\d{11}|\d{14})$',
     message="Informe CPF (11 dígitos) ou CNPJ (14 dígitos), apenas números."
 )
 
-class Funcionario(models.Model):
+class Funcionario(RastreiaAlteracoes, models.Model):
     user = models.OneToOneField(
         User, on_delete=models.CASCADE, related_name="funcionario",
         null=True, blank=True
@@ -76,6 +78,7 @@ class Funcionario(models.Model):
 
     def __str__(self):
         return f"{self.nome} ({self.cpf_cnpj}) - {self.get_cargo_display()}"
+
     
 
         # ✅ Retorna o papel de acesso (para facilitar uso nas views/templates)
@@ -98,53 +101,60 @@ class Funcionario(models.Model):
             raise ValidationError({"registro_cref": "Registro CREF é obrigatório para professores."})
 
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from mca.roles import invalidar_papel
+
+CAMPOS_PAPEL = ("cargo", "regime_trabalhista")
+
 
 @receiver(post_save, sender=Funcionario)
-def criar_usuario_para_funcionario(sender, instance, created, **kwargs):
+def sincronizar_acesso_funcionario(sender, instance, created, raw=False, update_fields=None, **kwargs):
     """
-    Cria automaticamente um User vinculado ao Funcionario e adiciona-o ao grupo correto.
+    Cria o User do funcionário novo (senha inutilizável + job com o e-mail
+    para definir a senha) e o mantém no grupo do cargo/regime
+    (funcionarios/acessos.py).
+
+    Edições que não mudam cargo nem regime (a maioria) saem daqui sem
+    nenhuma consulta (`campos_alterados`, mca/alteracoes.py).
     """
-    from django.contrib.auth.models import User, Group
-
-    # 1️⃣ Cria o usuário, se ainda não existir
-    if created and not instance.user:
-        username = instance.nome.lower().replace(" ", ".")
-        user = User.objects.create_user(
-            username=username,
-            password="mca123",  # senha temporária (pode exigir troca depois)
-            first_name=instance.nome.split(" ")[0],
-            last_name=" ".join(instance.nome.split(" ")[1:]),
-        )
-        instance.user = user
-        instance.save()
-
-    # 2️⃣ Garante que os grupos necessários existem
-    for nome_grupo in ["Diretoria", "Professor", "Estagiario"]:
-        Group.objects.get_or_create(name=nome_grupo)
-
-    # 3️⃣ Define o grupo com base no cargo ou regime trabalhista
-    user = instance.user
-    if not user:
-        return  # segurança extra
-
-    # limpa grupos anteriores
-    user.groups.clear()
-
-    if instance.cargo == Funcionario.Cargo.DIRETOR:
-        grupo = Group.objects.get(name="Diretoria")
-    elif instance.cargo == Funcionario.Cargo.PROFESSOR:
-        grupo = Group.objects.get(name="Professor")
-    elif instance.regime_trabalhista == Funcionario.RegimeTrabalhista.ESTAGIARIO:
-        grupo = Group.objects.get(name="Estagiario")
+    if raw:
+        return  # loaddata
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_PAPEL):
+        return
+    from .acessos import provisionar_usuarios, sincronizar_grupos
+
+    if created and instance.user_id is None:
+        provisionar_usuarios([instance])  # User, Funcionario.user e grupo, sem novo save()
+        if instance.email:
+            from mca.jobs import enfileirar
+            enfileirar("funcionarios.convites", params={"usuarios": [instance.user_id]})
+    elif created or set(CAMPOS_PAPEL) & instance.campos_alterados():
+        sincronizar_grupos([instance])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidar_ids_grupos(sender, **kwargs):
+    from .acessos import invalidar_grupos
+    invalidar_grupos()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidar_papel_grupos(sender, instance, action, reverse, pk_set, **kwargs):
+    """Grupos alterados fora do fluxo acima (ex.: admin) também invalidam o papel."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        invalidar_papel(instance.pk)
     else:
-        grupo = None
+        for user_id in (pk_set or []):
+            invalidar_papel(user_id)
+
 
-    # 4️⃣ Atribui o grupo, se aplicável
-    if grupo:
-        user.groups.add(grupo)
-        user.save()
+@receiver(post_save, sender=User)
+def invalidar_papel_usuario(sender, instance, **kwargs):
+    invalidar_papel(instance.pk)
 
 
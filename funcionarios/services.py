@@ -1,19 +1,20 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any
 from datetime import datetime, date
 from io import BytesIO
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.utils import timezone
 
-from openpyxl import load_workbook, Workbook
-from openpyxl.utils import get_column_letter
+from mca import alteracoes, escrita, referencias
 
 from .models import Funcionario
+from . import acessos
 
 class FuncionarioJaExiste(ValidationError): ...
 class FuncionarioNaoEncontrado(ObjectDoesNotExist): ...
@@ -66,19 +67,14 @@ def atualizar_funcionario(funcionario_id: int, data: Dict[str, Any]) -> Funciona
 
     if "cpf_cnpj" in data and data["cpf_cnpj"]:
         novo = _digits(data["cpf_cnpj"])
-        if Funcionario.objects.exclude(id=funcionario_id).filter(cpf_cnpj=novo).exists():
+        if novo != fun.cpf_cnpj and Funcionario.objects.exclude(id=funcionario_id).filter(cpf_cnpj=novo).exists():
             raise FuncionarioJaExiste("Já existe funcionário com este CPF/CNPJ.")
         fun.cpf_cnpj = novo
 
-    for k in (
+    alteracoes.atualizar_campos(fun, {k: data[k] for k in (
         "nome", "email", "telefone", "ativo", "cargo", "regime_trabalhista",
         "data_nascimento", "data_admissao", "rg", "registro_cref", "tam_uniforme"
-    ):
-        if k in data:
-            setattr(fun, k, data[k])
-
-    fun.full_clean()
-    fun.save()
+    ) if k in data})
     return fun
 
 # ========= Inativar/Reativar =========
@@ -113,6 +109,20 @@ def obter_funcionario_por_doc(cpf_cnpj: str) -> Funcionario:
         raise FuncionarioNaoEncontrado("Funcionário não encontrado.")
     return fun
 
+# ========= Acesso =========
+def link_definir_senha(funcionario_id: int) -> str:
+    """
+    Link para o funcionário definir a senha, para a diretoria entregar em mãos
+    (sem e-mail, o convite do cadastro não sai). Só para quem ainda não tem
+    senha: o link troca a senha da conta.
+    """
+    fun = obter_funcionario_por_id(funcionario_id)
+    if fun.user_id is None:
+        acessos.provisionar_usuarios([fun])
+    if fun.user.has_usable_password():
+        raise ValidationError("Este funcionário já definiu a senha.")
+    return acessos.link_definir_senha(fun.user)
+
 # ========= Busca =========
 def buscar_funcionarios(q: str = "", ativo: bool | None = None, regime: str | None = None, cargo: str | None = None):
     qs = Funcionario.objects.all()
@@ -131,7 +141,18 @@ def buscar_funcionarios(q: str = "", ativo: bool | None = None, regime: str | No
     return qs.order_by("nome", "id")
 
 # ========= Importação / Exportação Excel =========
-def importar_funcionarios_de_excel(file_or_path, *, sheet_name: str | None = None, strategy: str = "upsert") -> dict:
+def importar_funcionarios_de_excel(file_or_path, *, sheet_name: str | None = None, strategy: str = "upsert",
+                                   progresso: Optional[Callable[[int, Optional[int]], None]] = None) -> dict:
+    """
+    Importa funcionários de planilha Excel em streaming, em lotes de
+    LOTE_IMPORTACAO linhas (cada lote commitado via mca.escrita.em_lotes).
+
+    Sem o post_save por linha: funcionários em bulk_create/bulk_update e os
+    usuários dos novos criados em lote, sem senha (funcionarios/acessos.py).
+    O relatório traz em `usuarios_criados` os ids para o convite de definir
+    senha (tarefa funcionarios.convites). CPF/CNPJ repetido na planilha e
+    linhas inválidas viram erro da linha, sem derrubar o lote.
+    """
     import unicodedata, re
     def norm(s: str) -> str:
         s = str(s or "").strip().lower()
@@ -150,61 +171,178 @@ def importar_funcionarios_de_excel(file_or_path, *, sheet_name: str | None = Non
         "ativo": "ativo",
         "cargo": "cargo",
         "data_nascimento": "data_nascimento",
+        "rg": "rg",
+        "cref": "registro_cref",
+        "registro_cref": "registro_cref",
+        "tam_uniforme": "tam_uniforme",
+        "data_admissao": "data_admissao",
+        "regime": "regime_trabalhista",
+        "regime_trabalhista": "regime_trabalhista",
     }
 
-    wb = load_workbook(file_or_path, data_only=True)
-    ws = wb[sheet_name] if sheet_name in wb.sheetnames else (wb.active if sheet_name is None else wb.active)
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_or_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name in wb.sheetnames else wb.active
+        linhas = ws.iter_rows(values_only=True)
 
-    headers = [norm(c.value) for c in next(ws.iter_rows(min_row=1, max_row=1))]
-    col_to_field = {idx: header_map[h] for idx, h in enumerate(headers) if h in header_map}
+        headers = [norm(v) for v in next(linhas, ())]
+        col_to_field = {idx: header_map[h] for idx, h in enumerate(headers) if h in header_map}
 
-    required = {"cpf_cnpj", "nome"}
-    if not required.issubset(set(col_to_field.values())):
-        faltando = required - set(col_to_field.values())
-        raise ValidationError(f"Planilha incompleta. Faltam colunas: {', '.join(sorted(faltando))}")
+        required = {"cpf_cnpj", "nome"}
+        if not required.issubset(set(col_to_field.values())):
+            faltando = required - set(col_to_field.values())
+            raise ValidationError(f"Planilha incompleta. Faltam colunas: {', '.join(sorted(faltando))}")
 
-    rel = {"total_linhas": 0, "sucesso": 0, "criados": 0, "atualizados": 0, "erros": []}
+        rel = {"total_linhas": 0, "sucesso": 0, "criados": 0, "atualizados": 0, "erros": [],
+               "usuarios_criados": []}
+        vistos: Dict[str, int] = {}  # cpf_cnpj -> primeira linha da planilha com ele
 
-    for i, row in enumerate(ws.iter_rows(min_row=2), start=2):
-        rel["total_linhas"] += 1
+        def registros():
+            for i, row in enumerate(linhas, start=2):
+                if all(v is None or v == "" for v in row):
+                    continue  # linhas vazias (comuns no fim da planilha)
+                yield i, {field: row[idx] for idx, field in col_to_field.items() if idx < len(row)}
+
+        total = ws.max_row - 1 if ws.max_row else None
         try:
-            data = {}
-            for idx, cell in enumerate(row):
-                field = col_to_field.get(idx)
-                if not field:
-                    continue
-                val = cell.value
-                if field == "cpf_cnpj":
-                    val = _digits(val)
-                elif field == "ativo":
-                    s = str(val).strip().lower() if val is not None else ""
-                    val = s in ("1","true","t","sim","s","yes","y")
-                elif field == "data_nascimento" and val:
-                    try:
-                        val = val if isinstance(val, (date, datetime)) else datetime.strptime(str(val), "%Y-%m-%d").date()
-                    except:
-                        val = None
-                data[field] = val
-
-            if not data.get("cpf_cnpj"):
-                raise ValidationError("CPF/CNPJ vazio.")
+            escrita.em_lotes(
+                registros(), lambda lote: _importar_lote(lote, strategy, vistos, rel),
+                tamanho=LOTE_IMPORTACAO,
+                progresso=(lambda feitos, _: progresso(feitos, total)) if progresso else None,
+            )
+        finally:
+            # bulk_* não disparam post_save: combos e nomes de professor nas listas
+            referencias.invalidar("funcionarios")
+    finally:
+        wb.close()
+
+    return rel
+
+
+LOTE_IMPORTACAO = 300  # linhas por transação: uma consulta `cpf_cnpj__in` + bulk_create/bulk_update
+_CAMPOS_TEXTO = ("nome", "email", "telefone", "rg", "registro_cref", "tam_uniforme")
+# cargo/regime pelo código ("PROF") ou pelo rótulo ("Professor", como sai na exportação)
+_CARGOS = {**{v.lower(): v for v in Funcionario.Cargo.values},
+           **{str(l).lower(): v for v, l in Funcionario.Cargo.choices}}
+_REGIMES = {**{v.lower(): v for v in Funcionario.RegimeTrabalhista.values},
+            **{str(l).lower(): v for v, l in Funcionario.RegimeTrabalhista.choices}}
+
 
+def _texto(val: Any) -> str:
+    if val is None:
+        return ""
+    if isinstance(val, float) and val.is_integer():
+        val = int(val)  # telefone/RG digitados como número no Excel
+    return str(val).strip()
+
+
+def _data(val: Any) -> Optional[date]:
+    if isinstance(val, datetime):
+        return val.date()
+    if isinstance(val, date):
+        return val
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(str(val).strip(), fmt).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _importar_lote(lote: list, strategy: str, vistos: Dict[str, int], rel: dict) -> None:
+    """Um lote da importação (dentro da transação de `em_lotes`)."""
+    for _, data in lote:
+        data["cpf_cnpj"] = _digits(data.get("cpf_cnpj"))
+        for campo in _CAMPOS_TEXTO:
+            if campo in data:
+                data[campo] = _texto(data[campo])
+        for campo in ("data_nascimento", "data_admissao"):
+            if campo in data:
+                data[campo] = _data(data[campo]) if data[campo] else None
+        if "ativo" in data:
+            s = str(data["ativo"]).strip().lower() if data["ativo"] is not None else ""
+            data["ativo"] = s in ("1","true","t","sim","s","yes","y")
+        if "cargo" in data:
+            cargo = _texto(data["cargo"])
+            data["cargo"] = _CARGOS.get(cargo.lower(), cargo) or Funcionario.Cargo.OUTRO
+        if "regime_trabalhista" in data:
+            regime = _texto(data["regime_trabalhista"])
+            data["regime_trabalhista"] = _REGIMES.get(regime.lower(), regime) or Funcionario.RegimeTrabalhista.OUTRO
+
+    docs = {data["cpf_cnpj"] for _, data in lote if data["cpf_cnpj"]}
+    existentes = {f.cpf_cnpj: f for f in Funcionario.objects.filter(cpf_cnpj__in=docs)}
+    agora = timezone.now()
+
+    validos, campos, papel_mudou = [], {"updated_at"}, []
+    for linha, data in lote:
+        rel["total_linhas"] += 1
+        try:
             doc = data["cpf_cnpj"]
-            existente = Funcionario.objects.filter(cpf_cnpj=doc).first()
-            if strategy == "create" or not existente:
-                criar_funcionario(data)
-                rel["criados"] += 1
+            if not doc:
+                raise ValidationError("CPF/CNPJ vazio.")
+            if doc in vistos:
+                raise ValidationError(f"CPF/CNPJ repetido na planilha (linha {vistos[doc]}).")
+            vistos[doc] = linha
+
+            fun = existentes.get(doc)
+            if fun is None:
+                fun = Funcionario(**data)
+            elif strategy == "create":
+                raise FuncionarioJaExiste("Já existe funcionário com este CPF/CNPJ.")
             else:
-                atualizar_funcionario(existente.id, data)
-                rel["atualizados"] += 1
-
-            rel["sucesso"] += 1
-        except Exception as e:
-            rel["erros"].append({"linha": i, "erro": str(e)})
+                papel = (fun.cargo, fun.regime_trabalhista)
+                for k, v in data.items():
+                    setattr(fun, k, v)
+                fun.updated_at = agora  # bulk_update não aplica auto_now
+                campos.update(data)
+                if (fun.cargo, fun.regime_trabalhista) != papel:
+                    papel_mudou.append(fun)
+            fun.full_clean(validate_unique=False)  # CPF/CNPJ único: `existentes` + `vistos`
+        except ValidationError as e:
+            rel["erros"].append({"linha": linha, "erro": str(e)})
+            continue
+        validos.append((linha, fun))
 
-    return rel
+    novos = [f for _, f in validos if f.pk is None]
+    alterados = [f for _, f in validos if f.pk is not None]
+    try:
+        with transaction.atomic():
+            Funcionario.objects.bulk_create(novos)
+            Funcionario.objects.bulk_update(alterados, sorted(campos))
+    except IntegrityError:
+        # o banco recusou algo que passou na validação (ex.: o mesmo CPF/CNPJ gravado
+        # por outro processo agora): uma a uma para apontar a linha, ainda sem o
+        # post_save (que criaria o usuário com hash de senha)
+        for fun in novos:
+            fun.pk, fun._state.adding = None, True
+        novos, alterados = [], []
+        for linha, fun in validos:
+            try:
+                with transaction.atomic():
+                    if fun.pk is None:
+                        Funcionario.objects.bulk_create([fun])
+                        novos.append(fun)
+                    else:
+                        Funcionario.objects.bulk_update([fun], sorted(campos))
+                        alterados.append(fun)
+            except IntegrityError as e:
+                rel["erros"].append({"linha": linha, "erro": str(e)})
+        papel_mudou = [f for f in papel_mudou if f in alterados]
+
+    usuarios = acessos.provisionar_usuarios(novos)
+    acessos.sincronizar_grupos(papel_mudou)
+
+    rel["criados"] += len(novos)
+    rel["atualizados"] += len(alterados)
+    rel["sucesso"] += len(novos) + len(alterados)
+    rel["usuarios_criados"].extend(u.pk for u in usuarios)
 
 def exportar_funcionarios_para_excel(queryset=None) -> tuple[str, bytes]:
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
     qs = queryset if queryset is not None else Funcionario.objects.all().order_by("nome", "id")
 
     wb = Workbook()
@@ -1,3 +1,66 @@
+import time
+
+from django.contrib.auth.models import Group, User
+from django.contrib.messages import get_messages
 from django.test import TestCase
+from django.urls import reverse
+
+from mca.roles import GRUPO_DIRETORIA
+from mca.testes import OrcamentoViewsTestCase, Processo
+
+from . import acessos, services
+
+
+class OrcamentoConsultasTests(OrcamentoViewsTestCase):
+    def test_lista(self):
+        self.assertDentroDoOrcamento(reverse("funcionarios:list"))
+
+
+class LinkSenhaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.diretor = User.objects.create_superuser("diretor", "diretor@example.com", "x")
+
+    def setUp(self):
+        self.client.force_login(self.diretor)
+
+    def _mensagens(self, resposta) -> list[str]:
+        return [str(m) for m in get_messages(resposta.wsgi_request)]
+
+    def test_funcionario_sem_email_recebe_link_que_define_a_senha(self):
+        fun = services.criar_funcionario({"cpf_cnpj": "12345678901", "nome": "Ana Souza"})
+        self.assertFalse(fun.user.has_usable_password())
+
+        r = self.client.post(reverse("funcionarios:link_senha", args=[fun.pk]))
+        [msg] = self._mensagens(r)
+        link = msg.split(": ", 1)[1]
+
+        self.client.logout()
+        r = self.client.get(link, follow=True)  # o Django troca o token da URL pelo da sessão
+        self.assertTrue(r.context["validlink"])
+        self.client.post(r.redirect_chain[-1][0], {"new_password1": "Senha-forte-123",
+                                                   "new_password2": "Senha-forte-123"})
+        fun.user.refresh_from_db()
+        self.assertTrue(fun.user.check_password("Senha-forte-123"))
+
+    def test_quem_ja_tem_senha_nao_recebe_link(self):
+        fun = services.criar_funcionario({"cpf_cnpj": "12345678902", "nome": "Bruno Lima"})
+        fun.user.set_password("x")
+        fun.user.save()
+
+        r = self.client.post(reverse("funcionarios:link_senha", args=[fun.pk]))
+        [msg] = self._mensagens(r)
+        self.assertIn("já definiu a senha", msg)
+
 
-# Create your tests here.
+class IdsGruposTests(TestCase):
+    def test_grupo_recriado_em_outro_processo(self):
+        a, b = Processo.par(self, acessos)
+        with a.ativo():
+            antigo = acessos.ids_grupos()[GRUPO_DIRETORIA]
+        with b.ativo():
+            Group.objects.filter(pk=antigo).delete()
+            novo = Group.objects.create(name=GRUPO_DIRETORIA).pk
+        with a.ativo():
+            time.sleep(Processo.TTL * 2)
+            self.assertEqual(acessos.ids_grupos()[GRUPO_DIRETORIA], novo)
@@ -5,8 +5,10 @@ app_name = "funcionarios"
 
 urlpatterns = [
     path("funcionarios/", views.list_funcionarios, name="list"),
+    path("funcionarios/tabela/", views.list_funcionarios, {"parcial": True}, name="tabela"),
     path("funcionarios/criar/", views.create_funcionario, name="create"),
     path("funcionarios/<int:pk>/atualizar/", views.update_funcionario, name="update"),
+    path("funcionarios/<int:pk>/link-senha/", views.link_senha_funcionario, name="link_senha"),
     path("funcionarios/exportar/", views.exportar_funcionarios_view, name="exportar"),
     path("funcionarios/importar/", views.importar_funcionarios_view, name="importar"),
 ]
@@ -8,22 +8,18 @@ from .forms import FuncionarioForm, FuncionarioFiltroForm, ImportacaoExcelForm
 from . import services as cs
 from .models import Funcionario
 
-from django.core.paginator import Paginator
 
 from django.contrib.auth.decorators import login_required, user_passes_test
 
-def is_diretor(user):
-    return user.groups.filter(name='Diretoria').exists() or user.is_superuser
-
-def is_professor(user):
-    return user.groups.filter(name='Professor').exists()
-
-def is_estagiario(user):
-    return user.groups.filter(name='Estagiario').exists()
+from mca.roles import is_diretor, is_professor, is_estagiario
+from mca.query_budget import orcamento_consultas
+from mca.paginacao import paginar_cursor, querystring_filtros
+from mca import jobs
 
+@orcamento_consultas(5)
 @login_required
 @user_passes_test(is_diretor,login_url='/turmas/')
-def list_funcionarios(request):
+def list_funcionarios(request, parcial: bool = False):
     q = request.GET.get("q", "").strip()
     ativo = request.GET.get("ativo")
     regime = request.GET.get("regime")
@@ -35,8 +31,15 @@ def list_funcionarios(request):
 
     qs = cs.buscar_funcionarios(q=q, ativo=ativo_bool, regime=regime, cargo=cargo)
 
-    page = max(1, int(request.GET.get("page", "1") or 1))
-    page_obj = Paginator(qs, 20).get_page(page)
+    # paginação por cursor (nome, id)
+    page_obj = paginar_cursor(qs, request.GET.get("cursor"), por_pagina=20)
+    base_qs, suffix = querystring_filtros(request)
+
+    # só tabela + paginação (filtro/página trocados pela própria lista)
+    if parcial:
+        return render(request, "funcionarios/tabela.html", {
+            "page_obj": page_obj, "base_qs": base_qs, "suffix": suffix,
+        })
 
     return render(request, "funcionarios/list.html", {
         "page_obj": page_obj,
@@ -46,7 +49,8 @@ def list_funcionarios(request):
         "cargo": cargo,
         "CARGOS": Funcionario.Cargo.choices,
         "REGIMES": Funcionario.RegimeTrabalhista.choices,
-        "base_qs": f"&q={q}&ativo={ativo}&regime={regime}&cargo={cargo}",
+        "base_qs": base_qs,
+        "suffix": suffix,
         "funcionario_form": FuncionarioForm()  # form no modal (vazio)
     })
 
@@ -86,16 +90,26 @@ def update_funcionario(request: HttpRequest, pk: int):
 
     return redirect(reverse("funcionarios:list"))
 
+@login_required
+@user_passes_test(is_diretor,login_url="/turmas/")
+def link_senha_funcionario(request: HttpRequest, pk: int):
+    """Mostra o link de definir senha (funcionário sem e-mail não recebe o convite)."""
+    if request.method != "POST":
+        return HttpResponseBadRequest("Somente POST.")
+
+    try:
+        link = cs.link_definir_senha(pk)
+        messages.success(request, f"Link para definir a senha (entregue ao funcionário): {link}")
+    except Exception as e:
+        messages.error(request, f"Erro ao gerar o link: {e}")
+
+    return redirect(reverse("funcionarios:list"))
+
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
 def exportar_funcionarios_view(request: HttpRequest):
-    filename, content = cs.exportar_funcionarios_para_excel()
-    resp = HttpResponse(
-        content,
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    resp["Content-Disposition"] = f'attachment; filename=\"{filename}\"'
-    return resp
+    job = jobs.enfileirar("funcionarios.exportar", usuario=request.user, voltar_para=reverse("funcionarios:list"))
+    return redirect(job)
 
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
@@ -108,19 +122,6 @@ def importar_funcionarios_view(request: HttpRequest):
         messages.error(request, "Envie um arquivo .xlsx válido.")
         return redirect(reverse("funcionarios:list"))
 
-    try:
-        rel = cs.importar_funcionarios_de_excel(request.FILES["arquivo"])
-        messages.success(
-            request,
-            f"Importação: {rel.get('sucesso',0)} OK, "
-            f"{rel.get('criados',0)} criados, {rel.get('atualizados',0)} atualizados. "
-            f"{len(rel.get('erros',[]))} erros."
-        )
-        erros = rel.get("erros", [])
-        if erros:
-            preview = "; ".join(f"L{e['linha']}: {e['erro']}" for e in erros[:3])
-            messages.warning(request, f"Erros (parcial): {preview}")
-    except Exception as e:
-        messages.error(request, f"Falha na importação: {e}")
-
-    return redirect(reverse("funcionarios:list"))
+    job = jobs.enfileirar("funcionarios.importar", entrada=request.FILES["arquivo"], usuario=request.user,
+                          voltar_para=reverse("funcionarios:list"))
+    return redirect(job)
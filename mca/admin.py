@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "titulo", "status", "progresso", "total", "usuario", "created_at", "terminado_em")
+    list_filter = ("status", "tipo")
+    search_fields = ("titulo", "mensagem")
+    readonly_fields = ("created_at", "iniciado_em", "terminado_em", "heartbeat", "worker")
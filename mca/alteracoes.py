@@ -0,0 +1,118 @@
+# mca/alteracoes.py
+"""
+Atualização só do que mudou.
+
+Os serviços `atualizar_*` faziam `setattr` de tudo o que veio do formulário,
+`full_clean()` e `save()`. Com isso, cada edição consultava a unicidade de
+`cpf_cnpj`/`cnpj`/`aceite_token`/`slug` mesmo sem mudança nesses campos e
+regravava todas as colunas (e os sinais com `update_fields=None` tratavam a
+edição como se tudo tivesse mudado). Agora:
+
+- `RastreiaAlteracoes` (mixin abstrato dos models) guarda os valores lidos
+  do banco (`from_db`/`refresh_from_db`) e os atualiza a cada `save()`;
+  `campos_alterados()` compara com os valores atuais;
+- `atualizar_campos(obj, data)` aplica `data`, valida só os campos alterados
+  (`clean()` do model roda sempre; unicidade/constraints só dos grupos que
+  têm algum campo alterado) e grava com `save(update_fields=...)`. Sem
+  alteração, não consulta nem grava nada.
+
+    def atualizar_condominio(condominio_id, data):
+        cond = Condominio.objects.filter(id=condominio_id).first()
+        ...
+        alteracoes.atualizar_campos(cond, data)
+        return cond
+
+Campos carregados com `defer()`/`only()` e ainda não lidos ficam fora da
+comparação (não são consultados para isso).
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Iterable, Optional
+
+from django.db import models
+
+_ATTR = "_valores_salvos"
+
+
+class RastreiaAlteracoes(models.Model):
+    """Lembra os valores do banco para `campos_alterados()` / `atualizar_campos`."""
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        obj = super().from_db(db, field_names, values)
+        obj._guardar_valores()
+        return obj
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._guardar_valores(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._guardar_valores(kwargs.get("update_fields"))
+
+    def _guardar_valores(self, campos: Optional[Iterable[str]] = None) -> None:
+        atuais = self.__dict__
+        salvos = atuais.setdefault(_ATTR, {})
+        for f in _concretos(self, campos):
+            if f.attname in atuais:
+                salvos[f.attname] = atuais[f.attname]
+
+    def campos_alterados(self) -> set[str]:
+        """Nomes dos campos cujo valor difere do lido/gravado (todos, se o objeto não veio do banco)."""
+        salvos = self.__dict__.get(_ATTR)
+        if self._state.adding or salvos is None:
+            return {f.name for f in self._meta.concrete_fields}
+        atuais = self.__dict__
+        return {
+            f.name for f in self._meta.concrete_fields
+            if f.attname in salvos and f.attname in atuais and atuais[f.attname] != salvos[f.attname]
+        }
+
+
+def _concretos(obj: models.Model, nomes: Optional[Iterable[str]] = None) -> list:
+    if nomes is None:
+        return list(obj._meta.concrete_fields)
+    nomes = set(nomes)
+    return [f for f in obj._meta.concrete_fields if f.name in nomes or f.attname in nomes]
+
+
+def _grupos_unicos(opts) -> list[set[str]]:
+    """Conjuntos de campos verificados juntos (unique_together e UniqueConstraint)."""
+    grupos = [set(g) for g in opts.unique_together]
+    for c in opts.total_unique_constraints:
+        grupos.append(set(c.fields))
+    return grupos
+
+
+def atualizar_campos(obj: RastreiaAlteracoes, data: dict[str, Any], *,
+                     validar: Optional[Callable[[set[str]], None]] = None) -> set[str]:
+    """
+    Aplica `data` em `obj`, valida e grava só os campos alterados.
+
+    `validar(alterados)` roda antes do `full_clean` para as regras do serviço
+    que consultam o banco (ex.: conflito de horário), e só quando há
+    alteração. Devolve os nomes dos campos alterados (vazio = nada gravado).
+    """
+    for k, v in data.items():
+        setattr(obj, k, v)
+    alterados = obj.campos_alterados()
+    if not alterados:
+        return alterados
+    if validar is not None:
+        validar(alterados)
+
+    opts = obj._meta
+    validados = set(alterados)
+    # unicidade composta: basta um campo do grupo ter mudado para checar o grupo todo
+    for grupo in _grupos_unicos(opts):
+        if grupo & alterados:
+            validados |= grupo
+    obj.full_clean(exclude=[f.name for f in opts.concrete_fields if f.name not in validados])
+
+    auto = {f.name for f in opts.concrete_fields if getattr(f, "auto_now", False)}
+    obj.save(update_fields=sorted(alterados | auto))
+    return alterados
@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class McaConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'mca'
+
+    def ready(self):
+        # escritas em condomínio/modalidade/funcionário/categoria invalidam o cache de referências
+        from .referencias import conectar
+        conectar()
+        # ... e as dos fragmentos de template cacheados (mca/fragmentos.py)
+        from . import fragmentos
+        fragmentos.conectar()
+        # wrapper de métricas de SQL em toda conexão nova (requests, jobs e comandos)
+        from . import metricas  # noqa: F401
+        from . import checks  # noqa: F401
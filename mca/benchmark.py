@@ -0,0 +1,399 @@
+# mca/benchmark.py
+"""
+Suíte de benchmarks dos caminhos quentes.
+
+Cada caso roda `repeticoes` vezes (após 1 execução de aquecimento) dentro de
+uma transação que é desfeita no final — os casos de escrita (cobranças,
+pagamentos, presenças, importações) não alteram a base e podem ser repetidos.
+Para cada caso guardamos mediana/mínimo em ms e o nº de consultas SQL.
+
+O relatório pode ser salvo em JSON e comparado com um anterior
+(`comparar(...)`), apontando regressões de tempo acima da tolerância e
+qualquer aumento no nº de consultas.
+
+Exportações são medidas pelas tarefas de mca/jobs.py (o que o worker roda
+quando a view enfileira, sem a fila); importações chamam os services com planilhas geradas a partir da
+base (metade linhas existentes → update, metade novas → create).
+"""
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from io import BytesIO
+from typing import Callable, Optional
+
+import django
+from django.db import connection, transaction
+from django.test import Client
+
+from .query_budget import InspetorConsultas
+
+
+@dataclass
+class Caso:
+    nome: str
+    grupo: str
+    func: Callable[["Contexto"], object]
+
+
+@dataclass
+class Resultado:
+    nome: str
+    grupo: str
+    mediana_ms: float
+    min_ms: float
+    consultas: int
+    erro: str = ""
+
+
+@dataclass
+class Contexto:
+    client: Client
+    ano: int
+    mes: int
+    turma_id: int
+    lista_ids: list
+    arquivos: dict = field(default_factory=dict)
+
+
+CASOS: list[Caso] = []
+
+
+def caso(nome: str, grupo: str):
+    def deco(func):
+        CASOS.append(Caso(nome=nome, grupo=grupo, func=func))
+        return func
+    return deco
+
+
+def _get(ctx: Contexto, url: str):
+    r = ctx.client.get(url)
+    if r.status_code != 200:
+        raise RuntimeError(f"GET {url} -> {r.status_code}")
+    # força o consumo de respostas em streaming
+    b"".join(r) if getattr(r, "streaming", False) else r.content
+    return r
+
+
+def _executar_tarefa(nome: str, **params):
+    from . import jobs
+    _, ex = jobs.executar_agora(nome, **params)
+    if ex.arquivo is None:
+        raise RuntimeError(f"tarefa {nome} não gerou arquivo")
+    return ex.arquivo
+
+
+# ---------------- Listagens ----------------
+
+for _url in [
+    "/turmas/", "/turmas/?page=3", "/turmas/?q=nat",
+    "/financeiro/", "/financeiro/?page=10", "/financeiro/?q=silva",
+    "/clientes/", "/clientes/?q=silva", "/clientes/?page=20",
+    "/condominios/", "/funcionarios/",
+]:
+    caso(f"GET {_url}", "listas")(lambda ctx, _u=_url: _get(ctx, _u))
+
+
+@caso("GET /turmas/<id>/alunos/", "listas")
+def _alunos(ctx):
+    return _get(ctx, f"/turmas/{ctx.turma_id}/alunos/")
+
+
+@caso("GET /turmas/<id>/presencas/", "listas")
+def _presencas(ctx):
+    return _get(ctx, f"/turmas/{ctx.turma_id}/presencas/")
+
+
+# ---------------- Financeiro ----------------
+
+@caso("gerar_cobrancas_mensalidades_global", "financeiro")
+def _cobrancas(ctx):
+    from financeiro.services import gerar_cobrancas_mensalidades_global
+    # mês seguinte ao último gerado pelo dataset: caminho de criação
+    return gerar_cobrancas_mensalidades_global(ano=ctx.ano + 1, mes=1)
+
+
+@caso("gerar_cobrancas_mensalidades_global (existentes)", "financeiro")
+def _cobrancas_existentes(ctx):
+    from financeiro.services import gerar_cobrancas_mensalidades_global
+    return gerar_cobrancas_mensalidades_global(ano=ctx.ano, mes=ctx.mes)
+
+
+@caso("gerar_pagamentos_professores", "financeiro")
+def _pagamentos(ctx):
+    from financeiro.services import gerar_pagamentos_professores
+    return gerar_pagamentos_professores(ctx.ano + 1, 1)
+
+
+# ---------------- Presenças ----------------
+
+@caso("sincronizar_itens_lista x50", "presencas")
+def _sync(ctx):
+    from turmas.services_presenca import sincronizar_itens_lista
+    for lista_id in ctx.lista_ids:
+        sincronizar_itens_lista(lista_id)
+
+
+@caso("gerar_listas_automaticas (1 turma, 1 mês)", "presencas")
+def _auto(ctx):
+    from turmas.services_presenca import gerar_listas_automaticas
+    return gerar_listas_automaticas(
+        turma_id=ctx.turma_id, data_de=date(ctx.ano + 1, 1, 1), data_ate=date(ctx.ano + 1, 1, 31),
+    )
+
+
+# ---------------- Vigência de matrículas ----------------
+# ativas_em/ativas_no_mes (intervalo normalizado) x o filtro antigo com OR
+# em data_fim nulo, que ainda serve de referência para a comparação.
+
+def _vigencia_antiga(inicio: date, fim: date):
+    from django.db.models import Q
+    from turmas.models import Matricula
+    return (Matricula.objects.filter(ativa=True, data_inicio__lte=fim)
+            .filter(Q(data_fim__isnull=True) | Q(data_fim__gte=inicio)))
+
+
+def _mes(ctx) -> tuple[date, date]:
+    from calendar import monthrange
+    return date(ctx.ano, ctx.mes, 1), date(ctx.ano, ctx.mes, monthrange(ctx.ano, ctx.mes)[1])
+
+
+@caso("ativas_no_mes (ids)", "vigencia")
+def _vig_mes(ctx):
+    from turmas.models import Matricula
+    return list(Matricula.objects.ativas_no_mes(ctx.ano, ctx.mes).order_by().values_list("id", flat=True))
+
+
+@caso("filtro antigo no mês (ids)", "vigencia")
+def _vig_mes_antigo(ctx):
+    return list(_vigencia_antiga(*_mes(ctx)).order_by().values_list("id", flat=True))
+
+
+@caso("ativas_em(dia).count()", "vigencia")
+def _vig_dia(ctx):
+    from turmas.models import Matricula
+    return Matricula.objects.ativas_em(_mes(ctx)[0]).count()
+
+
+@caso("filtro antigo no dia .count()", "vigencia")
+def _vig_dia_antigo(ctx):
+    d = _mes(ctx)[0]
+    return _vigencia_antiga(d, d).count()
+
+
+# ---------------- Exportações (tarefas de mca/jobs.py) ----------------
+# As views só enfileiram; o custo está na tarefa, rodada aqui sem fila.
+
+for _nome in ["clientes", "condominios", "funcionarios", "turmas", "financeiro"]:
+    caso(f"exportar {_nome}", "exportacoes")(
+        lambda ctx, _t=f"{_nome}.exportar": _executar_tarefa(_t))
+
+
+# ---------------- Importações (services) ----------------
+
+@caso("importar clientes", "importacoes")
+def _imp_clientes(ctx):
+    from clientes.services import importar_excel
+    return importar_excel(BytesIO(ctx.arquivos["clientes"]))
+
+
+@caso("importar condominios", "importacoes")
+def _imp_condominios(ctx):
+    from condominios.services import importar_condominios_de_excel
+    return importar_condominios_de_excel(BytesIO(ctx.arquivos["condominios"]))
+
+
+@caso("importar funcionarios", "importacoes")
+def _imp_funcionarios(ctx):
+    from funcionarios.services import importar_funcionarios_de_excel
+    return importar_funcionarios_de_excel(BytesIO(ctx.arquivos["funcionarios"]))
+
+
+# ---------------- Preparação ----------------
+
+def _planilha(headers: list, linhas: list) -> bytes:
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.append(headers)
+    for l in linhas:
+        ws.append(l)
+    bio = BytesIO()
+    wb.save(bio)
+    return bio.getvalue()
+
+
+def _arquivos_importacao(linhas: int) -> dict:
+    from clientes.models import Cliente
+    from condominios.models import Condominio
+    from funcionarios.models import Funcionario
+
+    metade = max(1, linhas // 2)
+    cond_id = Condominio.objects.values_list("id", flat=True).first()
+
+    cli_headers = ["cpf_cnpj", "nome_razao", "email", "municipio", "estado", "ativo", "condominio_id"]
+    cli = [
+        [c.cpf_cnpj, c.nome_razao, c.email, c.municipio, c.estado, 1, c.condominio_id]
+        for c in Cliente.objects.order_by("id")[:metade]
+    ]
+    cli += [
+        [f"6{i:010d}", f"Cliente Importado {i}", f"imp{i}@mail.example", "São Paulo", "SP", 1, cond_id]
+        for i in range(metade)
+    ]
+
+    cond_headers = ["cnpj", "nome", "email", "municipio", "estado", "ativo"]
+    cond = [
+        [c.cnpj, c.nome, c.email, c.municipio, c.estado, "sim"]
+        for c in Condominio.objects.order_by("id")[:metade]
+    ]
+    cond += [
+        [f"5{i:013d}", f"Condomínio Importado {i}", "", "Campinas", "SP", "sim"]
+        for i in range(metade)
+    ]
+
+    # funcionários novos criam User (hash de senha) — amostra menor
+    n_func = max(1, min(metade, 20))
+    func_headers = ["cpf_cnpj", "nome", "email", "cargo", "ativo"]
+    func = [
+        [f.cpf_cnpj, f.nome, f.email, f.cargo, "sim"]
+        for f in Funcionario.objects.order_by("id")[:n_func]
+    ]
+    func += [
+        [f"4{i:010d}", f"Funcionario Importado {i}", "", "ADMIN", "sim"]
+        for i in range(n_func)
+    ]
+
+    return {
+        "clientes": _planilha(cli_headers, cli),
+        "condominios": _planilha(cond_headers, cond),
+        "funcionarios": _planilha(func_headers, func),
+    }
+
+
+def preparar_contexto(*, linhas_importacao: int = 200) -> Contexto:
+    """Cria o diretor do benchmark, escolhe amostras e monta as planilhas."""
+    from django.contrib.auth.models import User
+    from turmas.models import ListaPresenca, Turma
+
+    user, _ = User.objects.get_or_create(
+        username="benchmark.diretor", defaults={"is_superuser": True, "is_staff": True},
+    )
+    client = Client()
+    client.force_login(user)
+
+    turma = (Turma.objects.filter(ativo=True)
+             .order_by("-id").values("id", "inicio_vigencia").first())
+    if not turma:
+        raise RuntimeError("Base sem turmas — rode gerar_dataset antes.")
+    ultima = ListaPresenca.objects.order_by("-data").values_list("data", flat=True).first()
+    ref = ultima or date.today()
+    lista_ids = list(ListaPresenca.objects.order_by("-data", "-id").values_list("id", flat=True)[:50])
+
+    return Contexto(
+        client=client,
+        ano=ref.year,
+        mes=ref.month,
+        turma_id=turma["id"],
+        lista_ids=lista_ids,
+        arquivos=_arquivos_importacao(linhas_importacao),
+    )
+
+
+# ---------------- Execução ----------------
+
+def _uma_vez(c: Caso, ctx: Contexto) -> tuple[float, int]:
+    with transaction.atomic():
+        with InspetorConsultas(com_origem=False) as insp:
+            inicio = time.perf_counter()
+            c.func(ctx)
+            dur = time.perf_counter() - inicio
+        transaction.set_rollback(True)
+    return dur, insp.total
+
+
+def rodar(ctx: Contexto, *, repeticoes: int = 3, filtro: str = "",
+          log: Optional[Callable[[str], None]] = None) -> list[Resultado]:
+    log = log or (lambda _msg: None)
+    resultados = []
+    for c in CASOS:
+        if filtro and filtro.lower() not in f"{c.grupo} {c.nome}".lower():
+            continue
+        try:
+            _uma_vez(c, ctx)  # aquecimento (imports, caches, páginas do SQLite)
+            tempos, consultas = [], 0
+            for _ in range(max(1, repeticoes)):
+                dur, consultas = _uma_vez(c, ctx)
+                tempos.append(dur * 1000)
+            r = Resultado(c.nome, c.grupo, round(statistics.median(tempos), 2),
+                          round(min(tempos), 2), consultas)
+        except Exception as e:  # um caso quebrado não derruba a suíte
+            r = Resultado(c.nome, c.grupo, 0.0, 0.0, 0, erro=f"{type(e).__name__}: {e}")
+        resultados.append(r)
+        log(formatar_linha(r))
+    return resultados
+
+
+# ---------------- Relatório ----------------
+
+def metadados(extra: Optional[dict] = None) -> dict:
+    return {
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "banco": connection.vendor,
+        "sqlite": getattr(connection.Database, "sqlite_version", ""),
+        "maquina": platform.node(),
+        **(extra or {}),
+    }
+
+
+def para_json(resultados: list[Resultado], meta: dict) -> str:
+    return json.dumps({
+        "meta": meta,
+        "casos": {
+            r.nome: {"grupo": r.grupo, "mediana_ms": r.mediana_ms, "min_ms": r.min_ms,
+                     "consultas": r.consultas, "erro": r.erro}
+            for r in resultados
+        },
+    }, ensure_ascii=False, indent=2)
+
+
+def formatar_linha(r: Resultado, base: Optional[dict] = None, tolerancia: float = 0.2) -> str:
+    if r.erro:
+        return f"{r.grupo:<12} {r.nome:<50} ERRO {r.erro}"
+    linha = f"{r.grupo:<12} {r.nome:<50} {r.mediana_ms:>10.1f} {r.min_ms:>10.1f} {r.consultas:>8}"
+    if base:
+        b_ms, b_q = base.get("mediana_ms") or 0, base.get("consultas") or 0
+        delta = ((r.mediana_ms - b_ms) / b_ms * 100) if b_ms else 0.0
+        marca = " <<" if regrediu(r, base, tolerancia) else ""
+        linha += f" {delta:>+8.1f}% {r.consultas - b_q:>+6}{marca}"
+    return linha
+
+
+def cabecalho(com_base: bool = False) -> str:
+    h = f"{'grupo':<12} {'caso':<50} {'mediana ms':>10} {'min ms':>10} {'consultas':>8}"
+    if com_base:
+        h += f" {'Δ tempo':>9} {'Δ SQL':>6}"
+    return h
+
+
+def regrediu(r: Resultado, base: dict, tolerancia: float) -> bool:
+    if r.erro:
+        return True
+    b_ms, b_q = base.get("mediana_ms") or 0, base.get("consultas") or 0
+    return (b_ms and r.mediana_ms > b_ms * (1 + tolerancia)) or r.consultas > b_q
+
+
+def comparar(resultados: list[Resultado], base_json: str, tolerancia: float = 0.2):
+    """Retorna (linhas do relatório, nomes dos casos que regrediram)."""
+    base = json.loads(base_json).get("casos", {})
+    linhas, regressoes = [cabecalho(com_base=True)], []
+    for r in resultados:
+        b = base.get(r.nome)
+        linhas.append(formatar_linha(r, b, tolerancia))
+        if b and regrediu(r, b, tolerancia):
+            regressoes.append(r.nome)
+    return linhas, regressoes
@@ -0,0 +1,36 @@
+# mca/checks.py
+"""System checks do projeto (`manage.py check`, também no runserver/migrate)."""
+from django.core import checks
+
+from . import roles, versoes
+
+
+@checks.register(checks.Tags.caches)
+def papel_em_cache_por_processo(app_configs, **kwargs):
+    """TTL longo do papel só com cache compartilhado (ver mca/roles.py)."""
+    if roles.cache_por_processo() and roles.PAPEL_TTL > roles.PAPEL_TTL_LOCAL:
+        return [checks.Error(
+            f"PAPEL['TTL'] = {roles.PAPEL_TTL}s com cache 'default' por processo: invalidar_papel só "
+            f"vale no worker que fez a mudança e os outros mantêm o papel antigo por até esse tempo.",
+            hint=(f"Use um cache compartilhado (Redis, Memcached, banco) ou TTL de até "
+                  f"{roles.PAPEL_TTL_LOCAL}s (MCA_PAPEL_TTL)."),
+            id="mca.E001",
+        )]
+    return []
+
+
+@checks.register(checks.Tags.caches)
+def versoes_em_cache_por_processo(app_configs, **kwargs):
+    """Versão sem expiração (ou longa) só com cache compartilhado (ver mca/versoes.py)."""
+    ttl = versoes.VERSAO_TTL
+    if versoes.cache_por_processo() and (ttl is None or ttl > versoes.VERSAO_TTL_LOCAL):
+        ttl = "sem expiração" if ttl is None else f"{ttl}s"
+        return [checks.Error(
+            f"VERSOES['TTL'] = {ttl} com cache 'default' por processo: a invalidação de referências, "
+            f"fragmentos e autocomplete só vale no worker que fez a escrita e os outros mostram dados "
+            f"antigos por até esse tempo.",
+            hint=(f"Use um cache compartilhado (Redis, Memcached, banco) ou TTL de até "
+                  f"{versoes.VERSAO_TTL_LOCAL}s (MCA_VERSOES_TTL)."),
+            id="mca.E002",
+        )]
+    return []
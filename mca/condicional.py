@@ -0,0 +1,144 @@
+# mca/condicional.py
+"""
+GET condicional (ETag / Last-Modified) para listas e exportações.
+
+As listas de turmas e do financeiro re-renderizavam inteiras a cada
+navegação, mesmo sem nada ter mudado. Agora a view calcula um validador
+barato dos dados exibidos e, se o navegador já tem a mesma versão, responde
+304 sem montar a página:
+
+    v = condicional.para_request(request, qs, relacionados=("matriculas",),
+                                 extras=referencias.versoes())
+    if (r := condicional.nao_modificado(request, v)) is not None:
+        return r
+    ...
+    return condicional.aplicar(render(request, "turmas/list.html", ctx), v)
+
+O validador é uma consulta de agregação sobre o queryset filtrado:
+quantidade, maior id e maior `updated_at` (ou `created_at`) das linhas e das
+relações indicadas. Entram também o papel do usuário, o token CSRF, o dia
+(listas com vigência/vencimento dependem da data) e o que a view passar em
+`extras` (ex.: versões das referências usadas em combos e nomes).
+
+Não há revalidação quando o request não é GET/HEAD ou quando há mensagens
+(django.contrib.messages) pendentes: a página precisa ser renderizada para
+mostrá-las.
+
+Escritas que não passam pelo `save()` (`update()`, `bulk_update`) não mexem
+no `updated_at`; se mudarem só colunas exibidas, a página fica antiga até a
+próxima mudança que altere quantidade/ids/datas.
+"""
+from __future__ import annotations
+
+import hashlib
+from calendar import timegm
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.utils.timezone import localdate
+
+from .roles import papel_do_usuario
+
+
+@dataclass(frozen=True)
+class Validador:
+    etag: str                       # já entre aspas, fraco (W/"...")
+    ultima: Optional[datetime] = None
+
+    @property
+    def timestamp(self) -> Optional[int]:
+        return timegm(self.ultima.utctimetuple()) if self.ultima else None
+
+
+def _campo_data(model) -> Optional[str]:
+    nomes = {f.name for f in model._meta.concrete_fields}
+    for campo in ("updated_at", "created_at"):
+        if campo in nomes:
+            return campo
+    return None
+
+
+def assinatura(qs, relacionados: Iterable[str] = (),
+               agregados: Optional[dict] = None) -> tuple[tuple, Optional[datetime]]:
+    """
+    (valores, maior data) de uma consulta de agregação sobre `qs`.
+
+    Anotações do queryset (subqueries de ocupação, soma das baixas) não são
+    calculadas: a agregação roda sobre os ids filtrados. `agregados` cobre o
+    que quantidade/ids/datas não pegam (ex.: matrículas ativas, sem updated_at).
+    """
+    model = qs.model
+    base = model._base_manager.using(qs.db).filter(pk__in=qs.order_by().values("pk"))
+    agg = {"n": Count("pk", distinct=True), "max_pk": Max("pk")}
+    datas = []
+    campo = _campo_data(model)
+    if campo:
+        agg["u"] = Max(campo)
+        datas.append("u")
+    for rel in relacionados:
+        rel_model = model._meta.get_field(rel).related_model
+        agg[f"{rel}_n"] = Count(f"{rel}__pk", distinct=True)
+        agg[f"{rel}_max_pk"] = Max(f"{rel}__pk")
+        rel_campo = _campo_data(rel_model)
+        if rel_campo:
+            agg[f"{rel}_u"] = Max(f"{rel}__{rel_campo}")
+            datas.append(f"{rel}_u")
+    agg.update(agregados or {})
+    r = base.aggregate(**agg)
+    ultima = max((r[k] for k in datas if r[k] is not None), default=None)
+    return tuple(sorted(r.items())), ultima
+
+
+def validador(*querysets, relacionados: Iterable[str] = (), agregados: Optional[dict] = None,
+              extras: Iterable = ()) -> Validador:
+    """Validador dos querysets (`relacionados`/`agregados` valem para o primeiro) e dos `extras`."""
+    h = hashlib.blake2b(digest_size=12)
+    ultima = None
+    for i, qs in enumerate(querysets):
+        valores, data = assinatura(qs, relacionados, agregados) if i == 0 else assinatura(qs)
+        h.update(repr((qs.model._meta.label, valores)).encode())
+        if data is not None and (ultima is None or data > ultima):
+            ultima = data
+    h.update(repr(tuple(extras)).encode())
+    return Validador(etag="W/" + quote_etag(h.hexdigest()), ultima=ultima)
+
+
+def para_request(request, *querysets, relacionados: Iterable[str] = (), agregados: Optional[dict] = None,
+                 extras: Iterable = ()) -> Optional[Validador]:
+    """Validador da página para este usuário; None quando ela não pode ser revalidada."""
+    if request.method not in ("GET", "HEAD") or len(messages.get_messages(request)):
+        return None
+    papel = papel_do_usuario(request.user)
+    contexto = (
+        papel.user_id, papel.is_superuser, tuple(sorted(papel.grupos)), papel.funcionario_id, papel.cargo,
+        request.META.get("CSRF_COOKIE", ""), localdate().isoformat(),
+    )
+    return validador(*querysets, relacionados=relacionados, agregados=agregados, extras=(*contexto, *extras))
+
+
+def nao_modificado(request, v: Optional[Validador]) -> Optional[HttpResponse]:
+    """Resposta 304 se o navegador já tem esta versão da página (senão None)."""
+    if v is None:
+        return None
+    r = get_conditional_response(request, etag=v.etag, last_modified=v.timestamp)
+    if r is not None:
+        r["ETag"] = v.etag
+        patch_cache_control(r, private=True, no_cache=True)
+    return r
+
+
+def aplicar(response: HttpResponse, v: Optional[Validador]) -> HttpResponse:
+    """Coloca os validadores na resposta e pede revalidação a cada navegação."""
+    if v is None or response.status_code != 200:
+        return response
+    response["ETag"] = v.etag
+    if v.timestamp is not None:
+        response["Last-Modified"] = http_date(v.timestamp)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
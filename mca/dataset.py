@@ -0,0 +1,312 @@
+# mca/dataset.py
+"""
+Gerador de base sintética em larga escala (benchmarks / testes de carga).
+
+Ao contrário dos seeders existentes (Faker + services, uma linha por vez),
+aqui tudo é montado em memória e gravado com `bulk_create` em lotes:
+condomínios → modalidades → professores → turmas → clientes → matrículas →
+listas de presença (com itens) → lançamentos (com baixas).
+
+`bulk_create` não chama save() nem sinais, então os campos derivados que o
+save() preencheria (Cliente.busca / cpf_cnpj_digits, Modalidade.slug,
+Turma.sort_key, Matricula.sort_nome / vigente_ate) são calculados aqui.
+Professores são criados sem User (o sinal que cria usuário não dispara) — o
+benchmark cria o próprio diretor.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+from datetime import date, time, timedelta
+from decimal import Decimal
+from typing import Callable, Optional
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from clientes.busca import invalidar_autocomplete, somente_digitos, texto_busca_cliente
+from clientes.models import Cliente
+from condominios.models import Condominio
+from financeiro.models import Baixa, CategoriaFinanceira, Lancamento
+from funcionarios.models import Funcionario
+from modalidades.models import Modalidade
+from turmas.models import VIGENCIA_ABERTA, ItemPresenca, ListaPresenca, Matricula, Turma
+from turmas.ordenacao import chave_nome, chave_turma
+
+from . import fragmentos, referencias
+
+LOTE = 2000
+
+_NOMES = [
+    "Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Heitor",
+    "Isabela", "João", "Júlia", "Lucas", "Mariana", "Nicolas", "Otávio", "Patrícia",
+    "Rafael", "Sofia", "Thiago", "Valentina", "Vinícius", "Yasmin", "Érica", "Caio",
+]
+_SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves",
+    "Pereira", "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho",
+    "Araújo", "Melo", "Barbosa", "Conceição", "Simões", "Gonçalves",
+]
+_MODALIDADES = [
+    "Natação", "Funcional", "Pilates", "Judô", "Ballet", "Futsal", "Yoga",
+    "Tênis", "Vôlei", "Jiu-Jitsu", "Hidroginástica", "Dança",
+]
+_UFS = ["SP", "RJ", "MG", "PR", "SC", "RS", "BA", "PE", "DF", "GO"]
+_DIAS = ["seg", "ter", "qua", "qui", "sex", "sab"]
+
+
+@dataclass
+class ParametrosDataset:
+    condominios: int = 20
+    modalidades_por_condominio: int = 4
+    professores: int = 30
+    turmas_por_modalidade: int = 2
+    clientes: int = 3000
+    matriculas_por_cliente: float = 1.6
+    meses: int = 12
+    ano: int = 0           # 0 = ano corrente
+    semente: int = 42
+    capacidade: int = 25
+
+
+@dataclass
+class ResumoDataset:
+    contagens: dict = field(default_factory=dict)
+
+    def __str__(self):
+        return ", ".join(f"{k}={v}" for k, v in self.contagens.items())
+
+
+def _doc(prefixo: int, n: int, tamanho: int) -> str:
+    # documentos sintéticos únicos (não passam em validação de dígito, e nem precisam)
+    return f"{prefixo}{n:0{tamanho - len(str(prefixo))}d}"
+
+
+def _bulk(model, objs: list, resumo: ResumoDataset, nome: str) -> list:
+    criados = []
+    for i in range(0, len(objs), LOTE):
+        criados.extend(model.objects.bulk_create(objs[i:i + LOTE], batch_size=500))
+    resumo.contagens[nome] = resumo.contagens.get(nome, 0) + len(objs)
+    return criados
+
+
+def _dias_da_turma(t: Turma) -> set[int]:
+    return set(t.dias_ativos())
+
+
+@transaction.atomic
+def gerar_dataset(params: Optional[ParametrosDataset] = None,
+                  log: Optional[Callable[[str], None]] = None) -> ResumoDataset:
+    """
+    Gera um "tenant" completo. Determinístico para a mesma `semente`.
+    Documentos (CNPJ/CPF) começam com prefixos próprios para não colidir
+    com dados reais já cadastrados.
+    """
+    p = params or ParametrosDataset()
+    rnd = random.Random(p.semente)
+    log = log or (lambda _msg: None)
+    resumo = ResumoDataset()
+    hoje = date.today()
+    ano = p.ano or hoje.year
+    inicio_ano = date(ano, 1, 1)
+
+    def nome_pessoa():
+        return f"{rnd.choice(_NOMES)} {rnd.choice(_SOBRENOMES)} {rnd.choice(_SOBRENOMES)}"
+
+    # base para documentos únicos entre execuções (evita UNIQUE em bases já populadas)
+    base = Condominio.objects.count() + Cliente.objects.count() + Funcionario.objects.count()
+
+    # ---- Condomínios
+    conds = _bulk(Condominio, [
+        Condominio(
+            cnpj=_doc(9, base + i, 14),
+            nome=f"Residencial {rnd.choice(_SOBRENOMES)} {i + 1}",
+            email=f"contato{base + i}@cond.example",
+            municipio="São Paulo",
+            estado=rnd.choice(_UFS),
+            ativo=True,
+        )
+        for i in range(p.condominios)
+    ], resumo, "condominios")
+    log(f"condomínios: {len(conds)}")
+
+    # ---- Modalidades (slug é preenchido no save(); aqui na mão)
+    mods = []
+    for c in conds:
+        for nome in rnd.sample(_MODALIDADES, k=min(p.modalidades_por_condominio, len(_MODALIDADES))):
+            mods.append(Modalidade(
+                nome=nome, condominio=c, ativo=True,
+                slug=slugify(f"{nome}-{c.cnpj}")[:120],
+            ))
+    mods = _bulk(Modalidade, mods, resumo, "modalidades")
+    log(f"modalidades: {len(mods)}")
+
+    # ---- Professores (sem User: o sinal post_save não roda no bulk_create)
+    profs = _bulk(Funcionario, [
+        Funcionario(
+            cpf_cnpj=_doc(8, base + i, 11),
+            nome=nome_pessoa(),
+            cargo=Funcionario.Cargo.PROFESSOR,
+            registro_cref=f"{100000 + i}-G/SP",
+            ativo=True,
+        )
+        for i in range(p.professores)
+    ], resumo, "professores")
+    log(f"professores: {len(profs)}")
+
+    # ---- Turmas
+    turmas = []
+    nome_cond = {c.id: c.nome for c in conds}
+    for m in mods:
+        for _ in range(p.turmas_por_modalidade):
+            dias = rnd.sample(_DIAS, k=rnd.choice([1, 2, 2, 3]))
+            valor = Decimal(rnd.choice([60, 70, 80, 90, 120]))
+            hora = time(rnd.randint(7, 20), rnd.choice([0, 30]))
+            turmas.append(Turma(
+                professor=rnd.choice(profs),
+                modalidade=m,
+                valor=valor,
+                valor_dsr=(valor * Decimal("1.1667")).quantize(Decimal("0.01")),
+                vale_transporte=Decimal("12.00"),
+                bonificacao=Decimal("0.00"),
+                capacidade=p.capacidade,
+                hora_inicio=hora,
+                duracao_minutos=rnd.choice([45, 60, 60, 90]),
+                inicio_vigencia=inicio_ano,
+                ativo=True,
+                sort_key=chave_turma(nome_cond[m.condominio_id], m.nome, hora),
+                **{d: True for d in dias},
+            ))
+    turmas = _bulk(Turma, turmas, resumo, "turmas")
+    turmas_por_cond: dict[int, list[Turma]] = {}
+    mod_cond = {m.id: m.condominio_id for m in mods}
+    for t in turmas:
+        turmas_por_cond.setdefault(mod_cond[t.modalidade_id], []).append(t)
+    log(f"turmas: {len(turmas)}")
+
+    # ---- Clientes (campos de busca que o save() calcularia)
+    clientes = []
+    for i in range(p.clientes):
+        nome = nome_pessoa()
+        doc = _doc(7, base + i, 11)
+        email = f"cliente{base + i}@mail.example"
+        clientes.append(Cliente(
+            cpf_cnpj=doc,
+            nome_razao=nome,
+            email=email,
+            data_nascimento=date(rnd.randint(1950, 2018), rnd.randint(1, 12), rnd.randint(1, 28)),
+            telefone_celular=f"11 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}",
+            condominio=rnd.choice(conds),
+            ativo=rnd.random() > 0.05,
+            busca=texto_busca_cliente(nome, email, doc),
+            cpf_cnpj_digits=somente_digitos(doc),
+        ))
+    clientes = _bulk(Cliente, clientes, resumo, "clientes")
+    log(f"clientes: {len(clientes)}")
+
+    # ---- Matrículas (turmas do condomínio do cliente, sem lotar)
+    ocupacao = {t.id: 0 for t in turmas}
+    matriculas = []
+    for cli in clientes:
+        opcoes = turmas_por_cond.get(cli.condominio_id) or []
+        if not opcoes:
+            continue
+        n = int(p.matriculas_por_cliente) + (1 if rnd.random() < p.matriculas_por_cliente % 1 else 0)
+        for t in rnd.sample(opcoes, k=min(n, len(opcoes))):
+            if ocupacao[t.id] >= t.capacidade:
+                continue
+            ocupacao[t.id] += 1
+            inicio = inicio_ano + timedelta(days=rnd.randint(0, 120))
+            encerrada = rnd.random() < 0.1
+            fim = (inicio + timedelta(days=rnd.randint(30, 200))) if encerrada else None
+            matriculas.append(Matricula(
+                turma=t, cliente=cli,
+                data_inicio=inicio,
+                data_fim=fim,
+                vigente_ate=fim or VIGENCIA_ABERTA,
+                ativa=not encerrada,
+                sort_nome=chave_nome(cli.nome_razao),
+            ))
+    matriculas = _bulk(Matricula, matriculas, resumo, "matriculas")
+    log(f"matrículas: {len(matriculas)}")
+
+    # ---- Listas de presença (p.meses a partir de janeiro, só dias da turma)
+    fim_listas = min(inicio_ano + timedelta(days=30 * p.meses), hoje) if ano == hoje.year \
+        else inicio_ano + timedelta(days=30 * p.meses)
+    mats_por_turma: dict[int, list[Matricula]] = {}
+    for m in matriculas:
+        mats_por_turma.setdefault(m.turma_id, []).append(m)
+    nomes_cli = {c.id: (c.nome_razao, c.cpf_cnpj) for c in clientes}
+
+    listas = []
+    for t in turmas:
+        dias = _dias_da_turma(t)
+        d = inicio_ano
+        while d < fim_listas:
+            if d.weekday() in dias:
+                listas.append(ListaPresenca(turma=t, data=d))
+            d += timedelta(days=1)
+    listas = _bulk(ListaPresenca, listas, resumo, "listas_presenca")
+
+    itens = []
+    for lista in listas:
+        for m in mats_por_turma.get(lista.turma_id, ()):
+            if not m.vigente_em(lista.data):
+                continue
+            nome, doc = nomes_cli[m.cliente_id]
+            itens.append(ItemPresenca(
+                lista=lista, matricula=m, cliente_id=m.cliente_id,
+                presente=rnd.random() < 0.8,
+                cliente_nome_snapshot=nome, cliente_doc_snapshot=doc,
+            ))
+        if len(itens) >= LOTE * 5:
+            _bulk(ItemPresenca, itens, resumo, "itens_presenca")
+            itens = []
+    _bulk(ItemPresenca, itens, resumo, "itens_presenca")
+    log(f"listas: {len(listas)}, itens: {resumo.contagens.get('itens_presenca', 0)}")
+
+    # ---- Lançamentos: mensalidade por cliente/mês + pagamentos de professores
+    cat, _ = CategoriaFinanceira.objects.get_or_create(nome="Mensalidades")
+    valor_turma = {t.id: t.valor for t in turmas}
+    por_cliente: dict[int, list[Matricula]] = {}
+    for m in matriculas:
+        por_cliente.setdefault(m.cliente_id, []).append(m)
+
+    lancs = []
+    for mes in range(1, min(p.meses, 12) + 1):
+        venc = date(ano, mes, 5)
+        for cid, mats in por_cliente.items():
+            total = sum((valor_turma[m.turma_id] for m in mats), Decimal("0.00"))
+            nome, doc = nomes_cli[cid]
+            lancs.append(Lancamento(
+                tipo="RECEBER",
+                descricao=f"Mensalidades ({mes:02d}/{ano}) — {nome}",
+                valor=total, vencimento=venc,
+                status="LIQUIDADO" if venc < hoje and rnd.random() < 0.85 else "ABERTO",
+                cliente_id=cid, categoria=cat,
+                contraparte_nome=nome, contraparte_doc=doc,
+            ))
+        for prof in profs:
+            lancs.append(Lancamento(
+                tipo="PAGAR",
+                descricao=f"Pagamento Professor {prof.nome} ({mes:02d}/{ano})",
+                valor=Decimal(rnd.randint(800, 4000)), vencimento=venc,
+                status="LIQUIDADO" if venc < hoje else "ABERTO",
+                funcionario=prof,
+            ))
+    lancs = _bulk(Lancamento, lancs, resumo, "lancamentos")
+
+    _bulk(Baixa, [
+        Baixa(lancamento=l, data=l.vencimento, valor=l.valor, forma="PIX")
+        for l in lancs if l.status == "LIQUIDADO" and l.valor > 0
+    ], resumo, "baixas")
+    log(f"lançamentos: {len(lancs)}, baixas: {resumo.contagens.get('baixas', 0)}")
+
+    # bulk_create não dispara sinais: invalida os caches de leitura à mão
+    for nome in referencias.REFERENCIAS:
+        referencias.invalidar(nome)
+    for nome in fragmentos.FRAGMENTOS:
+        fragmentos.invalidar(nome)
+    invalidar_autocomplete()
+
+    return resumo
@@ -0,0 +1,112 @@
+# mca/escrita.py
+"""
+Escritas em lote sem travar o resto do sistema.
+
+O SQLite aceita um writer por vez. Uma rotina em lote dentro de um único
+`transaction.atomic` (cobranças do mês, listas automáticas) segura o lock de
+escrita do começo ao fim, e os requests interativos que precisam gravar
+esperam o `busy_timeout` e falham com "database is locked".
+
+`em_lotes(itens, func)` quebra o trabalho em transações curtas:
+
+- cada lote roda em `transaction.atomic()` próprio e é commitado ao final;
+- entre um lote e outro há uma pausa, para que os writers interativos
+  (que estão no busy handler do SQLite) peguem o lock;
+- lotes de rotinas diferentes passam pela `fila_escrita()`: um lock do
+  processo + lock de arquivo ao lado do banco (entre processos/workers),
+  então duas rotinas se intercalam lote a lote em vez de disputar o banco.
+
+As rotinas que usam `em_lotes` precisam ser idempotentes (pular o que já foi
+gravado): se falharem no meio, os lotes anteriores ficam commitados e
+rodá-las de novo completa o trabalho.
+
+Dentro de um atomic externo (ex.: benchmark, testes) os lotes viram
+savepoints e nada é commitado antes do fim — o comportamento antigo.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Iterable, Optional, Sized
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+try:  # lock entre processos (não existe no Windows)
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+_cfg = getattr(settings, "ESCRITA_EM_LOTES", {})
+TAMANHO_LOTE = _cfg.get("TAMANHO", 100)
+# o busy handler do SQLite dorme até 100 ms entre tentativas: uma pausa menor
+# que isso deixa o writer interativo dormindo enquanto o próximo lote começa
+PAUSA = _cfg.get("PAUSA", 0.1)
+
+_lock_processo = threading.Lock()
+
+
+def lotes(itens: Iterable, tamanho: int) -> Iterable[list]:
+    it = iter(itens)
+    while True:
+        lote = list(islice(it, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def _arquivo_lock(using: str) -> Optional[str]:
+    conn = connections[using]
+    if conn.vendor != "sqlite" or conn.is_in_memory_db():
+        return None
+    return f"{conn.settings_dict['NAME']}.escrita.lock"
+
+
+@contextmanager
+def fila_escrita(using: str = DEFAULT_DB_ALIAS):
+    """Lock de escrita em lote (processo + arquivo). Reentrante não é: não aninhe."""
+    caminho = _arquivo_lock(using) if fcntl else None
+    with _lock_processo:
+        if caminho is None:
+            yield
+            return
+        fd = os.open(caminho, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def em_lotes(itens: Iterable, func: Callable[[list], object], *, tamanho: Optional[int] = None,
+             using: str = DEFAULT_DB_ALIAS, pausa: Optional[float] = None,
+             progresso: Optional[Callable[[int, Optional[int]], None]] = None) -> list:
+    """
+    Chama `func(lote)` para cada fatia de `itens`, cada uma na sua transação
+    (com a fila de escrita). Devolve a lista de retornos de `func`.
+    `progresso(feitos, total)` é chamado depois de cada lote commitado — uma
+    exceção ali (ex.: job cancelado) interrompe sem perder os lotes anteriores.
+    """
+    tamanho = tamanho or TAMANHO_LOTE
+    pausa = PAUSA if pausa is None else pausa
+    total = len(itens) if isinstance(itens, Sized) else None
+    externo = connections[using].in_atomic_block
+    resultados, feitos = [], 0
+    for lote in lotes(itens, tamanho):
+        if externo:
+            # já há transação aberta: não dá para commitar, só agrupar
+            with transaction.atomic(using=using):
+                resultados.append(func(lote))
+        else:
+            with fila_escrita(using), transaction.atomic(using=using):
+                resultados.append(func(lote))
+        feitos += len(lote)
+        if progresso:
+            progresso(feitos, total)
+        if pausa and not externo:
+            time.sleep(pausa)
+    return resultados
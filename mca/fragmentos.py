@@ -0,0 +1,123 @@
+# mca/fragmentos.py
+"""
+Versões dos fragmentos de template cacheados (`{% cache %}`).
+
+As linhas das listas de turmas, lançamentos e clientes são o grosso da
+renderização (botões com dezenas de data-attributes, badges, nomes de
+condomínio/modalidade/professor). Agora cada linha fica no cache
+`fragmentos` e só é renderizada de novo quando algo que ela mostra muda:
+
+- o que é da própria linha entra direto na chave do `{% cache %}`
+  (id, `updated_at`, ocupação/soma das baixas anotadas, papel, dia);
+- o que vem de outras tabelas (nomes, `Turma.__str__`) entra pela versão
+  do fragmento, `{% versao_fragmento "turmas.linha" as v %}`, que junta um
+  contador próprio com as versões de mca/referencias.py.
+
+`FRAGMENTOS` é o registro: para cada fragmento, os models cujas escritas
+(post_save/post_delete, ligados em `conectar`) o invalidam, e as
+referências das quais ele depende. Escritas em massa (bulk_create/update,
+`update()`) devem chamar `invalidar(nome)` (ou `referencias.invalidar`).
+
+    {% load fragmentos %}
+    {% versao_fragmento "turmas.linha" as vfrag %}
+    {% for t in page_obj.object_list %}
+      {% cache 21600 turmas_linha t.id t.updated_at t.ocupacao vfrag using="fragmentos" %}
+        <tr>...</tr>
+      {% endcache %}
+    {% endfor %}
+
+O contador é de mca/versoes.py: com o cache `default` por processo (LocMem,
+o padrão) uma escrita só invalida no processo que a fez, e nos outros as
+linhas antigas valem até a versão expirar (`versoes.VERSAO_TTL_LOCAL`), não
+até o fim do `FRAGMENTO_TTL`.
+
+Nada com `{% csrf_token %}` pode ficar dentro do fragmento (o token é do
+usuário): os formulários das linhas ficam fora do `{% cache %}`.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import referencias, versoes
+
+FRAGMENTO_TTL = 60 * 60 * 6  # segundos; o mesmo valor vai no {% cache %} dos templates
+
+
+@dataclass(frozen=True)
+class Fragmento:
+    nome: str
+    models: tuple = ()       # "app_label.Model" cujas escritas invalidam o fragmento
+    referencias: tuple = ()  # nomes de mca/referencias.py cujas versões entram na chave
+
+
+FRAGMENTOS: dict[str, Fragmento] = {f.nome: f for f in [
+    # templates/turmas/list.html: modalidade, condomínio e professor da linha
+    Fragmento("turmas.linha", referencias=("modalidades", "condominios", "funcionarios")),
+    # templates/financeiro/list.html: contraparte (cliente, funcionário, condomínio, turma)
+    Fragmento(
+        "financeiro.linha",
+        models=("clientes.Cliente", "turmas.Turma"),
+        referencias=("funcionarios", "condominios", "modalidades"),
+    ),
+    # templates/clientes/list.html: condomínio do cliente
+    Fragmento("clientes.linha", referencias=("condominios",)),
+]}
+
+
+def _fragmento(nome: str) -> Fragmento:
+    try:
+        return FRAGMENTOS[nome]
+    except KeyError:
+        raise KeyError(f"Fragmento desconhecido: {nome!r}") from None
+
+
+def _versao_key(nome: str) -> str:
+    return f"frag:versao:{nome}"
+
+
+def versao(nome: str) -> str:
+    """Versão do fragmento para a chave do `{% cache %}` (contador + referências)."""
+    f = _fragmento(nome)
+    v = versoes.versao(_versao_key(nome))
+    return ".".join(str(x) for x in (v, *referencias.versoes(*f.referencias)))
+
+
+def invalidar(nome: str) -> None:
+    _fragmento(nome)
+    versoes.incrementar(_versao_key(nome))
+
+
+# ---------------- Invalidação ----------------
+
+def _por_model() -> dict[str, list[str]]:
+    out: dict[str, list[str]] = {}
+    for f in FRAGMENTOS.values():
+        for model in f.models:
+            out.setdefault(model, []).append(f.nome)
+    return out
+
+
+def _receiver(nomes: list[str]):
+    def _invalidar(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+        for nome in nomes:
+            invalidar(nome)
+        # de novo no commit (mesmo motivo de referencias._receiver)
+        transaction.on_commit(lambda: [invalidar(n) for n in nomes], using=using)
+    _invalidar.__name__ = "invalidar_frag_" + "_".join(nomes)
+    return _invalidar
+
+
+_receivers: dict[str, object] = {}
+
+
+def conectar() -> None:
+    """Liga post_save/post_delete dos models do registro (AppConfig.ready)."""
+    for label, nomes in _por_model().items():
+        model = apps.get_model(label)
+        _receivers[label] = receiver = _receiver(nomes)
+        post_save.connect(receiver, sender=model, dispatch_uid=f"frag_{label}_save")
+        post_delete.connect(receiver, sender=model, dispatch_uid=f"frag_{label}_delete")
@@ -0,0 +1,413 @@
+# mca/jobs.py
+"""
+Tarefas em segundo plano (fila no banco, modelo `mca.Job`).
+
+Importações de planilha, exportações e os geradores do mês (cobranças +
+pagamentos de professores, listas de presença) rodavam dentro do request e
+estouravam o timeout do worker web em bases grandes. Agora:
+
+- cada app registra suas tarefas em `<app>/jobs.py` (descobertas como os
+  lookups) com `@tarefa(nome, titulo=...)`; a função recebe uma `Execucao`
+  e os parâmetros do job, e devolve um dict (`mensagem` vira o resumo);
+- a view chama `enfileirar(...)` e redireciona para a página do job, que
+  acompanha o progresso (`/jobs/<id>/`) e oferece o arquivo gerado;
+- `Execucao.progresso(feitos, total)` grava o andamento (no máximo a cada
+  `INTERVALO_PROGRESSO`) e é o ponto de cancelamento: se o usuário pediu para
+  cancelar, levanta `Cancelado` ali — o que já foi commitado fica (as rotinas
+  em lote são idempotentes, ver mca/escrita.py);
+- `Execucao.salvar_arquivo(nome, conteudo)` guarda o resultado em
+  `JOBS["DIR"]/<id>/`, baixado depois por `/jobs/<id>/arquivo/`;
+- exportações declaram `validador=` (ver mca/condicional.py): se os dados
+  e os filtros não mudaram desde a última exportação do usuário, e o arquivo
+  ainda existe, `enfileirar` devolve aquele job em vez de gerar de novo.
+
+Quem processa a fila depende de `JOBS["MODO"]`:
+
+- `worker`: só enfileira; `manage.py rodar_jobs` (pool de threads) consome.
+  Vários workers podem rodar juntos: `reivindicar()` pega o job com um UPDATE
+  condicional, então dois processos nunca rodam o mesmo job;
+- `thread`: pool de threads no próprio processo web (sem processo extra);
+- `sincrono`: roda dentro do request (depuração).
+
+Enquanto `executar` roda um job, uma thread do processo (`_batimentos`)
+renova o `heartbeat` de todos os jobs em andamento a cada
+`INTERVALO_HEARTBEAT`, mesmo que a tarefa passe muito tempo sem chamar
+`progresso`. `recuperar_orfaos` só falha jobs com heartbeat velho (processo
+morto), nunca pelo tempo de execução.
+
+    @tarefa("clientes.exportar", titulo="Exportação de clientes", replica=True)
+    def exportar(ex, *, q="", ativos=""):
+        nome, conteudo = cs.exportar_excel(cs.buscar_clientes(q=q, ...))
+        ex.salvar_arquivo(nome, conteudo)
+        return {"mensagem": "Planilha gerada."}
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections, connections, models, transaction
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from . import logs, metricas
+from .models import Job
+from .replica import replica
+
+logger = logging.getLogger(__name__)
+
+_cfg = getattr(settings, "JOBS", {})
+MODO = _cfg.get("MODO", "worker")
+DIR = Path(_cfg.get("DIR", Path(settings.BASE_DIR) / "media" / "jobs"))
+THREADS = _cfg.get("THREADS", 2)
+RETENCAO_DIAS = _cfg.get("RETENCAO_DIAS", 7)
+INTERVALO_PROGRESSO = 0.5  # segundos entre gravações de progresso
+INTERVALO_HEARTBEAT = 60  # segundos entre renovações do heartbeat dos jobs em andamento
+ORFAO_APOS = timedelta(minutes=10)  # RODANDO sem heartbeat há mais que isso = worker morreu
+
+_REGISTRO: dict[str, "Tarefa"] = {}
+_descoberto = False
+
+DURACAO = metricas.Histograma("mca_job_duration_seconds", "Duração dos jobs por tarefa e desfecho.",
+                              ("tarefa", "status"), baldes=(1, 5, 15, 30, 60, 120, 300, 900, 1800, 3600))
+
+
+def _jobs_por_status():
+    contagem = dict(Job.objects.filter(status__in=("PENDENTE", "RODANDO"))
+                    .values_list("status").annotate(n=models.Count("id")))
+    return [({"status": s}, contagem.get(s, 0)) for s in ("PENDENTE", "RODANDO")]
+
+
+def _espera_mais_antigo():
+    criado = Job.objects.filter(status="PENDENTE").order_by("id").values_list("created_at", flat=True).first()
+    return (timezone.now() - criado).total_seconds() if criado else 0
+
+
+metricas.Medidor("mca_jobs", "Jobs na fila e rodando.", _jobs_por_status, ("status",))
+metricas.Medidor("mca_jobs_espera_seconds", "Há quanto tempo o job pendente mais antigo espera.",
+                 _espera_mais_antigo)
+
+
+class Cancelado(Exception):
+    """Levantada em `Execucao.progresso` quando o usuário cancelou o job."""
+
+
+@dataclass(frozen=True)
+class Tarefa:
+    nome: str
+    func: Callable[..., dict]
+    titulo: str
+    replica: bool = False  # leituras na réplica de relatórios (mca/replica.py)
+    validador: Optional[Callable] = None  # (**params) -> condicional.Validador dos dados exportados
+
+
+def tarefa(nome: str, *, titulo: str, replica: bool = False, validador: Optional[Callable] = None):
+    def deco(func):
+        _REGISTRO[nome] = Tarefa(nome=nome, func=func, titulo=titulo, replica=replica, validador=validador)
+        return func
+    return deco
+
+
+def _validador(t: Tarefa, params: dict) -> str:
+    """Assinatura de (tarefa, parâmetros, dados); "" se a tarefa não declara validador."""
+    if t.validador is None:
+        return ""
+    try:
+        etag = t.validador(**params).etag
+    except Exception:
+        logger.warning("falha ao calcular validador", extra={"tarefa": t.nome}, exc_info=True)
+        return ""
+    return hashlib.blake2b(repr((t.nome, sorted(params.items()), etag)).encode(), digest_size=16).hexdigest()
+
+
+def obter(nome: str) -> Optional[Tarefa]:
+    global _descoberto
+    if not _descoberto:
+        autodiscover_modules("jobs")
+        _descoberto = True
+    return _REGISTRO.get(nome)
+
+
+# ---------------- Execução ----------------
+
+class Execucao:
+    """O que a função da tarefa recebe: progresso/cancelamento e arquivo de saída."""
+
+    def __init__(self, job: Optional[Job] = None):
+        self.job = job
+        self.arquivo: Optional[tuple[str, bytes]] = None  # sem job (benchmark): fica em memória
+        self._gravado_em = 0.0
+
+    def progresso(self, feitos: int, total: Optional[int] = None, mensagem: str = "") -> None:
+        if self.job is None:
+            return
+        agora = time.monotonic()
+        if agora - self._gravado_em < INTERVALO_PROGRESSO and not mensagem:
+            return
+        self._gravado_em = agora
+        campos = {"progresso": feitos, "heartbeat": timezone.now()}
+        if total is not None:
+            campos["total"] = total
+        if mensagem:
+            campos["mensagem"] = mensagem[:255]
+        Job.objects.filter(pk=self.job.pk).update(**campos)
+        if Job.objects.filter(pk=self.job.pk, cancelar=True).exists():
+            raise Cancelado()
+
+    def salvar_arquivo(self, nome: str, conteudo: bytes) -> None:
+        if self.job is None:
+            self.arquivo = (nome, conteudo)
+            return
+        relativo = Path(str(self.job.pk)) / Path(nome).name
+        destino = DIR / relativo
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        destino.write_bytes(conteudo)
+        self.job.arquivo = str(relativo)
+        Job.objects.filter(pk=self.job.pk).update(arquivo=self.job.arquivo)
+
+
+def executar_agora(nome: str, **params) -> tuple[dict, Execucao]:
+    """Roda a tarefa sem job nem fila (benchmark, shell). Devolve (resultado, execução)."""
+    t = obter(nome)
+    if t is None:
+        raise KeyError(nome)
+    ex = Execucao()
+    with replica() if t.replica else nullcontext():
+        return t.func(ex, **params) or {}, ex
+
+
+def executar(job: Job) -> Job:
+    """Roda um job já reivindicado (status RODANDO) e grava o desfecho."""
+    ex = Execucao(job)
+    t = obter(job.tipo)
+    params = dict(job.parametros or {})
+    if job.entrada:
+        params["entrada"] = str(DIR / job.entrada)
+    campos = {}
+    inicio = time.monotonic()
+    try:
+        _batimentos.incluir(job.pk)
+        if t is None:
+            raise LookupError(f"Tarefa desconhecida: {job.tipo}")
+        with replica() if t.replica else nullcontext(), logs.contexto(job=job.pk, tarefa=job.tipo):
+            if t.validador is not None:
+                # calculado antes de gerar, no mesmo banco que a tarefa lê (réplica):
+                # se algo mudar durante a exportação, a próxima não reaproveita esta
+                campos["validador"] = _validador(t, dict(job.parametros or {}))
+            resultado = t.func(ex, **params) or {}
+    except Cancelado:
+        campos.update(status="CANCELADO", mensagem="Cancelado a pedido do usuário.")
+    except Exception as e:
+        logger.exception("job falhou", extra={"job": job.pk, "tarefa": job.tipo})
+        texto = "; ".join(e.messages) if isinstance(e, ValidationError) else str(e)
+        campos.update(status="FALHOU", mensagem=texto[:255] or type(e).__name__,
+                      erro=traceback.format_exc())
+    else:
+        campos.update(status="CONCLUIDO", mensagem=str(resultado.get("mensagem", "Concluído."))[:255],
+                      resultado=resultado)
+    finally:
+        _batimentos.remover(job.pk)
+        if job.entrada:
+            (DIR / job.entrada).unlink(missing_ok=True)
+    campos["terminado_em"] = timezone.now()
+    Job.objects.filter(pk=job.pk).update(**campos)
+    DURACAO.observar(time.monotonic() - inicio, tarefa=job.tipo, status=campos["status"])
+    job.refresh_from_db()
+    return job
+
+
+# ---------------- Fila ----------------
+
+def enfileirar(nome: str, *, params: Optional[dict] = None, usuario=None, entrada=None,
+               voltar_para: str = "") -> Job:
+    """
+    Cria o job e despacha conforme `JOBS["MODO"]`. `entrada` é um arquivo
+    enviado (UploadedFile), salvo em disco para o worker ler depois.
+    """
+    t = obter(nome)
+    if t is None:
+        raise KeyError(f"Tarefa não registrada: {nome}")
+    if entrada is None and t.validador is not None:
+        anterior = _reaproveitavel(t, params or {}, usuario)
+        if anterior is not None:
+            logger.info("exportação reaproveitada", extra={"job": anterior.pk, "tarefa": nome})
+            return anterior
+    job = Job(tipo=nome, titulo=t.titulo, parametros=params or {}, voltar_para=voltar_para,
+              usuario=usuario if getattr(usuario, "is_authenticated", False) else None)
+    if entrada is not None:
+        relativo = Path("entrada") / f"{uuid.uuid4().hex}{Path(entrada.name).suffix}"
+        destino = DIR / relativo
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        with open(destino, "wb") as fh:
+            for pedaco in entrada.chunks():
+                fh.write(pedaco)
+        job.entrada = str(relativo)
+    job.save()
+
+    if MODO == "sincrono":
+        transaction.on_commit(lambda: _processar(job.pk))
+    elif MODO == "thread":
+        transaction.on_commit(lambda: _pool().submit(_processar_em_thread, job.pk))
+    return job
+
+
+def _reaproveitavel(t: Tarefa, params: dict, usuario) -> Optional[Job]:
+    """Último job concluído do usuário com os mesmos filtros e dados, com o arquivo ainda no disco."""
+    validador = _validador(t, params)
+    if not validador or not getattr(usuario, "is_authenticated", False):
+        return None
+    anterior = (Job.objects.filter(tipo=t.nome, validador=validador, status="CONCLUIDO", usuario=usuario)
+                .exclude(arquivo="").order_by("-id").first())
+    if anterior is None or caminho_arquivo(anterior) is None:
+        return None
+    return anterior
+
+
+def nome_worker() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"[:80]
+
+
+def _marcar_rodando(qs, worker: str) -> bool:
+    agora = timezone.now()
+    return bool(qs.filter(status="PENDENTE").update(
+        status="RODANDO", worker=worker, iniciado_em=agora, heartbeat=agora,
+    ))
+
+
+def reivindicar(worker: str = "") -> Optional[Job]:
+    """Pega o próximo job pendente. O UPDATE condicional garante um dono só."""
+    worker = worker or nome_worker()
+    for pk in Job.objects.filter(status="PENDENTE").order_by("id").values_list("pk", flat=True)[:10]:
+        if _marcar_rodando(Job.objects.filter(pk=pk), worker):
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def _processar(pk: int) -> Optional[Job]:
+    if not _marcar_rodando(Job.objects.filter(pk=pk), nome_worker()):
+        return None  # cancelado antes de começar, ou outro worker pegou
+    return executar(Job.objects.get(pk=pk))
+
+
+def _processar_em_thread(pk: int) -> None:
+    close_old_connections()
+    try:
+        _processar(pk)
+    except Exception:  # pragma: no cover - executar já registra falhas da tarefa
+        logger.exception("falha ao processar job", extra={"job": pk})
+    finally:
+        connections.close_all()
+
+
+_pool_exec: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _pool_exec
+    with _pool_lock:
+        if _pool_exec is None:
+            recuperar_orfaos()
+            _pool_exec = ThreadPoolExecutor(max_workers=THREADS, thread_name_prefix="mca-job")
+        return _pool_exec
+
+
+def cancelar(job: Job) -> bool:
+    """Pendente: cancela na hora. Rodando: pede e a tarefa para no próximo progresso."""
+    agora = timezone.now()
+    if Job.objects.filter(pk=job.pk, status="PENDENTE").update(
+            status="CANCELADO", mensagem="Cancelado antes de começar.", terminado_em=agora):
+        return True
+    return bool(Job.objects.filter(pk=job.pk, status="RODANDO").update(cancelar=True))
+
+
+def manter_vivos(pks) -> None:
+    if pks:
+        Job.objects.filter(pk__in=list(pks), status="RODANDO").update(heartbeat=timezone.now())
+
+
+class _Batimentos:
+    """
+    Heartbeat dos jobs que este processo está rodando, numa thread própria
+    (criada no primeiro job): a tarefa pode ficar minutos sem `progresso`.
+    """
+
+    def __init__(self):
+        self._pks: set[int] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def incluir(self, pk: int) -> None:
+        with self._lock:
+            self._pks.add(pk)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._rodar, name="mca-job-heartbeat", daemon=True)
+                self._thread.start()
+
+    def remover(self, pk: int) -> None:
+        with self._lock:
+            self._pks.discard(pk)
+
+    def _rodar(self) -> None:
+        while True:
+            time.sleep(INTERVALO_HEARTBEAT)
+            with self._lock:
+                pks = list(self._pks)
+            if not pks:
+                continue
+            try:
+                manter_vivos(pks)
+            except Exception:
+                logger.warning("heartbeat dos jobs falhou", extra={"jobs": pks}, exc_info=True)
+            finally:
+                connections.close_all()  # conexões são por thread; esta dorme um minuto
+
+
+_batimentos = _Batimentos()
+
+
+def recuperar_orfaos() -> int:
+    """
+    Jobs RODANDO sem heartbeat recente: o processo que os rodava morreu.
+    Um job vivo tem o heartbeat renovado a cada INTERVALO_HEARTBEAT (`_Batimentos`),
+    por mais longo que seja.
+    """
+    limite = timezone.now() - ORFAO_APOS
+    return Job.objects.filter(status="RODANDO", heartbeat__lt=limite).update(
+        status="FALHOU", mensagem="Interrompido (o worker parou no meio).", terminado_em=timezone.now(),
+    )
+
+
+def limpar(dias: Optional[int] = None) -> int:
+    """Apaga jobs terminados há mais de `dias` (padrão RETENCAO_DIAS) e seus arquivos."""
+    limite = timezone.now() - timedelta(days=RETENCAO_DIAS if dias is None else dias)
+    velhos = list(Job.objects.filter(status__in=("CONCLUIDO", "FALHOU", "CANCELADO"),
+                                     terminado_em__lt=limite).values_list("pk", flat=True))
+    for pk in velhos:
+        shutil.rmtree(DIR / str(pk), ignore_errors=True)
+    Job.objects.filter(pk__in=velhos).delete()
+    return len(velhos)
+
+
+def caminho_arquivo(job: Job) -> Optional[Path]:
+    if not job.arquivo:
+        return None
+    caminho = (DIR / job.arquivo).resolve()
+    if DIR.resolve() not in caminho.parents or not caminho.is_file():
+        return None
+    return caminho
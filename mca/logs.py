@@ -0,0 +1,192 @@
+# mca/logs.py
+"""
+Logging estruturado, amostrado e fora da thread do request.
+
+Antes, middleware, services e signals faziam `print()` síncrono no stdout
+(inclusive um `print('Erro')` a cada request de professor): tempo perdido
+sob carga e nada pesquisável. Agora:
+
+- `FilaHandler` (QueueHandler) só enfileira o registro; um `QueueListener`
+  numa thread própria formata e escreve (stderr ou `MCA_LOG_ARQUIVO`);
+- cada linha é um JSON (`JsonFormatter`) com `request_id`, usuário, método
+  e caminho do request atual, mais os campos passados em `extra=`;
+- `RequestIdMiddleware` define o id (aceita `X-Request-ID` de um proxy) e o
+  devolve no header da resposta; fora de request (jobs, comandos)
+  `contexto(job=...)` anota os registros do trecho;
+- `Amostragem` descarta parte dos eventos de alto volume abaixo de WARNING,
+  por logger (`LOGS["AMOSTRAGEM"]`) ou por evento (`extra={"amostra": 0.1}`).
+  A decisão usa o request_id: um request amostrado aparece inteiro.
+
+    logger = logging.getLogger(__name__)
+    logger.info("matrícula criada", extra={"matricula_id": m.id, "turma_id": t.id})
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from typing import Optional
+
+_contexto: ContextVar[dict] = ContextVar("mca_log_contexto", default={})
+
+# atributos que todo LogRecord tem; o resto veio de `extra=`
+_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "amostra"}
+
+
+# ---------------- Contexto (request / job) ----------------
+
+def anotar(**campos) -> None:
+    """Acrescenta campos ao contexto atual (ex.: usuário depois da autenticação)."""
+    _contexto.set({**_contexto.get(), **campos})
+
+
+@contextmanager
+def contexto(**campos):
+    token = _contexto.set({**_contexto.get(), **campos})
+    try:
+        yield
+    finally:
+        _contexto.reset(token)
+
+
+def request_id() -> Optional[str]:
+    return _contexto.get().get("request_id")
+
+
+class RequestIdMiddleware:
+    """Primeiro da lista: todo log do request (inclusive de outros middlewares) leva o id."""
+    HEADER = "HTTP_X_REQUEST_ID"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rid = (request.META.get(self.HEADER) or "")[:64] or uuid.uuid4().hex[:16]
+        request.request_id = rid
+        with contexto(request_id=rid, metodo=request.method, caminho=request.path):
+            response = self.get_response(request)
+        response["X-Request-ID"] = rid
+        return response
+
+
+# ---------------- Filtros (rodam na thread de quem loga) ----------------
+
+class Contexto(logging.Filter):
+    def filter(self, record):
+        for k, v in _contexto.get().items():
+            if not hasattr(record, k):
+                setattr(record, k, v)
+        return True
+
+
+class Amostragem(logging.Filter):
+    def __init__(self, taxas: Optional[dict] = None):
+        super().__init__()
+        self.taxas = taxas or {}
+
+    def _taxa(self, record) -> float:
+        taxa = getattr(record, "amostra", None)
+        if taxa is not None:
+            return taxa
+        nome = record.name
+        while nome:
+            if nome in self.taxas:
+                return self.taxas[nome]
+            nome = nome.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        taxa = self._taxa(record)
+        if taxa >= 1:
+            return True
+        rid = _contexto.get().get("request_id")
+        sorteio = (zlib.crc32(rid.encode()) % 10000) / 10000 if rid else random.random()
+        if sorteio < taxa:
+            record.amostra = taxa  # quem lê sabe que 1 linha vale ~1/taxa
+            return True
+        return False
+
+
+# ---------------- Formatação (roda na thread do listener) ----------------
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        dados = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for k, v in vars(record).items():
+            if k not in _PADRAO:
+                dados[k] = v
+        if getattr(record, "amostra", None) is not None:
+            dados["amostra"] = record.amostra
+        if record.exc_text:
+            dados["exc"] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+# ---------------- Handler com fila ----------------
+
+class FilaHandler(QueueHandler):
+    """
+    Handler usado no LOGGING: enfileira e volta. O listener (uma thread por
+    processo, iniciada no primeiro log) escreve em stderr ou em `arquivo`.
+    """
+    _listener: Optional[QueueListener] = None
+    _lock = threading.Lock()
+
+    def __init__(self, arquivo: Optional[str] = None, tamanho_fila: int = 10000):
+        super().__init__(queue.Queue(tamanho_fila))
+        destino = WatchedFileHandler(arquivo, encoding="utf-8") if arquivo else logging.StreamHandler(sys.stderr)
+        destino.setFormatter(JsonFormatter())
+        self.destino = destino
+        self.descartados = 0
+
+    def _iniciar(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = QueueListener(self.queue, self.destino, respect_handler_level=False)
+                self._listener.start()
+                atexit.register(self.parar)
+
+    def parar(self):
+        with self._lock:
+            if self._listener is not None:
+                self._listener.stop()  # escoa o que ainda está na fila
+                self._listener = None
+
+    def prepare(self, record):
+        # guarda a mensagem já interpolada e o traceback em texto (o record
+        # atravessa a thread); os campos de `extra` seguem como atributos
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.destino.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if self._listener is None:
+            self._iniciar()
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            # fila cheia: descarta em vez de travar o request
+            self.descartados += 1
+        except Exception:
+            self.handleError(record)
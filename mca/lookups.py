@@ -0,0 +1,121 @@
+# mca/lookups.py
+"""
+Selects "remotos": opções carregadas sob demanda via JSON paginado.
+
+Antes, os formulários (financeiro, turmas, clientes) despejavam tabelas
+inteiras (clientes, funcionários, turmas...) em <select>, e a página
+crescia junto com a base. Agora:
+
+- cada app registra seus lookups em `<app>/lookups.py` (descobertos como o
+  admin faz) com `registrar(nome, queryset=..., busca=..., rotulo=...)`;
+- `GET /lookups/<nome>/?q=&page=` devolve `{"results": [{id, text}], "more"}`
+  (sem COUNT: busca `por_pagina + 1` linhas para saber se há mais);
+- `GET /lookups/<nome>/?ids=1,2` resolve rótulos de valores já escolhidos;
+- `RemoteSelect` renderiza só a opção selecionada (1 consulta para os
+  valores iniciais) e o static/js/remote-select.js faz a busca no navegador.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from django import forms
+from django.urls import reverse
+from django.utils.module_loading import autodiscover_modules
+
+POR_PAGINA = 20
+
+_REGISTRO: dict[str, "Lookup"] = {}
+_descoberto = False
+
+
+@dataclass(frozen=True)
+class Lookup:
+    nome: str
+    queryset: Callable[[], object]                 # () -> QuerySet base (já ordenado)
+    busca: Callable[[object, str], object]         # (qs, termo) -> qs filtrado
+    rotulo: Callable[[object], str] = str          # obj -> texto da opção
+    permissao: Optional[Callable[[object], bool]] = None  # user -> bool (padrão: diretor)
+    referencia: Optional[str] = None               # rótulos via mca.referencias (sem consulta)
+
+
+def registrar(nome: str, *, queryset, busca, rotulo=str, permissao=None, referencia=None) -> Lookup:
+    lk = Lookup(nome=nome, queryset=queryset, busca=busca, rotulo=rotulo,
+                permissao=permissao, referencia=referencia)
+    _REGISTRO[nome] = lk
+    return lk
+
+
+def obter(nome: str) -> Optional[Lookup]:
+    global _descoberto
+    if not _descoberto:
+        autodiscover_modules("lookups")
+        _descoberto = True
+    return _REGISTRO.get(nome)
+
+
+def pode_usar(lk: Lookup, user) -> bool:
+    if lk.permissao is not None:
+        return lk.permissao(user)
+    from .roles import is_diretor
+    return is_diretor(user)
+
+
+def pesquisar(lk: Lookup, termo: str = "", page: int = 1,
+              por_pagina: int = POR_PAGINA) -> tuple[list[dict], bool]:
+    qs = lk.queryset()
+    termo = (termo or "").strip()
+    if termo:
+        qs = lk.busca(qs, termo)
+    inicio = (max(1, page) - 1) * por_pagina
+    linhas = list(qs[inicio:inicio + por_pagina + 1])
+    mais = len(linhas) > por_pagina
+    return [{"id": o.pk, "text": lk.rotulo(o)} for o in linhas[:por_pagina]], mais
+
+
+def rotulos(lk: Lookup, ids: Iterable) -> dict[str, str]:
+    """Rótulos dos ids informados, numa única consulta (ou nenhuma). Chaves como str."""
+    limpos = {str(i) for i in ids if str(i).isdigit()}
+    if not limpos:
+        return {}
+    out = {}
+    if lk.referencia:
+        from . import referencias
+        out = {str(o.pk): lk.rotulo(o) for o in referencias.instancias(lk.referencia, limpos)}
+        limpos -= out.keys()
+        if not limpos:
+            return out
+    out.update({str(o.pk): lk.rotulo(o) for o in lk.queryset().filter(pk__in=limpos)})
+    return out
+
+
+# ---------------- Widget ----------------
+
+class RemoteSelect(forms.Select):
+    """
+    <select> que renderiza apenas o(s) valor(es) selecionado(s) + opção vazia.
+    As demais opções vêm do endpoint /lookups/<nome>/ via remote-select.js.
+
+    Use em ModelChoiceField: o queryset do campo continua validando o POST,
+    mas nunca é iterado para montar as opções.
+    """
+    def __init__(self, lookup: str, attrs=None, placeholder: str = "--"):
+        super().__init__(attrs)
+        self.lookup = lookup
+        self.placeholder = placeholder
+
+    def get_context(self, name, value, attrs):
+        attrs = dict(attrs or {})
+        attrs["data-remote-url"] = reverse("lookup", args=[self.lookup])
+        attrs.setdefault("data-placeholder", self.placeholder)
+        return super().get_context(name, value, attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        valores = [str(v) for v in (value or []) if v not in (None, "")]
+        opcoes = [self.create_option(name, "", self.placeholder, not valores, 0)]
+        lk = obter(self.lookup)
+        textos = rotulos(lk, valores) if (lk and valores) else {}
+        for i, v in enumerate(valores, start=1):
+            if v in textos:
+                opcoes.append(self.create_option(name, v, textos[v], True, i))
+        return [(None, opcoes, 0)]
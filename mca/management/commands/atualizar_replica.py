@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mca import replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Atualiza a réplica de relatórios (alias 'reports') a partir do default "
+        "com a API de backup online do SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--a-cada", type=int, default=0,
+                            help="repete a cada N segundos (0 = uma vez)")
+
+    def handle(self, *args, **opts):
+        if not replica.configurada():
+            raise CommandError("Banco 'reports' não configurado em DATABASES.")
+        while True:
+            try:
+                info = replica.atualizar()
+            except RuntimeError as e:
+                raise CommandError(str(e))
+            self.stdout.write(
+                f"Réplica atualizada: {info['arquivo']} ({info['bytes'] / 1e6:.1f} MB em {info['segundos']}s)"
+            )
+            if not opts["a_cada"]:
+                return
+            time.sleep(opts["a_cada"])
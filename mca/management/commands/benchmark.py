@@ -0,0 +1,78 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from mca import benchmark as bm
+from mca.dataset import gerar_dataset
+
+from .gerar_dataset import adicionar_argumentos, parametros_de
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede os caminhos quentes (listas, cobranças, pagamentos, presenças, "
+        "importações e exportações). Por padrão cria um banco de teste "
+        "descartável e popula com gerar_dataset."
+    )
+
+    def add_arguments(self, parser):
+        adicionar_argumentos(parser)
+        parser.add_argument("--usar-banco-atual", action="store_true",
+                            help="não cria banco de teste; mede a base configurada (nada é gravado)")
+        parser.add_argument("--repeticoes", type=int, default=3)
+        parser.add_argument("--filtro", default="", help="roda só casos cujo grupo/nome contém o texto")
+        parser.add_argument("--linhas-importacao", type=int, default=200)
+        parser.add_argument("--json", dest="saida_json", help="salva o relatório neste arquivo")
+        parser.add_argument("--comparar", help="relatório JSON anterior para comparação")
+        parser.add_argument("--tolerancia", type=float, default=0.2,
+                            help="regressão de tempo aceita (0.2 = 20%%)")
+
+    def handle(self, *args, **opts):
+        base_json = None
+        if opts["comparar"]:
+            base_json = Path(opts["comparar"]).read_text(encoding="utf-8")
+
+        # ALLOWED_HOSTS com 'testserver' e e-mail em memória (nada sai do processo)
+        setup_test_environment()
+        nome_teste = None
+        params = None
+        if not opts["usar_banco_atual"]:
+            nome_teste = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            params = parametros_de(opts)
+            inicio = time.perf_counter()
+            resumo = gerar_dataset(params)
+            self.stdout.write(f"Dataset ({time.perf_counter() - inicio:.1f}s): {resumo}")
+
+        try:
+            # tudo (inclusive o usuário do benchmark) é desfeito no final
+            with transaction.atomic():
+                ctx = bm.preparar_contexto(linhas_importacao=opts["linhas_importacao"])
+                if base_json is None:
+                    self.stdout.write(bm.cabecalho())
+                resultados = bm.rodar(
+                    ctx, repeticoes=opts["repeticoes"], filtro=opts["filtro"],
+                    log=self.stdout.write if base_json is None else None,
+                )
+                transaction.set_rollback(True)
+        finally:
+            if nome_teste:
+                connection.creation.destroy_test_db(nome_teste, verbosity=0)
+            teardown_test_environment()
+
+        meta = bm.metadados({
+            "repeticoes": opts["repeticoes"],
+            "dataset": vars(params) if params else "banco atual",
+        })
+        if opts["saida_json"]:
+            Path(opts["saida_json"]).write_text(bm.para_json(resultados, meta), encoding="utf-8")
+            self.stdout.write(f"Relatório salvo em {opts['saida_json']}")
+
+        if base_json is not None:
+            linhas, regressoes = bm.comparar(resultados, base_json, opts["tolerancia"])
+            self.stdout.write("\n".join(linhas))
+            if regressoes:
+                raise CommandError(f"{len(regressoes)} caso(s) regrediram: {', '.join(regressoes)}")
+            self.stdout.write(self.style.SUCCESS("Sem regressões."))
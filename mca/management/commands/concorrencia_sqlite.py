@@ -0,0 +1,155 @@
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from mca import escrita
+from mca.sqlite.base import PRAGMAS_PADRAO
+
+ALIAS = "concorrencia"
+
+
+class Command(BaseCommand):
+    help = (
+        "Harness de concorrência do SQLite com threads: leitores e escritores "
+        "interativos disputando o banco com uma rotina em lote. Usa um arquivo "
+        "temporário (a base configurada não é tocada) e mede latência e erros "
+        "'database is locked'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--leitores", type=int, default=4)
+        parser.add_argument("--escritores", type=int, default=2)
+        parser.add_argument("--itens", type=int, default=2000, help="linhas gravadas pela rotina em lote")
+        parser.add_argument("--trabalho-ms", type=float, default=1.0,
+                            help="custo simulado por item do lote (ms)")
+        parser.add_argument("--modo", choices=["lotes", "unica"], default="lotes",
+                            help="lotes = mca.escrita.em_lotes; unica = um transaction.atomic só (antigo)")
+        parser.add_argument("--tamanho", type=int, help="itens por lote (padrão: ESCRITA_EM_LOTES)")
+        parser.add_argument("--pausa", type=float, help="pausa entre lotes em s (padrão: ESCRITA_EM_LOTES)")
+        parser.add_argument("--sem-pragmas", action="store_true",
+                            help="journal DELETE, transação DEFERRED e sem PRAGMAs (comportamento antigo)")
+
+    def handle(self, *args, **opts):
+        if connections["default"].vendor != "sqlite":
+            raise CommandError("O harness é específico do SQLite.")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            self._registrar_banco(Path(tmp) / "concorrencia.sqlite3", opts["sem_pragmas"])
+            try:
+                relatorio = self._rodar(opts)
+            finally:
+                connections[ALIAS].close()
+                del connections.settings[ALIAS]
+
+        self.stdout.write(
+            f"modo={opts['modo']} pragmas={'não' if opts['sem_pragmas'] else 'sim'} "
+            f"lote={relatorio['lote_s']:.2f}s"
+        )
+        self.stdout.write(f"{'operação':<12} {'ops':>7} {'erros':>6} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8}")
+        for nome in ("leitura", "escrita"):
+            lat, erros = relatorio[nome], relatorio[f"erros_{nome}"]
+            self.stdout.write(
+                f"{nome:<12} {len(lat):>7} {erros:>6} {_pct(lat, 50):>8.1f} {_pct(lat, 95):>8.1f} "
+                f"{(max(lat) if lat else 0):>8.1f}"
+            )
+        if relatorio["erro_lote"]:
+            self.stdout.write(self.style.ERROR(f"rotina em lote falhou: {relatorio['erro_lote']}"))
+
+    # ---------------- Banco temporário ----------------
+
+    def _registrar_banco(self, caminho: Path, sem_pragmas: bool):
+        cfg = dict(connections["default"].settings_dict)
+        options = dict(cfg.get("OPTIONS") or {})
+        if sem_pragmas:
+            options.pop("transaction_mode", None)
+            options["pragmas"] = {k: None for k in PRAGMAS_PADRAO} | {"journal_mode": "DELETE"}
+        cfg.update(NAME=str(caminho), OPTIONS=options, CONN_MAX_AGE=0)
+        connections.settings[ALIAS] = cfg
+        with connections[ALIAS].cursor() as cur:
+            cur.execute("CREATE TABLE registro (id INTEGER PRIMARY KEY, origem TEXT NOT NULL, valor INTEGER)")
+
+    # ---------------- Carga ----------------
+
+    def _rodar(self, opts) -> dict:
+        parar = threading.Event()
+        rel = {"leitura": [], "escrita": [], "erros_leitura": 0, "erros_escrita": 0,
+               "lote_s": 0.0, "erro_lote": ""}
+        trava = threading.Lock()
+
+        def medir(nome, func):
+            inicio = time.perf_counter()
+            try:
+                func()
+            except OperationalError:
+                with trava:
+                    rel[f"erros_{nome}"] += 1
+                return
+            with trava:
+                rel[nome].append((time.perf_counter() - inicio) * 1000)
+
+        def ler():
+            with connections[ALIAS].cursor() as cur:
+                cur.execute("SELECT COUNT(*), MAX(id) FROM registro")
+                cur.fetchone()
+
+        def gravar():
+            with transaction.atomic(using=ALIAS), connections[ALIAS].cursor() as cur:
+                cur.execute("INSERT INTO registro (origem, valor) VALUES ('interativo', 1)")
+
+        def laço(nome, func, intervalo):
+            try:
+                while not parar.is_set():
+                    medir(nome, func)
+                    time.sleep(intervalo)
+            finally:
+                connections[ALIAS].close()
+
+        trabalho = opts["trabalho_ms"] / 1000
+
+        def gravar_lote(itens):
+            with connections[ALIAS].cursor() as cur:
+                for i in itens:
+                    time.sleep(trabalho)
+                    cur.execute("INSERT INTO registro (origem, valor) VALUES ('lote', %s)", [i])
+
+        def lote():
+            inicio = time.perf_counter()
+            try:
+                if opts["modo"] == "lotes":
+                    escrita.em_lotes(range(opts["itens"]), gravar_lote, using=ALIAS,
+                                     tamanho=opts["tamanho"], pausa=opts["pausa"])
+                else:
+                    with transaction.atomic(using=ALIAS):
+                        gravar_lote(range(opts["itens"]))
+            except OperationalError as e:
+                rel["erro_lote"] = str(e)
+            finally:
+                rel["lote_s"] = time.perf_counter() - inicio
+                connections[ALIAS].close()
+
+        threads = [threading.Thread(target=laço, args=("leitura", ler, 0.002)) for _ in range(opts["leitores"])]
+        threads += [threading.Thread(target=laço, args=("escrita", gravar, 0.01)) for _ in range(opts["escritores"])]
+        for t in threads:
+            t.start()
+        time.sleep(0.2)  # carga interativa já rodando quando o lote começa
+        worker = threading.Thread(target=lote)
+        worker.start()
+        worker.join()
+        time.sleep(0.2)
+        parar.set()
+        for t in threads:
+            t.join()
+        return rel
+
+
+def _pct(valores, p) -> float:
+    if not valores:
+        return 0.0
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100)[p - 1]
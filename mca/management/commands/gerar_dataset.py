@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from mca.dataset import ParametrosDataset, gerar_dataset
+
+# presets de escala (sobrescritos pelos argumentos individuais)
+ESCALAS = {
+    "pequena": dict(condominios=5, professores=10, clientes=500),
+    "media": dict(condominios=20, professores=30, clientes=3000),
+    "grande": dict(condominios=80, professores=120, clientes=15000),
+}
+
+
+def adicionar_argumentos(parser):
+    parser.add_argument("--escala", choices=sorted(ESCALAS), default="media")
+    parser.add_argument("--condominios", type=int)
+    parser.add_argument("--modalidades-por-condominio", type=int)
+    parser.add_argument("--professores", type=int)
+    parser.add_argument("--turmas-por-modalidade", type=int)
+    parser.add_argument("--clientes", type=int)
+    parser.add_argument("--matriculas-por-cliente", type=float)
+    parser.add_argument("--meses", type=int, help="meses de presenças/lançamentos (a partir de janeiro)")
+    parser.add_argument("--ano", type=int, help="ano dos dados (padrão: ano corrente)")
+    parser.add_argument("--semente", type=int)
+
+
+def parametros_de(opts) -> ParametrosDataset:
+    valores = dict(ESCALAS[opts["escala"]])
+    for campo in ParametrosDataset.__dataclass_fields__:
+        if opts.get(campo) is not None:
+            valores[campo] = opts[campo]
+    return ParametrosDataset(**valores)
+
+
+class Command(BaseCommand):
+    help = "Gera uma base sintética grande (bulk_create) no banco configurado."
+
+    def add_arguments(self, parser):
+        adicionar_argumentos(parser)
+
+    def handle(self, *args, **opts):
+        params = parametros_de(opts)
+        self.stdout.write(f"Gerando dataset: {params}")
+        resumo = gerar_dataset(params, log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"Dataset gerado: {resumo}"))
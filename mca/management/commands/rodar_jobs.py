@@ -0,0 +1,76 @@
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from mca import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker da fila de jobs (mca/jobs.py): pega jobs pendentes e roda num pool "
+        "de threads. Vários workers podem rodar ao mesmo tempo (cada job tem um dono só)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=jobs.THREADS, help="jobs simultâneos")
+        parser.add_argument("--intervalo", type=float, default=1.0, help="espera entre consultas à fila (s)")
+        parser.add_argument("--uma-vez", action="store_true", help="esvazia a fila e sai")
+        parser.add_argument("--limpar", action="store_true",
+                            help="só apaga jobs terminados há mais de JOBS['RETENCAO_DIAS'] e sai")
+
+    def handle(self, *args, **opts):
+        if opts["threads"] < 1:
+            raise CommandError("--threads precisa ser >= 1.")
+        if opts["limpar"]:
+            self.stdout.write(f"{jobs.limpar()} job(s) antigo(s) apagado(s).")
+            return
+
+        parar = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: parar.set())
+
+        orfaos = jobs.recuperar_orfaos()
+        if orfaos:
+            self.stdout.write(self.style.WARNING(f"{orfaos} job(s) órfão(s) marcados como falha."))
+        self.stdout.write(f"worker {jobs.nome_worker()} com {opts['threads']} thread(s).")
+
+        ativos = {}  # future -> pk
+        limpo_em = 0.0
+        with ThreadPoolExecutor(max_workers=opts["threads"], thread_name_prefix="mca-job") as pool:
+            while not parar.is_set():
+                for fut in [f for f in ativos if f.done()]:
+                    job = fut.result()
+                    self.stdout.write(f"job {job.pk} ({job.tipo}): {job.status} — {job.mensagem}")
+                    del ativos[fut]
+
+                close_old_connections()
+                while len(ativos) < opts["threads"]:
+                    job = jobs.reivindicar()
+                    if job is None:
+                        break
+                    self.stdout.write(f"job {job.pk} ({job.tipo}) iniciado.")
+                    ativos[pool.submit(_rodar, job)] = job.pk
+                # heartbeat: a thread de jobs._batimentos, enquanto executar() roda
+
+                if time.monotonic() - limpo_em > 3600:
+                    jobs.limpar()
+                    limpo_em = time.monotonic()
+
+                if opts["uma_vez"] and not ativos:
+                    break
+                parar.wait(opts["intervalo"])
+
+            if ativos:
+                self.stdout.write("aguardando jobs em andamento...")
+        connections.close_all()
+
+
+def _rodar(job):
+    try:
+        return jobs.executar(job)
+    finally:
+        connections.close_all()  # conexões são por thread
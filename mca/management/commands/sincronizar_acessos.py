@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from funcionarios import acessos
+
+
+class Command(BaseCommand):
+    help = (
+        "Recoloca todos os funcionários com usuário no grupo de acesso do "
+        "cargo/regime (funcionarios/acessos.py). Rode depois de mudar a regra "
+        "de papéis; quem já está certo não é alterado."
+    )
+
+    def handle(self, *args, **opts):
+        rel = acessos.sincronizar_todos()
+        self.stdout.write(f"{rel['funcionarios']} funcionários verificados, {rel['alterados']} com grupos corrigidos.")
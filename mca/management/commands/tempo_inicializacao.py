@@ -0,0 +1,95 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# roda num interpretador novo: o processo do manage.py já fez o setup
+SCRIPT = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import django
+django.setup()
+t1 = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+t2 = time.perf_counter()
+print(json.dumps({
+    "setup_ms": (t1 - t0) * 1000,
+    "urls_ms": (t2 - t1) * 1000,
+    "modulos": sorted(sys.modules),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o boot de um processo (django.setup() e carga do URLconf) em "
+        "interpretadores novos e falha se a mediana passar do orçamento ou se "
+        "dependências pesadas (INICIALIZACAO['PROIBIDOS']) forem importadas no boot."
+    )
+
+    def add_arguments(self, parser):
+        cfg = getattr(settings, "INICIALIZACAO", {})
+        parser.add_argument("--repeticoes", type=int, default=5)
+        parser.add_argument("--orcamento-ms", type=float, default=cfg.get("ORCAMENTO_MS", 900),
+                            help="mediana máxima de setup + URLconf (ms)")
+        parser.add_argument("--top", type=int, default=15,
+                            help="mostra os N imports mais caros (python -X importtime)")
+
+    def handle(self, *args, **opts):
+        proibidos = getattr(settings, "INICIALIZACAO", {}).get("PROIBIDOS", [])
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "mca.settings")}
+
+        medidas, importtime = [], ""
+        for _ in range(max(1, opts["repeticoes"])):
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", SCRIPT],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                raise CommandError(f"Falha no boot:\n{proc.stderr[-2000:]}")
+            medidas.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            importtime = proc.stderr
+
+        setup = statistics.median(m["setup_ms"] for m in medidas)
+        urls = statistics.median(m["urls_ms"] for m in medidas)
+        total = statistics.median(m["setup_ms"] + m["urls_ms"] for m in medidas)
+        self.stdout.write(
+            f"django.setup() {setup:.0f} ms | URLconf {urls:.0f} ms | total {total:.0f} ms "
+            f"(mediana de {len(medidas)}; orçamento {opts['orcamento_ms']:.0f} ms)"
+        )
+
+        if opts["top"]:
+            self.stdout.write(f"\n{'acumulado ms':>12} {'próprio ms':>10}  módulo")
+            for proprio, acumulado, nome in _mais_caros(importtime, opts["top"]):
+                self.stdout.write(f"{acumulado / 1000:>12.1f} {proprio / 1000:>10.1f}  {nome}")
+
+        carregados = set(medidas[-1]["modulos"])
+        indevidos = [p for p in proibidos if p in carregados]
+        erros = []
+        if indevidos:
+            erros.append(f"importados no boot (deveriam ser sob demanda): {', '.join(indevidos)}")
+        if total > opts["orcamento_ms"]:
+            erros.append(f"boot de {total:.0f} ms acima do orçamento de {opts['orcamento_ms']:.0f} ms")
+        if erros:
+            raise CommandError("; ".join(erros))
+        self.stdout.write(self.style.SUCCESS("OK"))
+
+
+def _mais_caros(saida: str, n: int) -> list[tuple[int, int, str]]:
+    """Imports de primeiro nível do boot, por tempo acumulado: (próprio µs, acumulado µs, módulo)."""
+    out = []
+    for linha in saida.splitlines():
+        partes = linha.split("|")
+        if len(partes) != 3 or not partes[0].startswith("import time:"):
+            continue
+        proprio, acumulado = partes[0].split(":", 1)[1].strip(), partes[1].strip()
+        nome = partes[2][1:]  # um espaço fixo + dois por nível de aninhamento
+        if proprio.isdigit() and not nome.startswith(" "):
+            out.append((int(proprio), int(acumulado), nome))
+    out.sort(key=lambda x: -x[1])
+    return out[:n]
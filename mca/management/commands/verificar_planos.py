@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from mca import planos
+
+
+class Command(BaseCommand):
+    help = (
+        "Roda EXPLAIN QUERY PLAN nas consultas quentes (mca/planos.py) e falha "
+        "se alguma voltar a varrer a tabela inteira. Por padrão usa um banco de "
+        "teste descartável (só o schema das migrações)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--usar-banco-atual", action="store_true",
+                            help="explica contra a base configurada (EXPLAIN não grava nada)")
+        parser.add_argument("--filtro", default="", help="só consultas cujo nome contém o texto")
+        parser.add_argument("--mostrar", action="store_true", help="imprime o plano de todas as consultas")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "sqlite":
+            raise CommandError("verificar_planos só interpreta planos do SQLite.")
+
+        nome_teste = None
+        if not opts["usar_banco_atual"]:
+            nome_teste = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            resultados = planos.verificar(filtro=opts["filtro"])
+        finally:
+            if nome_teste:
+                connection.creation.destroy_test_db(nome_teste, verbosity=0)
+
+        falhas = []
+        for p in resultados:
+            if p.ok:
+                self.stdout.write(f"  ok    {p.nome}")
+            else:
+                falhas.append(p.nome)
+                motivo = p.erro or f"varredura completa em {', '.join(p.varreduras)}"
+                self.stdout.write(self.style.ERROR(f"  FALHA {p.nome}: {motivo}"))
+            if opts["mostrar"] or not p.ok:
+                for linha in p.linhas:
+                    self.stdout.write(f"          {linha}")
+
+        if falhas:
+            raise CommandError(f"{len(falhas)} consulta(s) sem índice: {', '.join(falhas)}")
+        self.stdout.write(self.style.SUCCESS(f"{len(resultados)} planos sem varredura completa."))
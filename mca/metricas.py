@@ -0,0 +1,385 @@
+# mca/metricas.py
+"""
+Métricas da aplicação no formato texto do Prometheus (`/metrics`).
+
+Não havia telemetria nenhuma. Agora os módulos declaram as métricas que
+interessam e o `/metrics` expõe o total de todos os processos:
+
+    COBRANCAS = metricas.Contador("mca_cobrancas_geradas_total", "Lançamentos gerados", ("origem",))
+    COBRANCAS.inc(criados, origem="global")
+
+    RENDER = metricas.Histograma("mca_template_render_seconds", "Renderização", ("template",))
+    with RENDER.cronometrar(template=nome):
+        ...
+
+- `Contador` e `Histograma` só somam num dict do processo (sob um lock):
+  poucos microssegundos no caminho do request;
+- uma thread por processo (iniciada na primeira medição) grava os
+  incrementos a cada `METRICAS["INTERVALO"]` num SQLite local
+  (`METRICAS["ARQUIVO"]`), com UPSERT; assim os vários workers do
+  gunicorn e o `rodar_jobs` somam no mesmo lugar;
+- `Medidor` é um gauge calculado na hora da coleta (ex.: jobs na fila);
+- instrumentação pronta: latência por view, consultas/tempo de SQL
+  (`MetricasMiddleware` + wrapper instalado em toda conexão) e
+  renderização de templates (`TemplatesMedidos`, backend do TEMPLATES).
+
+Quem pode ler o `/metrics`: o header `Authorization: Bearer <METRICAS["TOKEN"]>`,
+superusuário logado ou IPs de `METRICAS["IPS"]`. A lista de IPs é vazia por
+padrão: atrás de um proxy reverso na mesma máquina o `REMOTE_ADDR` de todo
+request é 127.0.0.1, então liberar o loopback abriria o `/metrics` para
+qualquer um. Só configure IPs quando o scraper chega direto no app.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+_cfg = getattr(settings, "METRICAS", {})
+ATIVO = _cfg.get("ATIVO", True)
+ARQUIVO = Path(_cfg.get("ARQUIVO", Path(settings.BASE_DIR) / "media" / "metricas.sqlite3"))
+INTERVALO = _cfg.get("INTERVALO", 10)  # segundos entre gravações no arquivo
+TOKEN = _cfg.get("TOKEN", "")
+IPS = set(_cfg.get("IPS", ()))
+
+BALDES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_familias: dict[str, "_Familia"] = {}
+_pendente: dict[tuple, float] = {}  # (métrica, valores dos rótulos, campo) -> incremento
+_lock = threading.Lock()
+_gravador: Optional[threading.Thread] = None
+
+
+# ---------------- Métricas ----------------
+
+class _Familia:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Iterable[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        _familias[nome] = self
+
+    def _chave(self, rotulos: dict) -> tuple:
+        return tuple(str(rotulos.get(r, "")) for r in self.rotulos)
+
+
+def _somar(itens) -> None:
+    if not ATIVO:
+        return
+    with _lock:
+        for k, v in itens:
+            _pendente[k] = _pendente.get(k, 0) + v
+    if _gravador is None:
+        _iniciar_gravador()
+
+
+class Contador(_Familia):
+    tipo = "counter"
+
+    def inc(self, valor: float = 1, **rotulos) -> None:
+        if valor:
+            _somar((((self.nome, self._chave(rotulos), ""), valor),))
+
+
+class Histograma(_Familia):
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Iterable[str] = (),
+                 baldes: Iterable[float] = BALDES_SEGUNDOS):
+        super().__init__(nome, ajuda, rotulos)
+        self.baldes = tuple(sorted(baldes))
+        self._les = tuple(_numero(b) for b in self.baldes) + ("+Inf",)
+
+    def observar(self, valor: float, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        le = self._les[bisect_left(self.baldes, valor)]  # le é inclusivo: valor <= balde
+        _somar((
+            ((self.nome, chave, le), 1),
+            ((self.nome, chave, "sum"), valor),
+            ((self.nome, chave, "count"), 1),
+        ))
+
+    @contextmanager
+    def cronometrar(self, **rotulos):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **rotulos)
+
+
+class Medidor(_Familia):
+    """
+    Gauge calculado na coleta. `funcao()` devolve um número ou uma lista de
+    (rótulos: dict, valor). Não passa pelo arquivo: cada coleta lê a fonte.
+    """
+    tipo = "gauge"
+
+    def __init__(self, nome: str, ajuda: str, funcao: Callable, rotulos: Iterable[str] = ()):
+        super().__init__(nome, ajuda, rotulos)
+        self.funcao = funcao
+
+    def valores(self) -> list[tuple[dict, float]]:
+        v = self.funcao()
+        return [({}, v)] if isinstance(v, (int, float)) else list(v)
+
+
+# ---------------- Arquivo compartilhado ----------------
+
+def _conectar() -> sqlite3.Connection:
+    ARQUIVO.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(ARQUIVO, timeout=5)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS familias ("
+        " nome TEXT PRIMARY KEY, tipo TEXT NOT NULL, ajuda TEXT NOT NULL, baldes TEXT NOT NULL DEFAULT '')"
+    )
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS series ("
+        " nome TEXT NOT NULL, rotulos TEXT NOT NULL, campo TEXT NOT NULL, valor REAL NOT NULL,"
+        " PRIMARY KEY (nome, rotulos, campo))"
+    )
+    return con
+
+
+def gravar() -> int:
+    """Passa os incrementos deste processo para o arquivo. Devolve quantas séries."""
+    with _lock:
+        if not _pendente:
+            return 0
+        lote = dict(_pendente)
+        _pendente.clear()
+
+    series, nomes = [], set()
+    for (nome, valores, campo), valor in lote.items():
+        fam = _familias[nome]
+        series.append((nome, json.dumps(dict(zip(fam.rotulos, valores))), campo, valor))
+        nomes.add(nome)
+    try:
+        con = _conectar()
+        try:
+            with con:
+                con.executemany(
+                    "INSERT INTO familias (nome, tipo, ajuda, baldes) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (nome) DO UPDATE SET tipo = excluded.tipo, ajuda = excluded.ajuda,"
+                    " baldes = excluded.baldes",
+                    [(n, _familias[n].tipo, _familias[n].ajuda,
+                      json.dumps(getattr(_familias[n], "_les", ()))) for n in nomes],
+                )
+                con.executemany(
+                    "INSERT INTO series (nome, rotulos, campo, valor) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (nome, rotulos, campo) DO UPDATE SET valor = valor + excluded.valor",
+                    series,
+                )
+        finally:
+            con.close()
+    except sqlite3.Error:
+        # arquivo ocupado/indisponível: devolve para a próxima rodada
+        logger.warning("falha ao gravar métricas", exc_info=True)
+        with _lock:
+            for k, v in lote.items():
+                _pendente[k] = _pendente.get(k, 0) + v
+        return 0
+    return len(series)
+
+
+def _laco_gravador():
+    while True:
+        time.sleep(INTERVALO)
+        gravar()
+
+
+def _iniciar_gravador():
+    global _gravador
+    with _lock:
+        if _gravador is None:
+            _gravador = threading.Thread(target=_laco_gravador, name="mca-metricas", daemon=True)
+            _gravador.start()
+
+
+def _depois_do_fork():
+    # o filho herda o dict (seria contado duas vezes) mas não a thread
+    global _gravador, _lock
+    _lock = threading.Lock()
+    _pendente.clear()
+    _gravador = None
+
+
+os.register_at_fork(after_in_child=_depois_do_fork)
+atexit.register(gravar)
+
+
+# ---------------- Exposição ----------------
+
+def _numero(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+def _escapar(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _rotulos(d: dict) -> str:
+    if not d:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in d.items()) + "}"
+
+
+def texto() -> str:
+    """Todas as métricas (todos os processos) no formato de exposição do Prometheus."""
+    gravar()
+    con = _conectar()
+    try:
+        familias = {n: (t, a, json.loads(b) if b else []) for n, t, a, b in
+                    con.execute("SELECT nome, tipo, ajuda, baldes FROM familias")}
+        series = defaultdict(lambda: defaultdict(dict))
+        for nome, rotulos, campo, valor in con.execute("SELECT nome, rotulos, campo, valor FROM series"):
+            series[nome][rotulos][campo] = valor
+    finally:
+        con.close()
+
+    linhas = []
+    for nome in sorted(familias):
+        tipo, ajuda, les = familias[nome]
+        linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} {tipo}"]
+        for rotulos, campos in sorted(series[nome].items()):
+            base = json.loads(rotulos)
+            if tipo != "histogram":
+                linhas.append(f"{nome}{_rotulos(base)} {_numero(campos.get('', 0))}")
+                continue
+            acumulado = 0
+            for le in les:
+                acumulado += campos.get(le, 0)
+                linhas.append(f"{nome}_bucket{_rotulos({**base, 'le': le})} {_numero(acumulado)}")
+            linhas.append(f"{nome}_sum{_rotulos(base)} {_numero(campos.get('sum', 0))}")
+            linhas.append(f"{nome}_count{_rotulos(base)} {_numero(campos.get('count', 0))}")
+
+    for fam in sorted((f for f in _familias.values() if isinstance(f, Medidor)), key=lambda f: f.nome):
+        try:
+            valores = fam.valores()
+        except Exception:
+            logger.warning("falha ao calcular métrica", extra={"metrica": fam.nome}, exc_info=True)
+            continue
+        linhas += [f"# HELP {fam.nome} {fam.ajuda}", f"# TYPE {fam.nome} gauge"]
+        linhas += [f"{fam.nome}{_rotulos(r)} {_numero(v)}" for r, v in valores]
+    return "\n".join(linhas) + "\n"
+
+
+def autorizado(request) -> bool:
+    auth = request.META.get("HTTP_AUTHORIZATION", "")
+    if TOKEN and auth == f"Bearer {TOKEN}":
+        return True
+    if request.META.get("REMOTE_ADDR") in IPS:
+        return True
+    return bool(getattr(request.user, "is_superuser", False))
+
+
+# ---------------- Instrumentação: requests e SQL ----------------
+
+REQUESTS = Histograma("mca_http_request_duration_seconds", "Latência dos requests por view.",
+                      ("view", "metodo"))
+RESPOSTAS = Contador("mca_http_responses_total", "Respostas por view e status.", ("view", "metodo", "status"))
+SQL_REQUEST = Contador("mca_http_db_queries_total", "Consultas SQL feitas pelos requests, por view.", ("view",))
+SQL_REQUEST_SEGUNDOS = Contador("mca_http_db_seconds_total", "Tempo de SQL dos requests, por view.", ("view",))
+SQL = Histograma("mca_db_query_duration_seconds", "Duração das consultas SQL (requests, jobs e comandos).",
+                 ("banco",), baldes=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+
+# [consultas, segundos] do request atual (None fora de request)
+_sql_do_request: ContextVar[Optional[list]] = ContextVar("mca_metricas_sql", default=None)
+
+
+class _MedirSql:
+    """execute_wrapper fixo em cada conexão (instalado no connection_created)."""
+
+    def __init__(self, alias: str):
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracao = time.perf_counter() - inicio
+            SQL.observar(duracao, banco=self.alias)
+            acum = _sql_do_request.get()
+            if acum is not None:
+                acum[0] += 1
+                acum[1] += duracao
+
+
+def _instalar_sql(sender, connection, **kwargs):
+    if ATIVO and not any(isinstance(w, _MedirSql) for w in connection.execute_wrappers):
+        connection.execute_wrappers.append(_MedirSql(connection.alias))
+
+
+connection_created.connect(_instalar_sql, dispatch_uid="mca.metricas.sql")
+
+
+class MetricasMiddleware:
+    """Logo depois do RequestIdMiddleware: mede o request inteiro."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        token = _sql_do_request.set([0, 0.0])
+        try:
+            response = self.get_response(request)
+        finally:
+            consultas, segundos = _sql_do_request.get()
+            _sql_do_request.reset(token)
+        duracao = time.perf_counter() - inicio
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "<sem_rota>"
+        REQUESTS.observar(duracao, view=view, metodo=request.method)
+        RESPOSTAS.inc(view=view, metodo=request.method, status=response.status_code)
+        SQL_REQUEST.inc(consultas, view=view)
+        SQL_REQUEST_SEGUNDOS.inc(segundos, view=view)
+        return response
+
+
+# ---------------- Instrumentação: templates ----------------
+
+RENDER = Histograma("mca_template_render_seconds", "Renderização de templates (página inteira).", ("template",))
+
+
+class _TemplateMedido:
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, nome):
+        return getattr(self._template, nome)
+
+    def render(self, context=None, request=None):
+        with RENDER.cronometrar(template=self._template.origin.template_name or "<string>"):
+            return self._template.render(context, request)
+
+
+class TemplatesMedidos(DjangoTemplates):
+    """DjangoTemplates que mede o `render` dos templates carregados por ele."""
+
+    def from_string(self, template_code):
+        return _TemplateMedido(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TemplateMedido(super().get_template(template_name))
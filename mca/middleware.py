@@ -1,7 +1,15 @@
 # core/middleware.py
+import logging
+
+from django.middleware.gzip import GZipMiddleware
 from django.shortcuts import redirect
 from django.urls import reverse
 
+from . import logs
+from .roles import papel_do_usuario
+
+logger = logging.getLogger(__name__)
+
 class ProfessorRestrictionMiddleware:
     """
     Impede professores de acessarem rotas fora das turmas.
@@ -14,9 +22,13 @@ class ProfessorRestrictionMiddleware:
 
         # Só aplica a usuários autenticados
         if user.is_authenticated:
+            # papel resolvido uma vez por request (cacheado); views e templates reaproveitam
+            papel = papel_do_usuario(user)
+            request.papel = papel
+            logs.anotar(usuario=user.pk)
+
             # Checa se é professor (e não superuser)
-            if user.groups.filter(name='Professor').exists() and not user.is_superuser:
-                print('Erro')
+            if papel.is_professor and not papel.is_superuser:
                 # Libera apenas caminhos permitidos
                 allowed_prefixes = [
                     '/turmas',           # todas as rotas de turmas
@@ -28,6 +40,24 @@ class ProfessorRestrictionMiddleware:
 
                 # Se a rota não for permitida
                 if not any(request.path.startswith(p) for p in allowed_prefixes):
+                    # alto volume (todo clique do professor fora de /turmas): amostrado
+                    logger.info("professor redirecionado para turmas", extra={"destino": request.path})
                     return redirect(reverse('turmas:list'))
 
         return self.get_response(request)
+
+
+class CompressaoMiddleware(GZipMiddleware):
+    """
+    GZip só para texto (HTML das listas, JSON dos lookups/status de job,
+    /metrics). Planilhas (.xlsx já é zip) e downloads passam direto.
+    O token CSRF das páginas é mascarado a cada resposta (mitiga BREACH).
+    """
+    TIPOS = ("text/html", "application/json", "text/plain", "text/css", "text/javascript",
+             "application/javascript")
+
+    def process_response(self, request, response):
+        tipo = response.get("Content-Type", "").split(";", 1)[0].strip()
+        if tipo not in self.TIPOS:
+            return response
+        return super().process_response(request, response)
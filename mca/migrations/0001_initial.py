@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:31
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=60)),
+                ('titulo', models.CharField(max_length=120)),
+                ('status', models.CharField(choices=[('PENDENTE', 'Na fila'), ('RODANDO', 'Em andamento'), ('CONCLUIDO', 'Concluído'), ('FALHOU', 'Falhou'), ('CANCELADO', 'Cancelado')], default='PENDENTE', max_length=10)),
+                ('parametros', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('entrada', models.CharField(blank=True, max_length=255)),
+                ('arquivo', models.CharField(blank=True, max_length=255)),
+                ('progresso', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(blank=True, null=True)),
+                ('mensagem', models.CharField(blank=True, max_length=255)),
+                ('resultado', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('erro', models.TextField(blank=True)),
+                ('cancelar', models.BooleanField(default=False)),
+                ('voltar_para', models.CharField(blank=True, max_length=255)),
+                ('worker', models.CharField(blank=True, max_length=80)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True)),
+                ('terminado_em', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-id'],
+                'indexes': [models.Index(condition=models.Q(('status', 'PENDENTE')), fields=['id'], name='mca_job_fila_idx')],
+            },
+        ),
+    ]
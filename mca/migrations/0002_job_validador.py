@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mca', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='validador',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# mca/models.py
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.urls import reverse
+
+JOB_STATUS_CHOICES = (
+    ("PENDENTE", "Na fila"),
+    ("RODANDO", "Em andamento"),
+    ("CONCLUIDO", "Concluído"),
+    ("FALHOU", "Falhou"),
+    ("CANCELADO", "Cancelado"),
+)
+JOB_TERMINADOS = ("CONCLUIDO", "FALHOU", "CANCELADO")
+
+
+class Job(models.Model):
+    """Tarefa em segundo plano (mca/jobs.py): importação, exportação, geradores."""
+    tipo = models.CharField(max_length=60)  # nome registrado com @tarefa
+    titulo = models.CharField(max_length=120)
+    status = models.CharField(max_length=10, choices=JOB_STATUS_CHOICES, default="PENDENTE")
+    parametros = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+
+    # caminhos relativos a settings.JOBS["DIR"]
+    entrada = models.CharField(max_length=255, blank=True)   # planilha enviada
+    arquivo = models.CharField(max_length=255, blank=True)   # resultado para download
+
+    progresso = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    mensagem = models.CharField(max_length=255, blank=True)
+    resultado = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    erro = models.TextField(blank=True)
+    cancelar = models.BooleanField(default=False)  # pedido de cancelamento (job rodando)
+    voltar_para = models.CharField(max_length=255, blank=True)
+    validador = models.CharField(max_length=32, blank=True)  # exportações: dados + filtros (mca/condicional.py)
+
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True,
+                                on_delete=models.SET_NULL, related_name="jobs")
+    worker = models.CharField(max_length=80, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    terminado_em = models.DateTimeField(null=True, blank=True)
+    heartbeat = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+        indexes = [
+            # fila: próximos pendentes por ordem de chegada
+            models.Index(fields=["id"], name="mca_job_fila_idx", condition=models.Q(status="PENDENTE")),
+        ]
+
+    def __str__(self):
+        return f"{self.titulo} #{self.pk} ({self.get_status_display()})"
+
+    def get_absolute_url(self):
+        return reverse("job_detalhe", args=[self.pk])
+
+    @property
+    def terminado(self) -> bool:
+        return self.status in JOB_TERMINADOS
+
+    @property
+    def percentual(self):
+        if self.status == "CONCLUIDO":
+            return 100
+        if not self.total:
+            return None
+        return min(100, int(self.progresso * 100 / self.total))
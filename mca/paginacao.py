@@ -0,0 +1,289 @@
+# mca/paginacao.py
+"""
+Paginação por cursor (keyset) para as listas grandes.
+
+O `Paginator` do Django faz um `COUNT(*)` sobre o queryset filtrado (com
+os JOINs e agregações da listagem) e depois `OFFSET n`, que varre e
+descarta as n linhas anteriores: a página 500 custa 500x a página 1.
+
+Aqui a página é definida pela chave de ordenação da última (ou primeira)
+linha exibida: `WHERE (vencimento, id) < (:v, :id) ORDER BY ... LIMIT 21`.
+Qualquer página custa o mesmo que a primeira (com índice na ordenação).
+
+- o cursor é opaco na URL (`?cursor=...`) e carrega o número da página,
+  só para exibição;
+- o total é opcional: "exato" (COUNT a cada request), "estimado" (COUNT
+  guardado no cache por alguns minutos, por conjunto de filtros) ou None;
+- os campos da ordenação não podem ser nulos e a ordenação deve terminar
+  num campo único (o `id` é acrescentado se faltar).
+
+    pagina = paginar_cursor(qs, request.GET.get("cursor"))
+    pagina.object_list, pagina.next_cursor, pagina.total
+
+`paginar_duas_fases` separa a busca da página (só ids, sem JOINs) da
+hidratação dos objetos exibidos.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+import math
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Callable, Iterable, Optional
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Q
+
+POR_PAGINA = 20
+TOTAL_TTL = 60 * 5  # segundos (modo "estimado")
+
+ULTIMA = "ultima"
+
+
+class CursorInvalido(ValueError):
+    """Cursor malformado ou de outra ordenação: a view volta para a 1ª página."""
+
+
+@dataclass
+class PaginaCursor:
+    object_list: list
+    number: Optional[int]
+    por_pagina: int
+    has_next: bool = False
+    has_previous: bool = False
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+    last_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_estimado: bool = False
+    ordem: tuple = field(default_factory=tuple)
+
+    @property
+    def num_pages(self) -> Optional[int]:
+        if self.total is None:
+            return None
+        return max(1, math.ceil(self.total / self.por_pagina))
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+# ---------------- Ordenação ----------------
+
+def _normalizar_ordem(qs, ordem) -> tuple:
+    ordem = tuple(ordem or qs.query.order_by or qs.model._meta.ordering or ())
+    ordem = tuple("id" if o == "pk" else "-id" if o == "-pk" else o for o in ordem)
+    if not any(o.lstrip("-") == "id" for o in ordem):
+        ordem += ("id",)
+    for o in ordem:
+        if not isinstance(o, str) or o.startswith("?"):
+            raise ValueError(f"Ordenação não suportada no cursor: {o!r}")
+    return ordem
+
+
+def _campo(model, caminho: str):
+    partes = caminho.split("__")
+    for parte in partes[:-1]:
+        model = model._meta.get_field(parte).related_model
+    return model._meta.get_field(partes[-1])
+
+
+def _valor(obj, caminho: str):
+    for parte in caminho.split("__"):
+        obj = getattr(obj, parte)
+    return obj
+
+
+def _inverter(ordem: tuple) -> tuple:
+    return tuple(o[1:] if o.startswith("-") else "-" + o for o in ordem)
+
+
+def _filtro_apos(ordem: tuple, valores: list) -> Q:
+    """
+    Linhas depois de `valores` na `ordem` (comparação lexicográfica):
+    (a > va) OR (a = va AND b > vb) OR ...
+    """
+    cond = Q()
+    iguais = {}
+    for o, v in zip(ordem, valores):
+        nome = o.lstrip("-")
+        op = "lt" if o.startswith("-") else "gt"
+        cond |= Q(**iguais, **{f"{nome}__{op}": v})
+        iguais[nome] = v
+    return cond
+
+
+# ---------------- Cursor (token) ----------------
+
+def _serializar(v):
+    if isinstance(v, (datetime, date, time)):
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return str(v)
+    return v
+
+
+def _codificar(numero: Optional[int], direcao: str, valores: list) -> str:
+    bruto = json.dumps({"n": numero, "d": direcao, "v": [_serializar(v) for v in valores]},
+                       separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+
+def _decodificar(token: str, model, ordem: tuple) -> tuple[Optional[int], str, list]:
+    try:
+        bruto = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        dados = json.loads(bruto)
+        numero, direcao, valores = dados.get("n"), dados["d"], dados["v"]
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError) as e:
+        raise CursorInvalido(str(e)) from e
+    if direcao not in ("f", "b") or not isinstance(valores, list) or len(valores) != len(ordem):
+        raise CursorInvalido("cursor não corresponde à ordenação")
+    try:
+        valores = [_campo(model, o.lstrip("-")).to_python(v) for o, v in zip(ordem, valores)]
+    except Exception as e:
+        raise CursorInvalido(str(e)) from e
+    if not isinstance(numero, int) or numero < 1:
+        numero = None
+    return numero, direcao, valores
+
+
+# ---------------- Total ----------------
+
+def contar(qs, modo: Optional[str] = "estimado") -> tuple[Optional[int], bool]:
+    """(total, estimado?) — modo "exato", "estimado" (COUNT em cache) ou None."""
+    if not modo:
+        return None, False
+    if modo == "exato":
+        return qs.count(), False
+    try:
+        sql, params = qs.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0, False
+    chave = "paginacao:total:" + hashlib.md5(f"{sql}|{params!r}".encode()).hexdigest()
+    total = cache.get(chave)
+    if total is None:
+        total = qs.count()
+        cache.set(chave, total, TOTAL_TTL)
+        return total, False
+    return total, True
+
+
+# ---------------- Paginação ----------------
+
+def _buscar(base, por_pagina: int, campos: list, hidratar) -> tuple[list, list, bool]:
+    """(objetos, chaves de ordenação, tem_mais) de uma fatia `por_pagina + 1`."""
+    if hidratar is None:
+        linhas = list(base[:por_pagina + 1])
+        tem_mais = len(linhas) > por_pagina
+        linhas = linhas[:por_pagina]
+        return linhas, [[_valor(o, c) for c in campos] for o in linhas], tem_mais
+
+    # fase 1: só id + chave de ordenação (sem JOINs de exibição nem agregados)
+    chaves = list(base.values_list("pk", *campos)[:por_pagina + 1])
+    tem_mais = len(chaves) > por_pagina
+    chaves = chaves[:por_pagina]
+    ids = [c[0] for c in chaves]
+    # fase 2: hidrata só esses ids, na ordem da fase 1
+    mapa = {o.pk: o for o in hidratar(ids)} if ids else {}
+    pares = [(mapa[c[0]], list(c[1:])) for c in chaves if c[0] in mapa]
+    return [o for o, _ in pares], [k for _, k in pares], tem_mais
+
+
+def paginar_cursor(qs, cursor: Optional[str] = None, *, ordem=None,
+                   por_pagina: int = POR_PAGINA, total: Optional[str] = "estimado",
+                   hidratar: Optional[Callable[[list], Iterable]] = None) -> PaginaCursor:
+    """
+    Uma página de `qs` a partir de `cursor` (None = primeira página,
+    "ultima" = última). Cursor inválido volta para a primeira página.
+
+    Com `hidratar(ids)`, a página é montada em duas fases: `qs` (enxuto)
+    devolve só ids + chave; `hidratar` carrega os objetos completos.
+    """
+    ordem = _normalizar_ordem(qs, ordem)
+    campos = [o.lstrip("-") for o in ordem]
+    qs = qs.order_by(*ordem)
+
+    numero, direcao, valores = 1, "f", None
+    if cursor == ULTIMA:
+        direcao = "u"
+    elif cursor:
+        try:
+            numero, direcao, valores = _decodificar(cursor, qs.model, ordem)
+        except CursorInvalido:
+            numero, direcao, valores = 1, "f", None
+
+    qtd, estimado = contar(qs, total)
+
+    if direcao == "f":
+        base = qs.filter(_filtro_apos(ordem, valores)) if valores is not None else qs
+        linhas, chaves, tem_mais = _buscar(base, por_pagina, campos, hidratar)
+        has_next, has_previous = tem_mais, valores is not None
+    else:
+        inv = _inverter(ordem)
+        base = qs.order_by(*inv)
+        if valores is not None:
+            base = base.filter(_filtro_apos(inv, valores))
+        linhas, chaves, tem_mais = _buscar(base, por_pagina, campos, hidratar)
+        linhas, chaves = linhas[::-1], chaves[::-1]
+        has_next, has_previous = valores is not None, tem_mais
+        if direcao == "u":
+            numero = math.ceil(qtd / por_pagina) if qtd else None
+
+    if numero is not None and not has_previous:
+        numero = 1
+
+    def _prox(n):
+        return n + 1 if n else None
+
+    def _ant(n):
+        return n - 1 if n and n > 1 else None
+
+    pagina = PaginaCursor(
+        object_list=linhas,
+        number=numero,
+        por_pagina=por_pagina,
+        has_next=has_next and bool(linhas),
+        has_previous=has_previous and bool(linhas),
+        total=qtd,
+        total_estimado=estimado,
+        ordem=ordem,
+    )
+    if pagina.has_next:
+        pagina.next_cursor = _codificar(_prox(numero), "f", chaves[-1])
+        pagina.last_cursor = ULTIMA
+    if pagina.has_previous:
+        pagina.previous_cursor = _codificar(_ant(numero), "b", chaves[0])
+    return pagina
+
+
+def paginar_duas_fases(qs, cursor: Optional[str] = None, *, hidratar=None, **kwargs) -> PaginaCursor:
+    """
+    `paginar_cursor` em duas fases para querysets "pesados" (select_related,
+    anotações): a fase 1 roda `qs` sem os JOINs de exibição e só com
+    id + chave de ordenação (anotações não agregadas ficam de fora do
+    SELECT); a fase 2 reaplica `qs` completo apenas aos ids da página.
+
+    Anotações agregadas (Sum/Count com JOIN) forçam GROUP BY também na fase
+    1 — troque-as por Subquery, como em financeiro.services.buscar_lancamentos.
+    """
+    if hidratar is None:
+        def hidratar(ids):
+            return qs.order_by().filter(pk__in=ids)
+    return paginar_cursor(qs.select_related(None), cursor, hidratar=hidratar, **kwargs)
+
+
+def querystring_filtros(request) -> tuple[str, str]:
+    """(base_qs, suffix) dos filtros atuais, sem `cursor`/`page`, para os links do pager."""
+    qd = request.GET.copy()
+    qd.pop("cursor", None)
+    qd.pop("page", None)
+    base_qs = qd.urlencode()
+    return base_qs, (f"&{base_qs}" if base_qs else "")
@@ -0,0 +1,269 @@
+# mca/perfil.py
+"""
+Profiler por request, sob demanda, com os perfis guardados em disco.
+
+Não dava para ver onde o tempo ia nas views de produção. Agora o
+`ProfilerMiddleware` captura, para o request escolhido:
+
+- um cProfile da view (arquivo `.prof`, abre no snakeviz / pstats);
+- a linha do tempo do SQL (início, duração, SQL e origem no código de cada
+  consulta, via `InspetorConsultas`);
+- pilhas "dobradas" (`.folded`, uma linha `a;b;c <µs>` por pilha) prontas
+  para flamegraph.pl / speedscope, por amostragem da pilha da thread do
+  request (`Amostrador`, a cada `INTERVALO_AMOSTRA`).
+
+Quem é perfilado:
+
+- superusuário que pede: header `X-Perfil: 1` ou `?_perfil=1` (qualquer view);
+- amostragem aleatória (`PERFIL["AMOSTRA"]`, padrão 0) nas views de
+  `PERFIL["VIEWS"]` (lista de turmas, financeiro, presença, home).
+
+Os perfis ficam em `PERFIL["DIR"]`, com teto de quantidade e idade; a página
+`/admin/perfis/` (só superusuário) lista os requests mais lentos.
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+from . import logs
+from .query_budget import InspetorConsultas
+
+_cfg = getattr(settings, "PERFIL", {})
+AMOSTRA = _cfg.get("AMOSTRA", 0.0)
+DIR = Path(_cfg.get("DIR", Path(settings.BASE_DIR) / "media" / "perfis"))
+MAX_PERFIS = _cfg.get("MAX_PERFIS", 200)
+RETENCAO_DIAS = _cfg.get("RETENCAO_DIAS", 7)
+VIEWS = set(_cfg.get("VIEWS", ()))
+PARAMETRO = _cfg.get("PARAMETRO", "_perfil")
+HEADER = "HTTP_" + _cfg.get("HEADER", "X-Perfil").upper().replace("-", "_")
+
+INTERVALO_AMOSTRA = _cfg.get("INTERVALO_AMOSTRA", 0.001)  # s, para as pilhas dobradas
+
+
+# ---------------- Middleware ----------------
+
+class ProfilerMiddleware:
+    """Depois do AuthenticationMiddleware (precisa de request.user)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _motivo(self, request) -> Optional[str]:
+        pedido = request.META.get(HEADER) == "1" or request.GET.get(PARAMETRO) == "1"
+        if pedido and getattr(request.user, "is_superuser", False):
+            return "pedido"
+        if AMOSTRA and random.random() < AMOSTRA and self._view(request) in VIEWS:
+            return "amostra"
+        return None
+
+    @staticmethod
+    def _view(request) -> str:
+        try:
+            return resolve(request.path_info).view_name
+        except Resolver404:
+            return ""
+
+    def __call__(self, request):
+        motivo = self._motivo(request)
+        if motivo is None:
+            return self.get_response(request)
+
+        prof = cProfile.Profile()
+        amostrador = Amostrador(threading.get_ident())
+        inicio = time.perf_counter()
+        with InspetorConsultas() as insp:
+            amostrador.start()
+            prof.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                prof.disable()
+                pilhas = amostrador.parar()
+        duracao = time.perf_counter() - inicio
+
+        perfil_id = salvar(request, response, prof, insp, pilhas,
+                           inicio=inicio, duracao=duracao, motivo=motivo)
+        response["X-Perfil-Id"] = perfil_id
+        return response
+
+
+# ---------------- Gravação ----------------
+
+def salvar(request, response, prof: cProfile.Profile, insp: InspetorConsultas, pilhas: list[str], *,
+           inicio: float, duracao: float, motivo: str) -> str:
+    agora = timezone.now()
+    perfil_id = f"{agora:%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+    DIR.mkdir(parents=True, exist_ok=True)
+
+    prof.dump_stats(DIR / f"{perfil_id}.prof")
+    (DIR / f"{perfil_id}.folded").write_text("\n".join(pilhas), encoding="utf-8")
+
+    match = getattr(request, "resolver_match", None)
+    meta = {
+        "id": perfil_id,
+        "em": agora.isoformat(),
+        "metodo": request.method,
+        "caminho": request.get_full_path(),
+        "view": match.view_name if match else "",
+        "status": response.status_code,
+        "duracao_ms": round(duracao * 1000, 2),
+        "sql_total": insp.total,
+        "sql_ms": round(insp.tempo_total * 1000, 2),
+        "usuario": getattr(request.user, "username", "") if hasattr(request, "user") else "",
+        "request_id": logs.request_id() or "",
+        "motivo": motivo,
+        "sql": [
+            {
+                "inicio_ms": round((c.inicio - inicio) * 1000, 2),
+                "duracao_ms": round(c.duracao * 1000, 3),
+                "sql": c.sql,
+                "origem": c.origem,
+            }
+            for c in insp.consultas
+        ],
+    }
+    (DIR / f"{perfil_id}.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    podar()
+    return perfil_id
+
+
+def podar() -> int:
+    """Aplica o teto de quantidade (MAX_PERFIS) e de idade (RETENCAO_DIAS)."""
+    metas = sorted(DIR.glob("*.json"), key=lambda p: p.name, reverse=True)  # id começa pela data
+    limite = (timezone.now() - timedelta(days=RETENCAO_DIAS)).strftime("%Y%m%d%H%M%S")
+    removidos = 0
+    for i, meta in enumerate(metas):
+        if i >= MAX_PERFIS or meta.stem[:14] < limite:
+            for ext in (".json", ".prof", ".folded"):
+                meta.with_suffix(ext).unlink(missing_ok=True)
+            removidos += 1
+    return removidos
+
+
+# ---------------- Leitura (página do admin) ----------------
+
+@dataclass
+class Resumo:
+    id: str
+    em: datetime
+    metodo: str
+    caminho: str
+    view: str
+    status: int
+    duracao_ms: float
+    sql_total: int
+    sql_ms: float
+    usuario: str
+    motivo: str
+
+
+def _valido(perfil_id: str) -> bool:
+    return bool(perfil_id) and all(c.isalnum() or c == "-" for c in perfil_id)
+
+
+def listar(limite: int = 50, view: str = "") -> list[Resumo]:
+    """Os `limite` requests mais lentos entre os perfis guardados."""
+    out = []
+    for arq in DIR.glob("*.json") if DIR.exists() else ():
+        try:
+            m = json.loads(arq.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if view and m.get("view") != view:
+            continue
+        out.append(Resumo(
+            id=m["id"], em=datetime.fromisoformat(m["em"]), metodo=m["metodo"], caminho=m["caminho"],
+            view=m.get("view", ""), status=m["status"], duracao_ms=m["duracao_ms"],
+            sql_total=m["sql_total"], sql_ms=m["sql_ms"], usuario=m.get("usuario", ""),
+            motivo=m.get("motivo", ""),
+        ))
+    out.sort(key=lambda r: -r.duracao_ms)
+    return out[:limite]
+
+
+def carregar(perfil_id: str) -> Optional[dict]:
+    if not _valido(perfil_id):
+        return None
+    try:
+        return json.loads((DIR / f"{perfil_id}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def arquivo(perfil_id: str, ext: str) -> Optional[Path]:
+    if not _valido(perfil_id) or ext not in ("prof", "folded", "json"):
+        return None
+    caminho = DIR / f"{perfil_id}.{ext}"
+    return caminho if caminho.is_file() else None
+
+
+def top_funcoes(perfil_id: str, n: int = 30, ordem: str = "cumulative") -> str:
+    """Tabela do pstats (texto) com as `n` funções mais caras."""
+    caminho = arquivo(perfil_id, "prof")
+    if caminho is None:
+        return ""
+    saida = io.StringIO()
+    stats = pstats.Stats(str(caminho), stream=saida)
+    stats.strip_dirs().sort_stats(ordem).print_stats(n)
+    return saida.getvalue()
+
+
+# ---------------- Pilhas dobradas (flamegraph) ----------------
+
+class Amostrador(threading.Thread):
+    """
+    Lê a pilha da thread do request a cada `INTERVALO_AMOSTRA` e soma, por
+    pilha, o tempo real desde a leitura anterior (a thread pode esperar mais
+    que o intervalo pelo GIL). O cProfile só guarda pares chamador -> chamado, e o
+    middleware do Django é recursivo (`inner` -> middleware -> `inner`), então
+    as pilhas completas não dão para reconstruir a partir dele.
+    """
+
+    def __init__(self, alvo: int):
+        super().__init__(name="mca-perfil", daemon=True)
+        self.alvo = alvo
+        self.tempos: Counter = Counter()  # pilha -> µs
+        self._parar = threading.Event()
+
+    def run(self):
+        anterior = time.perf_counter()
+        while not self._parar.wait(INTERVALO_AMOSTRA):
+            agora = time.perf_counter()
+            frame = sys._current_frames().get(self.alvo)
+            if frame is not None:
+                self.tempos[_pilha(frame)] += int((agora - anterior) * 1_000_000)
+            anterior = agora
+
+    def parar(self) -> list[str]:
+        self._parar.set()
+        self.join()
+        return sorted(f"{';'.join(p)} {us}" for p, us in self.tempos.items() if p and us)
+
+
+def _pilha(frame) -> tuple:
+    rotulos = []
+    while frame is not None:
+        code = frame.f_code
+        if code is ProfilerMiddleware.__call__.__code__:
+            break  # daqui para cima é servidor/WSGI, igual em todo request
+        rotulos.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    rotulos.reverse()
+    return tuple(rotulos)
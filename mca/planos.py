@@ -0,0 +1,196 @@
+# mca/planos.py
+"""
+Verificação dos planos de consulta (EXPLAIN QUERY PLAN) das consultas quentes.
+
+Os índices parciais/compostos dos models (turmas, financeiro, clientes) só
+valem enquanto o SQL gerado continuar casando com eles: um `.filter()` a
+mais, um `exclude` reescrito ou uma ordenação trocada e o SQLite volta a
+varrer a tabela inteira sem avisar ninguém.
+
+Cada consulta quente é registrada aqui com `@consulta(nome)` — de
+preferência chamando o próprio service que a monta — e `verificar()` roda
+`EXPLAIN QUERY PLAN` em cada uma. Qualquer `SCAN <tabela>` sem índice é
+regressão. O EXPLAIN não executa a consulta: funciona em banco vazio.
+
+    python manage.py verificar_planos
+
+A mesma verificação roda na suíte (`PlanosConsultasTests`, mca/tests.py).
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+
+# "SCAN turmas_matricula" (3.36+) / "SCAN TABLE turmas_matricula" (antigos);
+# "SCAN ... USING [COVERING] INDEX ..." percorre um índice e não conta.
+_VARREDURA = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+
+# data fixa: o plano não depende do dia em que a verificação roda
+_DIA = date(2025, 3, 10)
+
+
+@dataclass
+class Consulta:
+    nome: str
+    func: Callable[[], object]  # () -> QuerySet
+
+
+@dataclass
+class Plano:
+    nome: str
+    linhas: list = field(default_factory=list)
+    varreduras: list = field(default_factory=list)
+    erro: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.varreduras and not self.erro
+
+
+CONSULTAS: list[Consulta] = []
+
+
+def consulta(nome: str):
+    def deco(func):
+        CONSULTAS.append(Consulta(nome=nome, func=func))
+        return func
+    return deco
+
+
+def explicar(qs) -> list[str]:
+    """Linhas (detail) do EXPLAIN QUERY PLAN do queryset."""
+    try:
+        sql, params = qs.query.sql_with_params()
+    except EmptyResultSet:
+        return []
+    with connection.cursor() as cur:
+        cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cur.fetchall()]
+
+
+def varreduras(linhas: list[str]) -> list[str]:
+    """Tabelas lidas por inteiro (sem índice) no plano."""
+    return [m.group(1) for m in (_VARREDURA.match(l.strip()) for l in linhas) if m]
+
+
+def verificar(filtro: str = "") -> list[Plano]:
+    if connection.vendor != "sqlite":
+        raise RuntimeError("verificar_planos só interpreta planos do SQLite.")
+    planos = []
+    for c in CONSULTAS:
+        if filtro and filtro.lower() not in c.nome.lower():
+            continue
+        plano = Plano(nome=c.nome)
+        try:
+            plano.linhas = explicar(c.func())
+            plano.varreduras = varreduras(plano.linhas)
+        except Exception as e:  # noqa: BLE001 — reportado como falha do caso
+            plano.erro = f"{type(e).__name__}: {e}"
+        planos.append(plano)
+    return planos
+
+
+# ---------------- Turmas ----------------
+
+@consulta("turmas ativas (ordem padrão)")
+def _turmas_ativas():
+    from turmas.models import Turma
+    return Turma.objects.filter(ativo=True)
+
+
+@consulta("matrículas da turma (turma.matriculas)")
+def _matriculas_da_turma():
+    from turmas.models import Matricula
+    return Matricula.objects.filter(turma_id=1)
+
+
+@consulta("matrículas ativas na data da lista (presença)")
+def _matriculas_na_data():
+    from turmas.models import Matricula
+    return Matricula.objects.ativas_em(_DIA).filter(turma_id=1).order_by("sort_nome", "id")
+
+
+@consulta("matrículas ativas no mês (cobranças)")
+def _matriculas_no_mes():
+    from financeiro.services import _matriculas_ativas_no_mes_global
+    return _matriculas_ativas_no_mes_global(_DIA.year, _DIA.month)
+
+
+@consulta("contagem de matrículas ativas hoje (dashboard)")
+def _matriculas_ativas():
+    from turmas.models import Matricula
+    return Matricula.objects.ativas_em(_DIA).order_by().values("id")
+
+
+@consulta("itens da lista (lista.itens)")
+def _itens_da_lista():
+    from turmas.models import ItemPresenca
+    return ItemPresenca.objects.filter(lista_id=1)
+
+
+@consulta("listas da turma")
+def _listas_da_turma():
+    from turmas.models import ListaPresenca
+    return ListaPresenca.objects.filter(turma_id=1, data__gte=_DIA)
+
+
+# ---------------- Financeiro ----------------
+
+@consulta("lançamentos: página padrão")
+def _lancamentos_pagina():
+    from financeiro.services import buscar_lancamentos
+    return buscar_lancamentos()[:21]
+
+
+@consulta("lançamentos: tipo + status em aberto")
+def _lancamentos_abertos():
+    from financeiro.models import Lancamento
+    return (Lancamento.objects.filter(tipo="RECEBER", status__in=["ABERTO", "PARCIAL"])
+            .order_by("vencimento", "id"))
+
+
+@consulta("lançamentos: próximos não cancelados (dashboard)")
+def _proximos():
+    from financeiro.models import Lancamento
+    return (Lancamento.objects.exclude(status="CANCELADO").filter(tipo="RECEBER")
+            .order_by("vencimento", "id")[:8])
+
+
+@consulta("lançamentos: cobrança do cliente no mês")
+def _cobranca_no_mes():
+    from financeiro.services import _cobrancas_cliente_mes
+    return _cobrancas_cliente_mes(1, _DIA.year, _DIA.month)
+
+
+@consulta("lançamentos: pagamento do professor no mês")
+def _pagamento_professor():
+    from financeiro.models import Lancamento
+    return Lancamento.objects.filter(
+        tipo="PAGAR", funcionario_id=1, descricao__icontains="03/2025",
+        status__in=["ABERTO", "PARCIAL", "LIQUIDADO"],
+    )
+
+
+# ---------------- Clientes ----------------
+
+@consulta("clientes ativos (autocomplete)")
+def _clientes_ativos():
+    from clientes.models import Cliente
+    return Cliente.objects.filter(ativo=True).order_by("nome_razao", "id")[:16]
+
+
+@consulta("clientes ativos do condomínio (matrícula em lote)")
+def _clientes_do_condominio():
+    from clientes.models import Cliente
+    return Cliente.objects.filter(condominio_id=1, ativo=True).order_by("nome_razao", "id")
+
+
+@consulta("clientes: lista filtrada por ativos")
+def _clientes_lista():
+    from clientes.services import buscar_clientes
+    return buscar_clientes(ativos=True)[:21]
@@ -0,0 +1,306 @@
+# mca/query_budget.py
+"""
+Orçamento de consultas SQL por request + detector de N+1.
+
+- `@orcamento_consultas(n)` declara quantas consultas uma view pode fazer;
+- `InspetorConsultas` (context manager) registra cada SQL executado na
+  conexão: tempo, "forma" normalizada e o ponto do código que disparou;
+- `QueryBudgetMiddleware` (opt-in, ver settings.QUERY_BUDGET) mede cada
+  request, devolve cabeçalhos `X-DB-*`/`Server-Timing` e loga as consultas
+  repetidas com o arquivo:linha de origem;
+- `OrcamentoConsultasMixin` / `orcamento(...)` fazem o teste falhar quando
+  uma view passa do orçamento declarado (base com dados: mca/testes.py;
+  testes em `<app>/tests.py`).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import time
+import traceback
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import resolve
+
+logger = logging.getLogger("mca.queries")
+
+ATTR_ORCAMENTO = "orcamento_consultas"
+
+_BASE_DIR = str(getattr(settings, "BASE_DIR", "")) + os.sep
+_STDLIB_DIR = os.path.dirname(os.__file__) + os.sep
+_IGNORAR_FRAMES = (
+    os.sep + "django" + os.sep,
+    os.sep + "site-packages" + os.sep,
+    __file__,
+    os.path.join(os.sep + "mca", "metricas.py"),  # execute_wrapper das métricas
+)
+
+# IN (%s, %s, %s) -> IN (...) ; literais numéricos/strings em SQL cru -> ?
+_RE_IN = re.compile(r"\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)", re.IGNORECASE)
+_RE_STR = re.compile(r"'(?:[^']|'')*'")
+_RE_NUM = re.compile(r"\b\d+\b")
+_RE_ESPACO = re.compile(r"\s+")
+
+
+class OrcamentoExcedido(AssertionError):
+    """Levantada (em testes ou modo estrito) quando a view passa do orçamento."""
+
+
+def _config() -> dict:
+    cfg = {
+        "ENABLED": False,
+        "STRICT": False,
+        "HEADERS": True,
+        "NPLUS1_THRESHOLD": 3,
+        "MAX_REPORTED": 5,
+    }
+    cfg.update(getattr(settings, "QUERY_BUDGET", {}) or {})
+    return cfg
+
+
+# ---------------- Declaração ----------------
+
+def orcamento_consultas(max_consultas: int):
+    """
+    Decorator que declara o orçamento de consultas de uma view.
+
+    O valor fica como atributo da função (e sobe pelos decorators que usam
+    functools.wraps, como login_required/user_passes_test).
+    """
+    def deco(view_func):
+        setattr(view_func, ATTR_ORCAMENTO, int(max_consultas))
+        return view_func
+    return deco
+
+
+def orcamento_da_view(view_func) -> Optional[int]:
+    return getattr(view_func, ATTR_ORCAMENTO, None)
+
+
+# ---------------- Coleta ----------------
+
+def forma_sql(sql: str) -> str:
+    """Normaliza o SQL para agrupar consultas "iguais a menos dos parâmetros"."""
+    s = _RE_IN.sub("IN (...)", sql)
+    s = _RE_STR.sub("?", s)
+    s = _RE_NUM.sub("?", s)
+    return _RE_ESPACO.sub(" ", s).strip()
+
+
+def _origem() -> str:
+    """arquivo:linha (função) do frame do projeto mais próximo da consulta."""
+    for frame in reversed(traceback.extract_stack()):
+        fn = frame.filename
+        if fn.startswith(_STDLIB_DIR) or any(p in fn for p in _IGNORAR_FRAMES):
+            continue
+        if _BASE_DIR and fn.startswith(_BASE_DIR):
+            fn = fn[len(_BASE_DIR):]
+        return f"{fn}:{frame.lineno} ({frame.name})"
+    return "?"
+
+
+@dataclass
+class Consulta:
+    sql: str
+    params: tuple
+    duracao: float
+    origem: str
+    inicio: float = 0.0  # perf_counter no começo (linha do tempo do profiler)
+
+    @property
+    def forma(self) -> str:
+        return forma_sql(self.sql)
+
+
+@dataclass
+class InspetorConsultas:
+    """
+    Registra as consultas executadas enquanto ativo.
+
+        with InspetorConsultas() as insp:
+            ...
+        insp.total, insp.tempo_total, insp.repetidas()
+    """
+    using: tuple = ("default",)
+    com_origem: bool = True
+    consultas: list = field(default_factory=list)
+
+    def __post_init__(self):
+        if isinstance(self.using, str):
+            self.using = (self.using,)
+        self._pilha = []
+
+    # execute_wrapper do Django: (execute, sql, params, many, context)
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append(Consulta(
+                sql=sql,
+                params=tuple(params) if params and not many else (),
+                duracao=time.perf_counter() - inicio,
+                origem=_origem() if self.com_origem else "",
+                inicio=inicio,
+            ))
+
+    def __enter__(self):
+        for alias in self.using:
+            cm = connections[alias].execute_wrapper(self)
+            cm.__enter__()
+            self._pilha.append(cm)
+        return self
+
+    def __exit__(self, *exc):
+        while self._pilha:
+            self._pilha.pop().__exit__(*exc)
+        return False
+
+    # ---- resumo ----
+    @property
+    def total(self) -> int:
+        return len(self.consultas)
+
+    @property
+    def tempo_total(self) -> float:
+        return sum(c.duracao for c in self.consultas)
+
+    def duplicadas(self) -> list[tuple[Consulta, int]]:
+        """Mesmo SQL com os mesmos parâmetros executado mais de uma vez."""
+        cont = Counter((c.sql, c.params) for c in self.consultas)
+        vistos, out = set(), []
+        for c in self.consultas:
+            k = (c.sql, c.params)
+            if cont[k] > 1 and k not in vistos:
+                vistos.add(k)
+                out.append((c, cont[k]))
+        return out
+
+    def repetidas(self, limiar: int = 3) -> list[tuple[str, int, list[str]]]:
+        """
+        Formas de SQL executadas `limiar`+ vezes (suspeita de N+1).
+        Retorna (forma, vezes, origens distintas), da mais repetida para a menos.
+        """
+        por_forma = defaultdict(list)
+        for c in self.consultas:
+            por_forma[c.forma].append(c.origem)
+        out = [
+            (forma, len(origens), sorted(set(origens)))
+            for forma, origens in por_forma.items()
+            if len(origens) >= limiar
+        ]
+        out.sort(key=lambda t: -t[1])
+        return out
+
+    def relatorio(self, limiar: int = 3, max_itens: int = 5) -> str:
+        linhas = [f"{self.total} consultas em {self.tempo_total * 1000:.1f} ms"]
+        for forma, vezes, origens in self.repetidas(limiar)[:max_itens]:
+            linhas.append(f"  {vezes}x {forma[:160]}")
+            for o in origens[:3]:
+                linhas.append(f"      em {o}")
+        return "\n".join(linhas)
+
+
+# ---------------- Middleware ----------------
+
+class QueryBudgetMiddleware:
+    """
+    Mede as consultas de cada request (opt-in).
+
+    Ative com QUERY_BUDGET = {"ENABLED": True} (ou MCA_QUERY_BUDGET=1).
+    Com "STRICT": True, passar do orçamento declarado levanta OrcamentoExcedido.
+    """
+    def __init__(self, get_response):
+        self.cfg = _config()
+        if not self.cfg["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._orcamento_consultas = None
+        with InspetorConsultas() as insp:
+            response = self.get_response(request)
+
+        limite = request._orcamento_consultas
+        limiar = self.cfg["NPLUS1_THRESHOLD"]
+        repetidas = insp.repetidas(limiar)
+        estourou = limite is not None and insp.total > limite
+
+        if self.cfg["HEADERS"]:
+            response["X-DB-Queries"] = str(insp.total)
+            response["X-DB-Time-ms"] = f"{insp.tempo_total * 1000:.1f}"
+            response["X-DB-Duplicates"] = str(sum(v - 1 for _, v in insp.duplicadas()))
+            if limite is not None:
+                response["X-DB-Budget"] = str(limite)
+            response["Server-Timing"] = (
+                f'db;dur={insp.tempo_total * 1000:.1f};desc="{insp.total} queries"'
+            )
+
+        nivel = logging.WARNING if (estourou or repetidas) else logging.INFO
+        logger.log(
+            nivel,
+            "%s %s -> %s | orçamento=%s\n%s",
+            request.method, request.path, response.status_code,
+            limite if limite is not None else "-",
+            insp.relatorio(limiar, self.cfg["MAX_REPORTED"]),
+        )
+
+        if estourou and self.cfg["STRICT"]:
+            raise OrcamentoExcedido(
+                f"{request.path}: {insp.total} consultas (orçamento {limite})\n"
+                + insp.relatorio(limiar, self.cfg["MAX_REPORTED"])
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._orcamento_consultas = orcamento_da_view(view_func)
+        return None
+
+
+# ---------------- Helpers de teste ----------------
+
+@contextmanager
+def orcamento(max_consultas: int, *, using="default", rotulo: str = ""):
+    """
+    Falha (OrcamentoExcedido) se o bloco fizer mais que `max_consultas`.
+
+        with orcamento(6, rotulo="lista de turmas"):
+            client.get("/turmas/")
+    """
+    with InspetorConsultas(using=using) as insp:
+        yield insp
+    if insp.total > max_consultas:
+        raise OrcamentoExcedido(
+            f"{rotulo or 'bloco'}: {insp.total} consultas (orçamento {max_consultas})\n"
+            + insp.relatorio()
+        )
+
+
+class OrcamentoConsultasMixin:
+    """
+    Mixin para TestCase: compara a view com o orçamento declarado nela.
+
+        class TurmasTests(OrcamentoConsultasMixin, TestCase):
+            def test_lista(self):
+                self.client.force_login(self.diretor)
+                self.assertDentroDoOrcamento("/turmas/")
+    """
+    def assertDentroDoOrcamento(self, url: str, *, data=None, client=None,
+                                max_consultas: Optional[int] = None):
+        client = client or self.client
+        limite = max_consultas
+        if limite is None:
+            limite = orcamento_da_view(resolve(url.split("?", 1)[0]).func)
+        if limite is None:
+            self.fail(f"{url}: view sem @orcamento_consultas declarado")
+        with orcamento(limite, rotulo=url):
+            response = client.get(url, data or {})
+        self.assertLess(response.status_code, 400, f"{url} -> {response.status_code}")
+        return response
@@ -0,0 +1,269 @@
+# mca/referencias.py
+"""
+Cache de dados de referência: Condomínio, Modalidade, Funcionário e
+Categoria financeira.
+
+São tabelas pequenas que quase nunca mudam, mas eram consultadas em quase
+toda página (combos de filtro, ModelChoiceField, `Turma.__str__`, categoria
+de cada geração de cobranças). Agora:
+
+- cada tabela é lida inteira (só as colunas usadas) e guardada no cache
+  `default` do Django sob `ref:<nome>:<versão>`;
+- o processo ainda memoriza a última versão em memória, então uma leitura
+  custa um `cache.get` da versão e nenhuma consulta SQL;
+- post_save/post_delete nos models incrementam a versão (ver `conectar`);
+  escritas em massa (bulk_create/update) devem chamar `invalidar(nome)`.
+
+A versão é de mca/versoes.py. Com o cache por processo (LocMem, o padrão)
+o incremento só vale no processo que fez a escrita; nos outros workers e no
+`rodar_jobs` a versão expira em `versoes.VERSAO_TTL_LOCAL` segundos e a
+tabela é relida. Com cache compartilhado a invalidação vale na hora para todos.
+
+API:
+    linhas("condominios")          -> [dict, ...] na ordem do model
+    por_id("modalidades")[7]       -> dict da linha
+    nomes("funcionarios")          -> {id: nome}
+    escolhas("condominios", filtro=lambda r: r["ativo"])  -> [(id, rótulo)]
+    instancia("modalidades", 7)    -> Modalidade (colunas não cacheadas ficam adiadas)
+    relacionado(turma, "modalidade", "modalidades")       -> substitui select_related
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from django import forms
+from django.apps import apps
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import versoes as contadores  # `versoes()` abaixo é das referências
+
+REF_TTL = 60 * 60 * 6  # segundos (a versão invalida antes disso)
+
+
+@dataclass(frozen=True)
+class Referencia:
+    nome: str
+    model: str                 # "app_label.Model"
+    campos: tuple              # colunas guardadas no cache (sempre inclui "id")
+    ordem: tuple               # ordenação das linhas / escolhas
+    rotulo: str = "nome"       # campo usado como rótulo padrão
+
+    @property
+    def model_class(self):
+        return apps.get_model(self.model)
+
+
+REFERENCIAS: dict[str, Referencia] = {r.nome: r for r in [
+    Referencia(
+        "condominios", "condominios.Condominio",
+        ("id", "nome", "cnpj", "municipio", "estado", "ativo"), ("nome", "id"),
+    ),
+    Referencia(
+        "modalidades", "modalidades.Modalidade",
+        ("id", "nome", "slug", "condominio_id", "ativo"), ("nome", "id"),
+    ),
+    Referencia(
+        "funcionarios", "funcionarios.Funcionario",
+        ("id", "nome", "cpf_cnpj", "cargo", "user_id", "ativo"), ("nome", "id"),
+    ),
+    Referencia(
+        "categorias", "financeiro.CategoriaFinanceira",
+        ("id", "nome"), ("nome",),
+    ),
+]}
+
+# memória do processo: nome -> (versão, linhas, por_id); vale enquanto a versão for a mesma
+_local: dict[str, tuple] = {}
+_lock = threading.Lock()
+
+
+def _ref(nome: str) -> Referencia:
+    try:
+        return REFERENCIAS[nome]
+    except KeyError:
+        raise KeyError(f"Referência desconhecida: {nome!r}") from None
+
+
+# ---------------- Versão ----------------
+
+def _versao_key(nome: str) -> str:
+    return f"ref:versao:{nome}"
+
+
+def versao(nome: str) -> int:
+    return contadores.versao(_versao_key(nome))
+
+
+def versoes(*nomes: str) -> tuple:
+    """Versões de várias referências (útil para compor chaves de cache)."""
+    return tuple(versao(n) for n in (nomes or REFERENCIAS))
+
+
+def invalidar(nome: str) -> None:
+    _ref(nome)
+    contadores.incrementar(_versao_key(nome))
+    _local.pop(nome, None)
+
+
+# ---------------- Leitura ----------------
+
+def _carregar(ref: Referencia) -> list[dict]:
+    qs = ref.model_class._default_manager.using(DEFAULT_DB_ALIAS)
+    return list(qs.order_by(*ref.ordem).values(*ref.campos))
+
+
+def _dados(nome: str) -> tuple[list[dict], dict]:
+    ref = _ref(nome)
+    v = versao(nome)
+    memo = _local.get(nome)
+    if memo is not None and memo[0] == v:
+        return memo[1], memo[2]
+
+    key = f"ref:{nome}:{v}"
+    linhas_ = cache.get(key)
+    if linhas_ is None:
+        linhas_ = _carregar(ref)
+        # com versão que expira, os dados sob ela não são mais lidos depois disso
+        cache.set(key, linhas_, min(REF_TTL, contadores.VERSAO_TTL or REF_TTL))
+    idx = {r["id"]: r for r in linhas_}
+    with _lock:
+        _local[nome] = (v, linhas_, idx)
+    return linhas_, idx
+
+
+def linhas(nome: str) -> list[dict]:
+    """Linhas da tabela (dicts somente leitura), na ordem da referência."""
+    return _dados(nome)[0]
+
+
+def por_id(nome: str) -> dict:
+    return _dados(nome)[1]
+
+
+def obter(nome: str, pk) -> Optional[dict]:
+    if pk in (None, ""):
+        return None
+    try:
+        return por_id(nome).get(int(pk))
+    except (TypeError, ValueError):
+        return None
+
+
+def nomes(nome: str) -> dict:
+    campo = _ref(nome).rotulo
+    return {r["id"]: r[campo] for r in linhas(nome)}
+
+
+def id_por_nome(nome: str, valor: str) -> Optional[int]:
+    campo = _ref(nome).rotulo
+    for r in linhas(nome):
+        if r[campo] == valor:
+            return r["id"]
+    return None
+
+
+def escolhas(nome: str, *, filtro: Optional[Callable[[dict], bool]] = None,
+             rotulo: Optional[Callable[[dict], str]] = None) -> list[tuple]:
+    """Lista (id, rótulo) ordenada, pronta para `choices`/<select>."""
+    campo = _ref(nome).rotulo
+    rotulo = rotulo or (lambda r: r[campo])
+    return [(r["id"], rotulo(r)) for r in linhas(nome) if filtro is None or filtro(r)]
+
+
+# ---------------- Instâncias (substituto do select_related) ----------------
+
+def instancia(nome: str, pk):
+    """
+    Instância do model montada a partir do cache (sem consulta).
+    Colunas fora de `campos` ficam adiadas: acessá-las busca no banco.
+    Cada chamada devolve um objeto novo — nada é compartilhado entre requests.
+    """
+    row = obter(nome, pk)
+    if row is None:
+        return None
+    model = _ref(nome).model_class
+    # from_db espera os valores na ordem dos campos concretos do model
+    campos = [f.attname for f in model._meta.concrete_fields if f.attname in row]
+    return model.from_db(DEFAULT_DB_ALIAS, campos, [row[c] for c in campos])
+
+
+def instancias(nome: str, pks: Iterable) -> list:
+    return [o for o in (instancia(nome, pk) for pk in pks) if o is not None]
+
+
+def relacionado(obj, campo: str, nome: str):
+    """
+    `obj.<campo>` sem consulta: usa o que já veio do select_related ou, se
+    não veio, monta a partir do cache e deixa no cache de campos do objeto.
+    """
+    if obj is None:
+        return None
+    fk = obj._meta.get_field(campo)
+    if fk.is_cached(obj):
+        return getattr(obj, campo)
+    inst = instancia(nome, getattr(obj, fk.attname))
+    if inst is None:
+        return getattr(obj, campo)  # fora do cache (ex.: recém-criado): consulta normal
+    fk.set_cached_value(obj, inst)
+    return inst
+
+
+# ---------------- Formulários ----------------
+
+class _OpcoesReferencia(forms.models.ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        yield from escolhas(self.field.referencia, filtro=self.field.filtro_ref)
+
+    def __len__(self):
+        return len(escolhas(self.field.referencia, filtro=self.field.filtro_ref)) + (
+            1 if self.field.empty_label is not None else 0
+        )
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(len(self))
+
+
+class ReferenciaChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField cujas opções vêm do cache de referências: renderizar o
+    <select> não consulta o banco. O queryset continua validando o POST.
+
+        condominio = ReferenciaChoiceField("condominios", filtro=lambda r: r["ativo"])
+    """
+    iterator = _OpcoesReferencia
+
+    def __init__(self, referencia: str, *, filtro=None, queryset=None, **kwargs):
+        self.referencia = referencia
+        self.filtro_ref = filtro
+        if queryset is None:
+            queryset = _ref(referencia).model_class._default_manager.all()
+        super().__init__(queryset=queryset, **kwargs)
+
+
+# ---------------- Invalidação ----------------
+
+def _receiver(nome: str):
+    def _invalidar(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+        invalidar(nome)
+        # de novo no commit: outro worker pode ter recarregado a versão nova
+        # com os dados de antes da transação terminar
+        transaction.on_commit(lambda: invalidar(nome), using=using)
+    _invalidar.__name__ = f"invalidar_ref_{nome}"
+    return _invalidar
+
+
+_receivers = {nome: _receiver(nome) for nome in REFERENCIAS}
+
+
+def conectar() -> None:
+    """Liga post_save/post_delete de cada model à invalidação (AppConfig.ready)."""
+    for nome, ref in REFERENCIAS.items():
+        model = ref.model_class
+        post_save.connect(_receivers[nome], sender=model, dispatch_uid=f"ref_{nome}_save")
+        post_delete.connect(_receivers[nome], sender=model, dispatch_uid=f"ref_{nome}_delete")
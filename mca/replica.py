@@ -0,0 +1,153 @@
+# mca/replica.py
+"""
+Réplica de leitura para relatórios (alias `reports`).
+
+Dashboard e exportações varrem tabelas inteiras (lançamentos, matrículas,
+clientes) e disputavam o `default` com as escritas do dia a dia. Agora:
+
+- `atualizar()` copia o `default` para o arquivo da réplica com a API de
+  backup online do SQLite (cópia consistente, sem parar os writers — em WAL
+  o leitor não bloqueia ninguém) e troca o arquivo de forma atômica;
+- `ReplicaRouter` manda as LEITURAS para `reports` só dentro de
+  `usar_replica` (decorator de view ou context manager) ou de tarefas
+  `@tarefa(..., replica=True)` (exportações, mca/jobs.py) — opt-in explícito;
+  escritas e todo o resto continuam no `default`;
+- réplica ausente ou mais velha que `MAX_ATRASO` é ignorada (lê do
+  `default`): dado atrasado demais é pior que disputa.
+
+    @login_required
+    @user_passes_test(is_diretor, login_url="/turmas/")
+    @usar_replica
+    def exportar(request): ...
+
+Mantenha o `usar_replica` por último (mais perto da função): o usuário e a
+sessão são lidos antes, no `default`.
+
+A réplica é atualizada por `manage.py atualizar_replica` (cron ou
+`--a-cada N`).
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ALIAS = "reports"
+
+_cfg = getattr(settings, "REPLICA_RELATORIOS", {})
+MAX_ATRASO = _cfg.get("MAX_ATRASO", 60 * 15)  # segundos
+_STAT_TTL = 1.0  # segundos entre os os.stat do arquivo da réplica
+
+_em_relatorio: ContextVar[bool] = ContextVar("mca_replica", default=False)
+_stat = {"em": 0.0, "ok": False}
+
+
+# ---------------- Configuração / estado ----------------
+
+def configurada() -> bool:
+    return ALIAS in settings.DATABASES
+
+
+def _caminho(alias: str) -> Path:
+    return Path(connections[alias].settings_dict["NAME"])
+
+
+def idade() -> Optional[float]:
+    """Segundos desde a última atualização (None = réplica inexistente)."""
+    if not configurada():
+        return None
+    try:
+        return time.time() - os.stat(_caminho(ALIAS)).st_mtime
+    except OSError:
+        return None
+
+
+def disponivel() -> bool:
+    agora = time.monotonic()
+    if agora - _stat["em"] > _STAT_TTL:
+        i = idade()
+        _stat.update(em=agora, ok=i is not None and i <= MAX_ATRASO)
+    return _stat["ok"]
+
+
+# ---------------- Opt-in ----------------
+
+@contextmanager
+def replica():
+    token = _em_relatorio.set(True)
+    try:
+        yield
+    finally:
+        _em_relatorio.reset(token)
+
+
+def usar_replica(view):
+    """Decorator: leituras da view vão para a réplica de relatórios."""
+    @wraps(view)
+    def _wrapped(*args, **kwargs):
+        with replica():
+            return view(*args, **kwargs)
+    return _wrapped
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _em_relatorio.get() and configurada() and disponivel():
+            return ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # instâncias lidas da réplica se relacionam normalmente com as do default
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # a réplica é cópia byte a byte do default: nunca migra sozinha
+        return db != ALIAS
+
+
+# ---------------- Atualização ----------------
+
+def atualizar(origem: str = DEFAULT_DB_ALIAS) -> dict:
+    """
+    Copia `origem` para a réplica (backup online) e troca o arquivo.
+    Conexões já abertas na réplica são fechadas neste processo; nos outros
+    workers elas expiram pelo CONN_MAX_AGE e reabrem o arquivo novo.
+    """
+    if not configurada():
+        raise RuntimeError(f"Banco '{ALIAS}' não configurado em DATABASES.")
+    conn = connections[origem]
+    if conn.vendor != "sqlite":
+        raise RuntimeError("A réplica usa a API de backup do SQLite.")
+
+    destino = _caminho(ALIAS)
+    tmp = destino.with_name(destino.name + ".tmp")
+    inicio = time.perf_counter()
+
+    conn.ensure_connection()
+    alvo = sqlite3.connect(tmp)
+    try:
+        conn.connection.backup(alvo)  # uma transação de leitura: cópia consistente
+        # a réplica é só leitura: arquivo único, sem -wal/-shm
+        alvo.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        alvo.close()
+
+    connections[ALIAS].close()
+    os.replace(tmp, destino)
+    _stat["em"] = 0.0
+    return {
+        "arquivo": str(destino),
+        "bytes": destino.stat().st_size,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
@@ -0,0 +1,173 @@
+# mca/roles.py
+"""
+Papel (grupos + cargo) do usuário logado, resolvido uma única vez.
+
+Antes, cada request fazia `user.groups.filter(...).exists()` no middleware,
+de novo em cada `is_diretor`/`is_professor` e ainda acessava
+`user.funcionario` nas views/templates. Agora:
+
+- `papel_do_usuario(user)` faz UMA consulta (grupos + funcionário) e guarda
+  o resultado no cache (chave = usuário + versão do papel);
+- o resultado também fica memorizado no próprio objeto `user` da request;
+- `invalidar_papel(user_id)` incrementa a versão (chamado quando grupos ou
+  cargo mudam).
+
+A versão fica no cache `default`. Com um cache por processo (LocMem, o
+padrão) o incremento só vale no worker que fez a mudança; nos outros o papel
+antigo dura até o TTL, por isso o TTL padrão é curto nesse caso
+(`PAPEL_TTL_LOCAL`) e longo só com cache compartilhado (Redis, Memcached,
+banco). `PAPEL["TTL"]` nas settings fixa o valor; o check `mca.E001`
+recusa um TTL longo com cache por processo.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .versoes import cache_por_processo
+
+PAPEL_TTL_COMPARTILHADO = 60 * 10  # segundos
+PAPEL_TTL_LOCAL = 5  # cache por processo: atraso máximo de uma invalidação nos outros workers
+
+
+def papel_ttl() -> int:
+    ttl = getattr(settings, "PAPEL", {}).get("TTL")
+    if ttl is not None:
+        return ttl
+    return PAPEL_TTL_LOCAL if cache_por_processo() else PAPEL_TTL_COMPARTILHADO
+
+
+PAPEL_TTL = papel_ttl()
+
+GRUPO_DIRETORIA = "Diretoria"
+GRUPO_PROFESSOR = "Professor"
+GRUPO_ESTAGIARIO = "Estagiario"
+
+_ATTR = "_papel_cache"
+
+
+@dataclass(frozen=True)
+class Papel:
+    user_id: Optional[int] = None
+    is_authenticated: bool = False
+    is_superuser: bool = False
+    grupos: frozenset = field(default_factory=frozenset)
+    funcionario_id: Optional[int] = None
+    cargo: Optional[str] = None
+
+    @property
+    def is_diretor(self) -> bool:
+        return GRUPO_DIRETORIA in self.grupos or self.is_superuser
+
+    @property
+    def is_professor(self) -> bool:
+        return GRUPO_PROFESSOR in self.grupos
+
+    @property
+    def is_estagiario(self) -> bool:
+        return GRUPO_ESTAGIARIO in self.grupos
+
+    @property
+    def cargo_professor(self) -> bool:
+        """Cargo do funcionário é PROF (regra usada para filtrar turmas)."""
+        return self.cargo == "PROF"
+
+    @property
+    def cargo_display(self) -> str:
+        if not self.cargo:
+            return ""
+        from funcionarios.models import Funcionario
+        try:
+            return Funcionario.Cargo(self.cargo).label
+        except ValueError:
+            return self.cargo
+
+    def has_group(self, nome: str) -> bool:
+        return nome in self.grupos
+
+
+ANONIMO = Papel()
+
+
+def _versao_key(user_id: int) -> str:
+    return f"papel:versao:{user_id}"
+
+
+def _versao(user_id: int) -> int:
+    v = cache.get(_versao_key(user_id))
+    if v is None:
+        cache.add(_versao_key(user_id), 1, None)
+        v = cache.get(_versao_key(user_id)) or 1
+    return v
+
+
+def invalidar_papel(user_id: Optional[int]) -> None:
+    if not user_id:
+        return
+    try:
+        cache.incr(_versao_key(user_id))
+    except ValueError:
+        cache.set(_versao_key(user_id), 2, None)
+
+
+def _resolver(user) -> Papel:
+    from django.contrib.auth import get_user_model
+
+    rows = list(
+        get_user_model().objects
+        .filter(pk=user.pk)
+        .values_list("groups__name", "funcionario__id", "funcionario__cargo")
+    )
+    grupos = frozenset(g for g, _, _ in rows if g)
+    funcionario_id = rows[0][1] if rows else None
+    cargo = rows[0][2] if rows else None
+    return Papel(
+        user_id=user.pk,
+        is_authenticated=True,
+        is_superuser=bool(user.is_superuser),
+        grupos=grupos,
+        funcionario_id=funcionario_id,
+        cargo=cargo,
+    )
+
+
+def papel_do_usuario(user) -> Papel:
+    if user is None or not getattr(user, "is_authenticated", False):
+        return ANONIMO
+    memo = getattr(user, _ATTR, None)
+    if memo is not None:
+        return memo
+
+    key = f"papel:{user.pk}:{_versao(user.pk)}"
+    papel = cache.get(key)
+    if papel is None:
+        papel = _resolver(user)
+        cache.set(key, papel, PAPEL_TTL)
+    try:
+        setattr(user, _ATTR, papel)
+    except AttributeError:
+        pass
+    return papel
+
+
+# ---- Predicados para @user_passes_test ----
+
+def is_diretor(user) -> bool:
+    return papel_do_usuario(user).is_diretor
+
+
+def is_professor(user) -> bool:
+    return papel_do_usuario(user).is_professor
+
+
+def is_estagiario(user) -> bool:
+    return papel_do_usuario(user).is_estagiario
+
+
+# ---- Context processor ----
+
+def papel(request):
+    return {"papel": papel_do_usuario(getattr(request, "user", None))}
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,16 +47,21 @@ INSTALLED_APPS = [
     "financeiro",
     'notificacoes',
     "parametros",
-    
+    "mca",  # comandos de projeto (gerar_dataset, benchmark)
 
 ]
 
 MIDDLEWARE = [
+    'mca.logs.RequestIdMiddleware',  # request_id nos logs (primeiro: vale para os outros middlewares)
+    'mca.metricas.MetricasMiddleware',  # latência e SQL por view (/metrics)
     'django.middleware.security.SecurityMiddleware',
+    'mca.middleware.CompressaoMiddleware',  # gzip de HTML/JSON (antes de quem mexe no corpo)
+    'mca.query_budget.QueryBudgetMiddleware',  # opt-in: contagem de SQL / N+1 por request
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'mca.perfil.ProfilerMiddleware',  # cProfile + SQL por request (superusuário / amostragem)
 
     'mca.middleware.ProfessorRestrictionMiddleware',  # nosso middleware personalizado
 
@@ -67,11 +73,19 @@ MIDDLEWARE = [
     
 ]
 
+# Orçamento de consultas por request (mca/query_budget.py).
+# Desligado por padrão; ative com MCA_QUERY_BUDGET=1 (STRICT=1 faz estourar erro).
+QUERY_BUDGET = {
+    "ENABLED": os.environ.get("MCA_QUERY_BUDGET") == "1",
+    "STRICT": os.environ.get("MCA_QUERY_BUDGET_STRICT") == "1",
+    "NPLUS1_THRESHOLD": 3,
+}
+
 ROOT_URLCONF = 'mca.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'mca.metricas.TemplatesMedidos',  # DjangoTemplates + tempo de render (/metrics)
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -80,6 +94,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'mca.roles.papel',  # papel (grupos/cargo) cacheado do usuário
             ],
         },
     },
@@ -91,11 +106,155 @@ WSGI_APPLICATION = 'mca.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# mca.sqlite = sqlite3 + PRAGMAs de produção (WAL, busy_timeout, mmap...; ver mca/sqlite/base.py).
+# IMMEDIATE: a transação pega o lock de escrita no BEGIN e espera o busy_timeout,
+# em vez de falhar com "database is locked" ao tentar promover leitura -> escrita.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'mca.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'busy_timeout': int(os.environ.get("MCA_SQLITE_BUSY_TIMEOUT_MS", "5000")),
+            },
+        },
+        # conexões persistentes (0 = fecha a cada request); o health check
+        # descarta conexões quebradas antes de reutilizar
+        'CONN_MAX_AGE': int(os.environ.get("MCA_DB_CONN_MAX_AGE", "60")),
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # Réplica só leitura para dashboard/exportações (mca/replica.py).
+    # Atualizada por `manage.py atualizar_replica`; enquanto não existir (ou
+    # estiver velha demais) as views que pedem a réplica leem do default.
+    'reports': {
+        'ENGINE': 'mca.sqlite',
+        'NAME': Path(os.environ.get("MCA_REPORTS_DB", BASE_DIR / 'db_reports.sqlite3')),
+        'OPTIONS': {
+            'pragmas': {'journal_mode': None, 'query_only': 1},
+        },
+        'CONN_MAX_AGE': int(os.environ.get("MCA_DB_CONN_MAX_AGE", "60")),
+        'CONN_HEALTH_CHECKS': True,
+        # nos testes a réplica também é um arquivo separado (não um espelho do default),
+        # vazio até o primeiro `replica.atualizar()`; não migra (é query_only e o
+        # router não deixa mesmo)
+        'TEST': {'NAME': BASE_DIR / 'test_db_reports.sqlite3', 'MIGRATE': False},
+    },
+}
+
+DATABASE_ROUTERS = ["mca.replica.ReplicaRouter"]
+
+# "default": versões de referências/papéis/fragmentos, COUNT estimado etc.
+# "fragmentos": linhas das listas ({% cache ... using="fragmentos" %}, ver
+# mca/fragmentos.py), separado para não expulsar o resto com o volume de linhas
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "fragmentos": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "mca-fragmentos",
+        "TIMEOUT": 60 * 60 * 6,
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+}
+
+# Papel do usuário em cache (mca/roles.py). None = automático: curto com o
+# cache por processo acima (a invalidação não chega aos outros workers),
+# 10 min com cache compartilhado.
+PAPEL = {
+    "TTL": int(os.environ["MCA_PAPEL_TTL"]) if os.environ.get("MCA_PAPEL_TTL") else None,  # segundos
+}
+
+# Versões das chaves de cache (mca/versoes.py: referências, fragmentos,
+# autocomplete). None = automático: expiram em poucos segundos com o cache por
+# processo acima (o incremento não chega aos outros workers), nunca com cache
+# compartilhado.
+VERSOES = {
+    "TTL": int(os.environ["MCA_VERSOES_TTL"]) if os.environ.get("MCA_VERSOES_TTL") else None,  # segundos
+}
+
+REPLICA_RELATORIOS = {
+    "MAX_ATRASO": int(os.environ.get("MCA_REPORTS_MAX_ATRASO", str(60 * 15))),  # segundos
+}
+
+# Rotinas em lote (mca/escrita.py): itens por transação e pausa entre lotes
+ESCRITA_EM_LOTES = {
+    "TAMANHO": 100,
+    "PAUSA": 0.1,  # segundos; >= maior espera do busy handler do SQLite (100 ms)
+}
+
+# Logging (mca/logs.py): JSON por linha, escrito por uma thread (QueueListener)
+# fora do request. Eventos abaixo de WARNING dos loggers em AMOSTRAGEM são
+# amostrados (fração mantida).
+LOGS = {
+    "NIVEL": os.environ.get("MCA_LOG_NIVEL", "INFO"),
+    "ARQUIVO": os.environ.get("MCA_LOG_ARQUIVO") or None,  # None = stderr
+    "AMOSTRAGEM": {
+        "django.server": float(os.environ.get("MCA_LOG_AMOSTRA_ACESSO", "1.0")),  # access log do runserver
+        "mca.middleware": 0.1,
+    },
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "contexto": {"()": "mca.logs.Contexto"},
+        "amostragem": {"()": "mca.logs.Amostragem", "taxas": LOGS["AMOSTRAGEM"]},
+    },
+    "handlers": {
+        "fila": {
+            "class": "mca.logs.FilaHandler",
+            "arquivo": LOGS["ARQUIVO"],
+            "filters": ["amostragem", "contexto"],
+        },
+    },
+    "root": {"handlers": ["fila"], "level": LOGS["NIVEL"]},
+    "loggers": {
+        # o Django já configura console/mail_admins para estes; aqui tudo vai para a fila
+        "django": {"handlers": ["fila"], "level": LOGS["NIVEL"], "propagate": False},
+        "django.server": {"handlers": ["fila"], "level": "INFO", "propagate": False},
+    },
+}
+
+# Profiler por request (mca/perfil.py): superusuário pede com `X-Perfil: 1` ou
+# `?_perfil=1`; AMOSTRA perfila uma fração aleatória dos requests das VIEWS.
+PERFIL = {
+    "AMOSTRA": float(os.environ.get("MCA_PERFIL_AMOSTRA", "0")),
+    "VIEWS": ["turmas:list", "turmas:tabela", "financeiro:list", "financeiro:tabela", "turmas:presenca_detalhe", "home"],
+    "DIR": Path(os.environ.get("MCA_PERFIL_DIR", BASE_DIR / 'media' / 'perfis')),
+    "MAX_PERFIS": 200,
+    "RETENCAO_DIAS": 7,
+}
+
+# Métricas (mca/metricas.py): cada processo soma em memória e grava a cada
+# INTERVALO segundos no ARQUIVO (SQLite local), que o /metrics lê inteiro.
+# Acesso: IPS, `Authorization: Bearer <TOKEN>` ou superusuário.
+METRICAS = {
+    "ATIVO": os.environ.get("MCA_METRICAS", "1") == "1",
+    "ARQUIVO": Path(os.environ.get("MCA_METRICAS_ARQUIVO", BASE_DIR / 'media' / 'metricas.sqlite3')),
+    "INTERVALO": 10,
+    "TOKEN": os.environ.get("MCA_METRICAS_TOKEN", ""),
+    # IPs liberados sem token (ex.: "10.0.0.5,10.0.0.6"). Vazio por padrão: atrás de
+    # um proxy reverso local todo acesso chega como 127.0.0.1.
+    "IPS": [ip.strip() for ip in os.environ.get("MCA_METRICAS_IPS", "").split(",") if ip.strip()],
+}
+
+# Tarefas em segundo plano (mca/jobs.py): importações, exportações e geradores.
+# MODO: "worker" (produção: rode `manage.py rodar_jobs`), "thread" (pool no
+# próprio processo web, sem worker) ou "sincrono" (dentro do request).
+JOBS = {
+    "MODO": os.environ.get("MCA_JOBS_MODO", "thread"),
+    "DIR": Path(os.environ.get("MCA_JOBS_DIR", BASE_DIR / 'media' / 'jobs')),  # planilhas enviadas e geradas
+    "THREADS": int(os.environ.get("MCA_JOBS_THREADS", "2")),
+    "RETENCAO_DIAS": 7,
+}
+
+# Boot (`manage.py tempo_inicializacao`): django.setup() + URLconf num processo
+# novo. Falha acima de ORCAMENTO_MS (mediana) ou se algum módulo de PROIBIDOS
+# (planilhas, geradores) for carregado no boot em vez de sob demanda.
+INICIALIZACAO = {
+    "ORCAMENTO_MS": int(os.environ.get("MCA_INICIALIZACAO_ORCAMENTO_MS", "900")),
+    "PROIBIDOS": ["openpyxl", "numpy", "pandas", "faker"],
 }
 
 
@@ -166,8 +325,4 @@ SERVER_EMAIL = DEFAULT_FROM_EMAIL
 SITE_URL = "127.0.0.1:8000"  # sem barra no final
 
 
-from urllib.parse import quote
-import django.utils.http
-
-django.utils.http.urlquote = quote
 X_FRAME_OPTIONS = "SAMEORIGIN"
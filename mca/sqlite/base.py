@@ -0,0 +1,59 @@
+# mca/sqlite/base.py
+"""
+Backend SQLite "de produção": o sqlite3 do Django + PRAGMAs por conexão.
+
+Com o journal padrão (DELETE) um writer bloqueia também os leitores, e as
+rotinas em lote (cobranças, listas automáticas) seguravam o banco inteiro
+até o fim — quem chegasse no meio via "database is locked". Aqui:
+
+- journal_mode=WAL: leitores não esperam o writer (e vice-versa);
+- synchronous=NORMAL: seguro com WAL (perde no máximo o último commit numa
+  queda de energia, nunca corrompe) e bem mais barato que FULL;
+- busy_timeout: writers esperam a vez em vez de falhar na hora;
+- mmap_size / cache_size / temp_store: leitura via mmap, cache de página
+  maior e tabelas temporárias (ORDER BY, GROUP BY) em memória.
+
+    DATABASES = {"default": {
+        "ENGINE": "mca.sqlite",
+        "OPTIONS": {"transaction_mode": "IMMEDIATE", "pragmas": {"busy_timeout": 10000}},
+    }}
+
+`OPTIONS["pragmas"]` sobrescreve/acrescenta aos padrões (valor None remove).
+Para serializar escritas em lote, ver mca/escrita.py.
+"""
+from __future__ import annotations
+
+from django.db.backends.sqlite3 import base
+
+PRAGMAS_PADRAO = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,         # ms
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -20000,         # negativo = KiB (≈ 20 MB por conexão)
+    "temp_store": "MEMORY",
+}
+
+# não se aplicam a banco em memória (testes)
+_SO_ARQUIVO = {"journal_mode", "mmap_size"}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pragmas", None)  # não é argumento do sqlite3.connect
+        return params
+
+    def pragmas(self) -> dict:
+        extra = self.settings_dict["OPTIONS"].get("pragmas") or {}
+        pragmas = {k: v for k, v in {**PRAGMAS_PADRAO, **extra}.items() if v is not None}
+        if self.is_in_memory_db():
+            for k in _SO_ARQUIVO:
+                pragmas.pop(k, None)
+        return pragmas
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for nome, valor in self.pragmas().items():
+            conn.execute(f"PRAGMA {nome} = {valor}")
+        return conn
@@ -0,0 +1,14 @@
+from django import template
+
+from mca import fragmentos
+
+register = template.Library()
+
+
+@register.simple_tag
+def versao_fragmento(nome):
+    """
+    Versão de um fragmento do registro (mca/fragmentos.py), para a chave do {% cache %}.
+    Uso: {% versao_fragmento "turmas.linha" as vfrag %}
+    """
+    return fragmentos.versao(nome)
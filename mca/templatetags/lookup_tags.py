@@ -0,0 +1,16 @@
+from django import template
+
+from mca.lookups import RemoteSelect
+
+register = template.Library()
+
+
+@register.simple_tag
+def remote_select(lookup, name, value="", placeholder="--", **attrs):
+    """
+    Renderiza um <select> remoto (ver mca/lookups.py).
+    Uso: {% remote_select "professores" "professor" professor_id "Todos" required=True %}
+    """
+    attrs.setdefault("class", "form-select")
+    attrs = {k: v for k, v in attrs.items() if v not in (False, None)}
+    return RemoteSelect(lookup, attrs=attrs, placeholder=placeholder).render(name, value or "")
@@ -1,8 +1,10 @@
 from django import template
 
+from mca.roles import papel_do_usuario
+
 register = template.Library()
 
 @register.filter(name='has_group')
 def has_group(user, group_name):
     """Retorna True se o usuário pertence ao grupo informado."""
-    return user.groups.filter(name=group_name).exists()
+    return papel_do_usuario(user).has_group(group_name)
@@ -0,0 +1,75 @@
+# mca/testes.py
+"""
+Apoio dos testes.
+
+`OrcamentoViewsTestCase`, base dos testes de orçamento de consultas
+(mca/query_budget.py): um tenant pequeno de `gerar_dataset` e um diretor logado; cada teste chama
+`assertDentroDoOrcamento(url)`, que falha se a view fizer mais consultas
+que o `@orcamento_consultas` declarado nela. Os caches começam vazios em
+cada teste: o orçamento vale para a primeira visita, sem nada aquecido.
+
+`Processo` simula outro worker com o cache `default` por processo, para
+testar invalidações que dependem da expiração das versões (mca/versoes.py).
+"""
+from contextlib import ExitStack, contextmanager
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+
+from . import referencias, versoes
+from .dataset import ParametrosDataset, gerar_dataset
+from .query_budget import OrcamentoConsultasMixin
+
+DATASET_TESTES = ParametrosDataset(
+    condominios=2, modalidades_por_condominio=2, professores=4, turmas_por_modalidade=2,
+    clientes=40, meses=2,
+)
+
+
+class OrcamentoViewsTestCase(OrcamentoConsultasMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        gerar_dataset(DATASET_TESTES)
+        cls.diretor = User.objects.create_superuser("diretor", "diretor@example.com", "x")
+
+    def setUp(self):
+        for alias in ("default", "fragmentos"):
+            caches[alias].clear()
+        self.client.force_login(self.diretor)
+
+
+class Processo:
+    """
+    Outro worker: cache `default` e memória de referências próprios.
+    `modulos` são módulos extras cujo `cache` também é trocado.
+
+        a, b = Processo.par(self, clientes_services)
+        with b.ativo():
+            ...  # escrita/invalidação "no outro processo"
+    """
+
+    TTL = 0.05  # versões expiram rápido no teste (VERSAO_TTL_LOCAL)
+
+    def __init__(self, nome: str, modulos=()):
+        self.cache = LocMemCache(f"teste-{nome}", {})
+        self.cache.clear()
+        self.local: dict = {}
+        self.modulos = (versoes, referencias, *modulos)
+
+    @classmethod
+    def par(cls, teste, *modulos) -> tuple["Processo", "Processo"]:
+        patcher = mock.patch.object(versoes, "VERSAO_TTL", cls.TTL)
+        patcher.start()
+        teste.addCleanup(patcher.stop)
+        return cls("a", modulos), cls("b", modulos)
+
+    @contextmanager
+    def ativo(self):
+        with ExitStack() as pilha:
+            pilha.enter_context(mock.patch.object(referencias, "_local", self.local))
+            for modulo in self.modulos:
+                pilha.enter_context(mock.patch.object(modulo, "cache", self.cache))
+            yield
@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from condominios.models import Condominio
+
+from . import escrita, fragmentos, jobs, metricas, planos, referencias, replica, versoes
+from .models import Job
+from .testes import Processo
+
+
+class ReplicaRelatoriosTests(TransactionTestCase):
+    """Roteamento opt-in para `reports` e a cópia de `atualizar()` (mca/replica.py)."""
+
+    databases = {"default", "reports"}
+
+    def setUp(self):
+        replica.atualizar()
+
+    def _condominio(self, n: int) -> Condominio:
+        return Condominio.objects.create(cnpj=f"{n:014d}", nome=f"Condomínio {n}")
+
+    def test_leituras_no_opt_in_vao_para_a_replica(self):
+        c = self._condominio(1)  # gravado depois da cópia: só existe no default
+        self.assertTrue(Condominio.objects.filter(pk=c.pk).exists())
+        with replica.replica():
+            self.assertEqual(Condominio.objects.all().db, replica.ALIAS)
+            self.assertFalse(Condominio.objects.filter(pk=c.pk).exists())
+        self.assertEqual(Condominio.objects.all().db, "default")
+
+    def test_escritas_no_opt_in_continuam_no_default(self):
+        with replica.replica():
+            c = self._condominio(2)
+        self.assertEqual(c._state.db, "default")
+        self.assertTrue(Condominio.objects.using("default").filter(pk=c.pk).exists())
+        self.assertFalse(Condominio.objects.using(replica.ALIAS).filter(pk=c.pk).exists())
+
+    def test_atualizar_copia_linhas_commitadas(self):
+        c = self._condominio(3)
+        self.assertFalse(Condominio.objects.using(replica.ALIAS).filter(pk=c.pk).exists())
+        info = replica.atualizar()
+        self.assertGreater(info["bytes"], 0)
+        self.assertTrue(Condominio.objects.using(replica.ALIAS).filter(pk=c.pk).exists())
+        self.assertFalse(os.path.exists(info["arquivo"] + ".tmp"))
+
+    def test_replica_velha_e_ignorada(self):
+        velho = time.time() - replica.MAX_ATRASO - 60
+        os.utime(replica._caminho(replica.ALIAS), (velho, velho))
+        replica._stat["em"] = 0.0
+        with replica.replica():
+            self.assertEqual(Condominio.objects.all().db, "default")
+
+
+class HeartbeatJobsTests(TransactionTestCase):
+    """Jobs longos sem `progresso` não viram órfãos enquanto o processo está vivo."""
+
+    def _rodando(self, **kwargs) -> Job:
+        velho = timezone.now() - jobs.ORFAO_APOS - timedelta(minutes=5)
+        return Job.objects.create(tipo="testes.longo", titulo="Longo", status="RODANDO",
+                                  iniciado_em=velho, heartbeat=velho, **kwargs)
+
+    def test_heartbeat_renovado_sem_progresso(self):
+        vivo, morto = self._rodando(), self._rodando()
+        batimentos = jobs._Batimentos()
+        with mock.patch.object(jobs, "INTERVALO_HEARTBEAT", 0.05):
+            batimentos.incluir(vivo.pk)
+            try:
+                prazo = time.monotonic() + 5
+                while time.monotonic() < prazo:
+                    vivo.refresh_from_db()
+                    if vivo.heartbeat > timezone.now() - timedelta(minutes=1):
+                        break
+                    time.sleep(0.05)
+                self.assertEqual(jobs.recuperar_orfaos(), 1)
+            finally:
+                batimentos.remover(vivo.pk)
+        vivo.refresh_from_db()
+        morto.refresh_from_db()
+        self.assertEqual(vivo.status, "RODANDO")
+        self.assertEqual(morto.status, "FALHOU")
+
+
+class AcessoMetricasTests(TestCase):
+    """Quem pode ler o `/metrics` (mca.metricas.autorizado)."""
+
+    def test_loopback_sem_token_e_negado(self):
+        # o client de teste chega como 127.0.0.1, como tudo atrás de um proxy local
+        self.assertEqual(self.client.get(reverse("metricas")).status_code, 403)
+
+    def test_token_libera(self):
+        with mock.patch.object(metricas, "TOKEN", "segredo"):
+            r = self.client.get(reverse("metricas"), HTTP_AUTHORIZATION="Bearer segredo")
+            self.assertEqual(r.status_code, 200)
+            r = self.client.get(reverse("metricas"), HTTP_AUTHORIZATION="Bearer outro")
+            self.assertEqual(r.status_code, 403)
+
+    def test_superusuario_libera(self):
+        self.client.force_login(get_user_model().objects.create_superuser("diretor", "d@x.com", "x"))
+        self.assertEqual(self.client.get(reverse("metricas")).status_code, 200)
+
+    def test_ips_configurados_liberam(self):
+        with mock.patch.object(metricas, "IPS", {"10.0.0.5"}):
+            self.assertEqual(self.client.get(reverse("metricas"), REMOTE_ADDR="10.0.0.5").status_code, 200)
+            self.assertEqual(self.client.get(reverse("metricas")).status_code, 403)
+
+
+class VersoesPorProcessoTests(TestCase):
+    """Invalidação feita em outro processo com cache por processo (mca/versoes.py)."""
+
+    TTL = Processo.TTL
+
+    def setUp(self):
+        self.a, self.b = Processo.par(self)
+
+    def test_referencia_renomeada_em_outro_processo(self):
+        c = Condominio.objects.create(cnpj="00000000000191", nome="Antigo")
+        with self.a.ativo():
+            self.assertEqual(referencias.nomes("condominios")[c.pk], "Antigo")
+            v_antiga = referencias.versao("condominios")
+        with self.b.ativo():
+            Condominio.objects.filter(pk=c.pk).update(nome="Novo")
+            referencias.invalidar("condominios")
+        with self.a.ativo():
+            self.assertEqual(referencias.nomes("condominios")[c.pk], "Antigo")  # ainda na versão do processo
+            time.sleep(self.TTL * 2)
+            self.assertEqual(referencias.nomes("condominios")[c.pk], "Novo")
+            self.assertGreater(referencias.versao("condominios"), v_antiga)  # nunca volta a uma versão usada
+
+    def test_fragmento_invalidado_em_outro_processo(self):
+        with self.a.ativo():
+            v_antiga = fragmentos.versao("turmas.linha")
+        with self.b.ativo():
+            v_b = fragmentos.versao("turmas.linha")
+            fragmentos.invalidar("turmas.linha")
+            self.assertNotEqual(fragmentos.versao("turmas.linha"), v_b)  # no próprio processo, na hora
+        with self.a.ativo():
+            self.assertEqual(fragmentos.versao("turmas.linha"), v_antiga)
+            time.sleep(self.TTL * 2)
+            self.assertNotEqual(fragmentos.versao("turmas.linha"), v_antiga)
+
+
+class PlanosConsultasTests(TestCase):
+    """Consultas quentes de mca/planos.py sem varredura completa (também: `manage.py verificar_planos`)."""
+
+    def test_planos_usam_indices(self):
+        resultados = planos.verificar()
+        self.assertTrue(resultados)
+        for p in resultados:
+            with self.subTest(p.nome):
+                self.assertTrue(p.ok, p.erro or f"varredura completa em {', '.join(p.varreduras)}:\n"
+                                      + "\n".join(p.linhas))
+
+
+class EscritaEmLotesTests(TransactionTestCase):
+    """Transação por lote de `escrita.em_lotes` e a `fila_escrita` (mca/escrita.py)."""
+
+    def _gravar(self, falhar_no_lote=None):
+        chamadas = []
+
+        def func(lote):
+            chamadas.append(lote)
+            for n in lote:
+                Condominio.objects.create(cnpj=f"{n:014d}", nome=f"Condomínio {n}")
+            if len(chamadas) == falhar_no_lote:
+                raise RuntimeError("falha no lote")
+            return len(lote)
+        return func
+
+    def _gravados(self) -> list[int]:
+        return sorted(int(c) for c in Condominio.objects.values_list("cnpj", flat=True))
+
+    def test_commit_por_lote_fora_de_atomic(self):
+        with self.assertRaises(RuntimeError):
+            escrita.em_lotes(range(1, 6), self._gravar(falhar_no_lote=2), tamanho=2, pausa=0)
+        self.assertEqual(self._gravados(), [1, 2])  # o primeiro lote ficou, o segundo voltou
+
+        Condominio.objects.all().delete()
+        self.assertEqual(escrita.em_lotes(range(1, 6), self._gravar(), tamanho=2, pausa=0), [2, 2, 1])
+        self.assertEqual(self._gravados(), [1, 2, 3, 4, 5])
+
+    def test_savepoints_dentro_de_atomic_externo(self):
+        with transaction.atomic():
+            with self.assertRaises(RuntimeError):
+                escrita.em_lotes(range(1, 6), self._gravar(falhar_no_lote=2), tamanho=2, pausa=0)
+            self.assertEqual(self._gravados(), [1, 2])  # savepoint do lote 2 desfeito
+            transaction.set_rollback(True)
+        self.assertEqual(self._gravados(), [])  # nada foi commitado antes do atomic externo
+
+    def test_erro_no_progresso_mantem_lotes_anteriores(self):
+        def progresso(feitos, total):
+            self.assertEqual(total, 5)
+            if feitos >= 4:
+                raise RuntimeError("cancelado")
+
+        with self.assertRaises(RuntimeError):
+            escrita.em_lotes(list(range(1, 6)), self._gravar(), tamanho=2, pausa=0, progresso=progresso)
+        self.assertEqual(self._gravados(), [1, 2, 3, 4])  # o lote do progresso já estava commitado
+
+    def test_fila_escrita_serializa(self):
+        entrou = threading.Event()
+
+        def outra_rotina():
+            with escrita.fila_escrita():
+                entrou.set()
+
+        with escrita.fila_escrita():
+            t = threading.Thread(target=outra_rotina)
+            t.start()
+            self.assertFalse(entrou.wait(0.1))
+        t.join(5)
+        self.assertTrue(entrou.is_set())
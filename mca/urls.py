@@ -3,10 +3,15 @@ from django.urls import path,include
 from django.contrib.auth import views as auth_views
 from django.views.generic import TemplateView
 from django.contrib.auth.decorators import login_required
-from .views import home
+from .views_perfil import perfis_lista, perfil_detalhe, perfil_arquivo
+from .views import home, lookup_json, job_lista, job_detalhe, job_status, job_arquivo, job_cancelar, metricas_prometheus
 
 
 urlpatterns = [
+    # perfis do ProfilerMiddleware (mca/perfil.py) — antes do admin.site.urls
+    path("admin/perfis/", perfis_lista, name="perfis_lista"),
+    path("admin/perfis/<str:perfil_id>/", perfil_detalhe, name="perfil_detalhe"),
+    path("admin/perfis/<str:perfil_id>/<str:ext>/", perfil_arquivo, name="perfil_arquivo"),
     path('admin/', admin.site.urls),
     path("", home, name="home"),
 
@@ -21,6 +26,16 @@ urlpatterns = [
     path("", include(("turmas.urls", "turmas"), namespace="turmas")),
     path("", include(("financeiro.urls", "financeiro"), namespace="financeiro")),
     path("parametros/", include("parametros.urls")),
+    path("lookups/<slug:nome>/", lookup_json, name="lookup"),  # selects remotos
+
+    # tarefas em segundo plano (mca/jobs.py)
+    path("jobs/", job_lista, name="job_lista"),
+    path("jobs/<int:job_id>/", job_detalhe, name="job_detalhe"),
+    path("jobs/<int:job_id>/status/", job_status, name="job_status"),
+    path("jobs/<int:job_id>/arquivo/", job_arquivo, name="job_arquivo"),
+    path("jobs/<int:job_id>/cancelar/", job_cancelar, name="job_cancelar"),
+
+    path("metrics", metricas_prometheus, name="metricas"),  # Prometheus (mca/metricas.py)
 
     # home
     
@@ -0,0 +1,72 @@
+# mca/versoes.py
+"""
+Contadores de versão no cache `default`.
+
+Referências (mca/referencias.py), fragmentos (mca/fragmentos.py) e o
+autocomplete de clientes guardam dados sob `<prefixo>:<versão>` e invalidam
+incrementando a versão:
+
+    v = versoes.versao("ref:versao:condominios")
+    ...
+    versoes.incrementar("ref:versao:condominios")
+
+O incremento só chega aos outros processos se o cache `default` for
+compartilhado (Redis, Memcached, banco). Com um cache por processo (LocMem,
+o padrão) cada worker do gunicorn e o `rodar_jobs` têm a própria versão, e
+sem expiração a versão antiga valeria até o processo reiniciar. Por isso,
+nesse caso, a versão expira em `VERSAO_TTL_LOCAL` segundos: é o atraso
+máximo para uma escrita aparecer nos outros processos. `VERSOES["TTL"]` nas
+settings fixa o valor; o check `mca.E002` recusa um TTL longo (ou nenhum)
+com cache por processo.
+
+Versão nova (primeira leitura ou depois de expirar) vem do relógio, nunca
+de 1: um processo não volta a uma versão que já usou e acha dados velhos
+guardados sob ela.
+"""
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSAO_TTL_LOCAL = 5  # segundos; cache por processo: atraso máximo de uma invalidação nos outros workers
+_BACKENDS_POR_PROCESSO = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def cache_por_processo() -> bool:
+    return settings.CACHES.get("default", {}).get("BACKEND") in _BACKENDS_POR_PROCESSO
+
+
+def versao_ttl() -> Optional[int]:
+    """TTL das versões: `VERSOES["TTL"]`, ou automático (curto por processo, sem expiração compartilhado)."""
+    ttl = getattr(settings, "VERSOES", {}).get("TTL")
+    if ttl is not None:
+        return ttl
+    return VERSAO_TTL_LOCAL if cache_por_processo() else None
+
+
+VERSAO_TTL = versao_ttl()
+
+
+def _nova() -> int:
+    return time.time_ns() // 1000  # microssegundos: maior que qualquer versão já usada
+
+
+def versao(chave: str) -> int:
+    v = cache.get(chave)
+    if v is None:
+        cache.add(chave, _nova(), VERSAO_TTL)
+        v = cache.get(chave) or _nova()
+    return v
+
+
+def incrementar(chave: str) -> None:
+    try:
+        cache.incr(chave)  # mantém a expiração da chave
+    except ValueError:
+        cache.set(chave, _nova(), VERSAO_TTL)
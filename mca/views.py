@@ -1,23 +1,19 @@
 # mca/views.py
 from decimal import Decimal
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from django.db.models import Sum, F, Value as V, DecimalField
 from django.db.models.functions import Coalesce
+from django.utils.timezone import localdate
 
 from financeiro.models import Lancamento
 from turmas.models import Turma, Matricula
 
 from django.contrib.auth.decorators import login_required, user_passes_test
 
-def is_diretor(user):
-    return user.groups.filter(name='Diretoria').exists() or user.is_superuser
-
-def is_professor(user):
-    return user.groups.filter(name='Professor').exists()
-
-def is_estagiario(user):
-    return user.groups.filter(name='Estagiario').exists()
+from .roles import is_diretor, is_professor, is_estagiario
+from .replica import usar_replica
 
 def _sum_saldo(qs):
     """
@@ -43,7 +39,9 @@ def _detect_field(model, candidates):
 
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
+@usar_replica
 def home(request):
+    hoje = localdate()
     # --- Financeiro: totais de saldo (exclui CANCELADO) ---
     base = Lancamento.objects.exclude(status="CANCELADO")
 
@@ -55,7 +53,7 @@ def home(request):
     valor_field = _detect_field(Turma, ["valor", "preco"])
     if valor_field:
         faturamento_previsto = (
-            Matricula.objects.filter(ativa=True)
+            Matricula.objects.ativas_em(hoje)
             .aggregate(total=Coalesce(Sum(F(f"turma__{valor_field}")), V(0), output_field=DecimalField(max_digits=14, decimal_places=2)))
             .get("total") or Decimal('0')
         )
@@ -69,7 +67,7 @@ def home(request):
                 total_cap=Coalesce(Sum(F(cap_field)), V(0), output_field=DecimalField(max_digits=14, decimal_places=2))
             ).get("total_cap") or Decimal('0')
         )
-        matriculas_ativas = Matricula.objects.filter(ativa=True).count()
+        matriculas_ativas = Matricula.objects.ativas_em(hoje).count()
         if cap_total and Decimal(cap_total) > 0:
             ocupacao_percentual = (Decimal(matriculas_ativas) / Decimal(cap_total)) * Decimal('100')
 
@@ -95,3 +93,131 @@ def home(request):
         "proximos_pagar": proximos_pagar,
     }
     return render(request, "home.html", ctx)
+
+
+# ---------------- Lookups (selects remotos) ----------------
+from django.http import HttpResponseForbidden, HttpResponseNotFound, JsonResponse
+from django.views.decorators.http import require_GET
+
+from . import lookups as lk
+
+
+@require_GET
+@login_required
+def lookup_json(request, nome: str):
+    """Opções paginadas de um select remoto (ver mca/lookups.py)."""
+    lookup = lk.obter(nome)
+    if lookup is None:
+        return HttpResponseNotFound("Lookup inexistente.")
+    if not lk.pode_usar(lookup, request.user):
+        return HttpResponseForbidden("Sem permissão.")
+
+    ids = request.GET.get("ids")
+    if ids is not None:
+        textos = lk.rotulos(lookup, ids.split(","))
+        return JsonResponse({"results": [{"id": int(k), "text": v} for k, v in textos.items()], "more": False})
+
+    try:
+        page = max(1, int(request.GET.get("page", 1)))
+    except (TypeError, ValueError):
+        page = 1
+    results, mais = lk.pesquisar(lookup, request.GET.get("q", ""), page)
+    return JsonResponse({"results": results, "more": mais})
+
+
+# ---------------- Jobs (tarefas em segundo plano) ----------------
+from django.http import FileResponse, Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.shortcuts import get_object_or_404, redirect
+from django.views.decorators.http import require_POST
+
+from . import jobs
+from .models import Job
+
+
+def _job_do_usuario(request, job_id: int) -> Job:
+    """O dono vê o próprio job; diretor vê todos."""
+    job = get_object_or_404(Job, pk=job_id)
+    if job.usuario_id != request.user.id and not is_diretor(request.user):
+        raise Http404("Job inexistente.")
+    return job
+
+
+def _job_json(job: Job) -> dict:
+    return {
+        "id": job.pk,
+        "status": job.status,
+        "status_display": job.get_status_display(),
+        "progresso": job.progresso,
+        "total": job.total,
+        "percentual": job.percentual,
+        "mensagem": job.mensagem,
+        "terminado": job.terminado,
+        "arquivo": bool(job.arquivo),
+    }
+
+
+@login_required
+def job_lista(request):
+    qs = Job.objects.select_related("usuario")
+    if not is_diretor(request.user):
+        qs = qs.filter(usuario=request.user)
+    return render(request, "jobs/lista.html", {"jobs": qs[:50]})
+
+
+@login_required
+def job_detalhe(request, job_id: int):
+    job = _job_do_usuario(request, job_id)
+    erros = (job.resultado or {}).get("erros") or []
+    return render(request, "jobs/detalhe.html", {"job": job, "erros": erros[:20], "total_erros": len(erros)})
+
+
+@require_GET
+@login_required
+def job_status(request, job_id: int):
+    return JsonResponse(_job_json(_job_do_usuario(request, job_id)))
+
+
+@login_required
+def job_arquivo(request, job_id: int):
+    job = _job_do_usuario(request, job_id)
+    caminho = jobs.caminho_arquivo(job)
+    if caminho is None:
+        raise Http404("Arquivo não disponível (expirado ou job sem resultado).")
+    # o arquivo de um job não muda: baixar de novo responde 304
+    mtime = int(caminho.stat().st_mtime)
+    etag = quote_etag(f"{job.pk}-{job.validador or mtime}")
+    nao_modificado = get_conditional_response(request, etag=etag, last_modified=mtime)
+    if nao_modificado is not None:
+        return nao_modificado
+    response = FileResponse(open(caminho, "rb"), as_attachment=True, filename=caminho.name)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(mtime)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@require_POST
+@login_required
+def job_cancelar(request, job_id: int):
+    job = _job_do_usuario(request, job_id)
+    if jobs.cancelar(job):
+        messages.info(request, "Cancelamento solicitado.")
+    else:
+        messages.warning(request, "O job já terminou.")
+    return redirect(job)
+
+
+# ---------------- Métricas (mca/metricas.py) ----------------
+from django.http import HttpResponse
+
+from . import metricas
+
+
+@require_GET
+def metricas_prometheus(request):
+    """Texto do Prometheus. Sem login: o scraper entra por IP ou token."""
+    if not metricas.autorizado(request):
+        return HttpResponseForbidden("Acesso negado.")
+    return HttpResponse(metricas.texto(), content_type="text/plain; version=0.0.4; charset=utf-8")
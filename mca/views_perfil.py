@@ -0,0 +1,52 @@
+# mca/views_perfil.py
+"""Páginas (no /admin/) dos perfis capturados pelo ProfilerMiddleware (mca/perfil.py)."""
+from django.contrib import admin
+from django.contrib.auth.decorators import user_passes_test
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+
+from . import perfil
+
+
+def _superuser(user) -> bool:
+    return user.is_active and user.is_superuser
+
+
+@user_passes_test(_superuser, login_url="admin:login")
+def perfis_lista(request):
+    view = request.GET.get("view", "")
+    ctx = {
+        **admin.site.each_context(request),
+        "title": "Perfis de requests (mais lentos)",
+        "perfis": perfil.listar(limite=100, view=view),
+        "view": view,
+        "views_alvo": sorted(perfil.VIEWS),
+        "amostra": perfil.AMOSTRA,
+    }
+    return render(request, "admin/perfis/lista.html", ctx)
+
+
+@user_passes_test(_superuser, login_url="admin:login")
+def perfil_detalhe(request, perfil_id: str):
+    meta = perfil.carregar(perfil_id)
+    if meta is None:
+        raise Http404("Perfil inexistente (podado pela retenção?).")
+    ordem = request.GET.get("ordem", "cumulative")
+    if ordem not in ("cumulative", "tottime", "calls"):
+        ordem = "cumulative"
+    ctx = {
+        **admin.site.each_context(request),
+        "title": f"{meta['metodo']} {meta['caminho']}",
+        "perfil": meta,
+        "ordem": ordem,
+        "funcoes": perfil.top_funcoes(perfil_id, 40, ordem),
+    }
+    return render(request, "admin/perfis/detalhe.html", ctx)
+
+
+@user_passes_test(_superuser, login_url="admin:login")
+def perfil_arquivo(request, perfil_id: str, ext: str):
+    caminho = perfil.arquivo(perfil_id, ext)
+    if caminho is None:
+        raise Http404("Arquivo inexistente.")
+    return FileResponse(open(caminho, "rb"), as_attachment=True, filename=caminho.name)
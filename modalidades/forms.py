@@ -3,10 +3,13 @@ from django import forms
 from .models import Modalidade
 # ADICIONE:
 from condominios.models import Condominio
+from mca.referencias import ReferenciaChoiceField
 
 class ModalidadeForm(forms.ModelForm):
     # NOVO: exige condomínio
-    condominio = forms.ModelChoiceField(
+    # opções vindas do cache de referências (renderizar não consulta o banco)
+    condominio = ReferenciaChoiceField(
+        "condominios", filtro=lambda r: r["ativo"],
         queryset=Condominio.objects.filter(ativo=True).order_by("nome"),
         required=True,
         label="Condomínio",
@@ -27,7 +30,8 @@ class ModalidadeFiltroForm(forms.Form):
     ativos = forms.ChoiceField(choices=ATIVOS_CHOICES, required=False)
 
     # NOVO: filtro por condomínio (opcional)
-    condominio = forms.ModelChoiceField(
+    condominio = ReferenciaChoiceField(
+        "condominios", filtro=lambda r: r["ativo"],
         queryset=Condominio.objects.filter(ativo=True).order_by("nome"),
         required=False, label="Condomínio",
         widget=forms.Select(attrs={"class":"form-select"})
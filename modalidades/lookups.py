@@ -0,0 +1,17 @@
+# modalidades/lookups.py — selects remotos (ver mca/lookups.py)
+from django.db.models import Q
+
+from mca.lookups import registrar
+
+from .models import Modalidade
+
+
+registrar(
+    "modalidades",
+    queryset=lambda: Modalidade.objects.select_related("condominio")
+    .only("id", "nome", "condominio__nome").order_by("nome", "condominio__nome", "id"),
+    busca=lambda qs, q: qs.filter(Q(nome__icontains=q) | Q(condominio__nome__icontains=q)),
+    rotulo=str,  # "Nome — Condomínio" (condomínio já vem no select_related)
+    permissao=lambda u: u.is_authenticated,  # filtro da lista de turmas
+    referencia="modalidades",
+)
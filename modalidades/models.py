@@ -6,8 +6,10 @@ from django.db import models
 from django.utils.text import slugify
 # ADICIONE:
 from condominios.models import Condominio
+from mca import referencias
+from mca.alteracoes import RastreiaAlteracoes
 
-class Modalidade(models.Model):
+class Modalidade(RastreiaAlteracoes, models.Model):
     nome = models.CharField("Nome", max_length=100)
     slug = models.SlugField("Slug", max_length=120, unique=True, blank=True)
     descricao = models.TextField("Descrição", blank=True)
@@ -46,5 +48,8 @@ class Modalidade(models.Model):
 
     def __str__(self):
         # ajuda na identificação visual
-        return f"{self.nome} — {self.condominio.nome if self.condominio_id else 'SEM CONDOMÍNIO'}"
+        if not self.condominio_id:
+            return f"{self.nome} — SEM CONDOMÍNIO"
+        condominio = referencias.relacionado(self, "condominio", "condominios")
+        return f"{self.nome} — {condominio.nome}"
 
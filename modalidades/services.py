@@ -4,6 +4,8 @@ from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.db import transaction
 from django.db.models import Q
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from mca import alteracoes
+
 from .models import Modalidade
 from condominios.models import Condominio
 
@@ -88,16 +90,15 @@ def atualizar_modalidade(pk: int, data: Dict[str, Any]) -> Modalidade:
         data.get("condominio") or data.get("condominio_id") or obj.condominio_id
     )
 
-    if _nome_existe_no_condominio(novo_nome, novo_condominio_id, exclude_id=obj.id):
+    mudou_nome = novo_nome != obj.nome or novo_condominio_id != obj.condominio_id
+    if mudou_nome and _nome_existe_no_condominio(novo_nome, novo_condominio_id, exclude_id=obj.id):
         raise ModalidadeJaExiste("Já existe uma modalidade com este nome neste condomínio.")
 
-    obj.nome = novo_nome
-    obj.descricao = novo_descricao
-    obj.ativo = novo_ativo
-    obj.condominio_id = novo_condominio_id
-    obj.slug = ""  # se quiser recriar slug quando renomeia
-    obj.full_clean()
-    obj.save()
+    novos = {"nome": novo_nome, "descricao": novo_descricao, "ativo": novo_ativo,
+             "condominio_id": novo_condominio_id}
+    if novo_nome != obj.nome:
+        novos["slug"] = ""  # recriado do nome no save()
+    alteracoes.atualizar_campos(obj, novos)
     return obj
 
 
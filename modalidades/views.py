@@ -9,14 +9,7 @@ from . import services as cs
 
 from django.contrib.auth.decorators import login_required, user_passes_test
 
-def is_diretor(user):
-    return user.groups.filter(name='Diretoria').exists() or user.is_superuser
-
-def is_professor(user):
-    return user.groups.filter(name='Professor').exists()
-
-def is_estagiario(user):
-    return user.groups.filter(name='Estagiario').exists()
+from mca.roles import is_diretor, is_professor, is_estagiario
 
 
 @login_required(login_url='/turmas')
@@ -1,5 +1,6 @@
 # notificacoes/emails.py
 from __future__ import annotations
+import logging
 from typing import Iterable, Optional
 from pathlib import Path
 
@@ -8,6 +9,22 @@ from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 
+from mca import metricas
+
+logger = logging.getLogger(__name__)
+
+ENVIOS = metricas.Histograma("mca_email_envio_seconds", "Duração dos envios de e-mail.", ("template",),
+                             baldes=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30))
+FALHAS = metricas.Contador("mca_email_falhas_total", "Envios de e-mail que levantaram erro.", ("template",))
+
+
+def _enviar(msg: EmailMultiAlternatives, template: str) -> None:
+    try:
+        with ENVIOS.cronometrar(template=template):
+            msg.send(fail_silently=False)
+    except Exception:
+        FALHAS.inc(template=template)
+        raise
 
 def _attach_files(msg: EmailMultiAlternatives, paths: Optional[Iterable[Path]] = None):
     for p in (paths or []):
@@ -44,7 +61,7 @@ def send_email_html(*, subject, to, template, context, attach_paths=None):
             msg.attach(p.name, p.read_bytes(), "application/pdf")
 
     # IMPORTANTE: se der erro, vai levantar exceção (bom p/ debug)
-    msg.send(fail_silently=False)
+    _enviar(msg, template)
     return True
 
 
@@ -68,7 +85,7 @@ def send_email_html(*, subject: str, to: str, template: str, context: dict) -> b
         to=[to],
     )
     msg.attach_alternative(html, "text/html")
-    msg.send(fail_silently=False)  # importante: mostra erro se houver
+    _enviar(msg, template)  # importante: mostra erro se houver
     return True
 
 
@@ -78,7 +95,8 @@ def send_confirmacao_matricula(matricula) -> bool:
     participante = matricula.participante_nome or cliente.nome_razao
 
     if not cliente.email:
-        print("Cliente sem e-mail, abortando.")
+        logger.warning("confirmação de matrícula não enviada: cliente sem e-mail",
+                       extra={"matricula_id": matricula.pk, "cliente_id": cliente.pk})
         return False
 
     ctx = {
@@ -90,9 +108,8 @@ def send_confirmacao_matricula(matricula) -> bool:
     subject = f"Confirmação de matrícula — {turma.modalidade.nome} em {turma.condominio.nome}"
     exemplo_pdf = Path(getattr(settings, "BASE_DIR", ".")) / "exemplo.pdf"
 
-    print("EMAIL_BACKEND:", settings.EMAIL_BACKEND)
-    print("Enviando para:", cliente.email)
-    print("Subject:", subject)
+    logger.debug("enviando confirmação de matrícula",
+                 extra={"matricula_id": matricula.pk, "backend": settings.EMAIL_BACKEND})
     ok = send_email_html(
         subject=subject,
         to=cliente.email,
@@ -100,7 +117,8 @@ def send_confirmacao_matricula(matricula) -> bool:
         context=ctx,
         attach_paths=[exemplo_pdf],
     )
-    print("Resultado send:", ok)
+    logger.info("confirmação de matrícula enviada" if ok else "confirmação de matrícula não enviada",
+                extra={"matricula_id": matricula.pk, "cliente_id": cliente.pk})
     return ok
 
 
@@ -209,3 +227,15 @@ def send_matricula_resumo(matricula) -> bool:
         template="emails/matricula_resumo.html",
         context=ctx,
     )
+
+
+def send_convite_funcionario(user, link: str) -> bool:
+    """Acesso de funcionário criado sem senha (funcionarios/acessos.py): link para definir a senha."""
+    if not user.email:
+        return False
+    return send_email_html(
+        subject="Seu acesso ao sistema MCA",
+        to=user.email,
+        template="emails/convite_funcionario.html",
+        context={"user": user, "nome": user.get_full_name() or user.username, "link": link},
+    )
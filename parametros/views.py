@@ -3,9 +3,10 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import render, redirect, get_object_or_404
 from .models import ParametroContrato
 from .forms import ParametroContratoForm
+from mca.roles import papel_do_usuario
 
 def is_diretor_ou_admin(user):
-    return hasattr(user, "funcionario") and user.funcionario.cargo in ["DIR", "ADMIN"]
+    return papel_do_usuario(user).cargo in ["DIR", "ADMIN"]
 
 # 🧾 LISTA DE CONTRATOS
 @login_required
@@ -0,0 +1,92 @@
+/* static/js/lista-parcial.js
+ * Listas com filtro/paginação sem recarregar a página inteira.
+ *
+ *   <form method="get" data-lista-filtro="#lista">...</form>
+ *   <a href="/exportar/?..." data-lista-filtros>   (href segue os filtros atuais)
+ *   <div id="lista" data-lista-parcial="/clientes/tabela/">
+ *     {% include "clientes/tabela.html" %}
+ *   </div>
+ *
+ * O envio do filtro e os links do pager (dentro do container) buscam só a
+ * tabela + paginação na URL de `data-lista-parcial`, com a mesma query
+ * string, e trocam o conteúdo do container; a URL da página acompanha
+ * (history.pushState), então voltar/recarregar/compartilhar continua igual.
+ * Sem JS (ou se a busca falhar) tudo funciona como antes, com a página inteira.
+ */
+(function () {
+  function semCursor(params) {
+    const p = new URLSearchParams(params);
+    p.delete('cursor'); p.delete('page');
+    return p;
+  }
+
+  function preencher(form, params) {
+    Array.from(form.elements).forEach(el => {
+      if (!el.name) return;
+      const v = params.get(el.name) ?? '';
+      if (el.type === 'checkbox' || el.type === 'radio') { el.checked = params.getAll(el.name).includes(el.value); return; }
+      if (el.dataset.remoteUrl && window.RemoteSelect) { RemoteSelect.setValue(el, v); return; }
+      el.value = v;
+    });
+  }
+
+  function init(box) {
+    const url = box.dataset.listaParcial;
+    const form = document.querySelector(`form[data-lista-filtro="#${box.id}"]`);
+    let ctrl = null;
+
+    function carregar(params, empilhar) {
+      const qs = params.toString();
+      const pagina = location.pathname + (qs ? '?' + qs : '');
+      if (ctrl) ctrl.abort();
+      ctrl = new AbortController();
+      box.setAttribute('aria-busy', 'true');
+      box.style.opacity = '.6';
+      return fetch(url + (qs ? '?' + qs : ''), {
+        signal: ctrl.signal, credentials: 'same-origin', headers: { 'X-Requested-With': 'fetch' },
+      })
+        .then(r => {
+          // sessão expirada etc.: o redirect cairia dentro do container
+          if (!r.ok || r.redirected) throw new Error('fragmento');
+          return r.text();
+        })
+        .then(html => {
+          box.innerHTML = html;
+          if (empilhar) history.pushState({ lista: box.id }, '', pagina);
+          const filtros = semCursor(params).toString();
+          document.querySelectorAll('a[data-lista-filtros]').forEach(a => {
+            a.href = a.href.split('?')[0] + '?' + filtros;
+          });
+        })
+        .catch(err => { if (err.name !== 'AbortError') location.href = pagina; })
+        .finally(() => { box.removeAttribute('aria-busy'); box.style.opacity = ''; });
+    }
+
+    if (form) {
+      form.addEventListener('submit', function (e) {
+        e.preventDefault();
+        carregar(new URLSearchParams(new FormData(form)), true);
+      });
+    }
+
+    box.addEventListener('click', function (e) {
+      const a = e.target.closest('.pagination a[href]');
+      if (!a || e.ctrlKey || e.metaKey || e.shiftKey || e.button !== 0) return;
+      e.preventDefault();
+      carregar(new URL(a.href, location.href).searchParams, true)
+        .then(() => box.scrollIntoView({ block: 'nearest' }));
+    });
+
+    history.replaceState({ lista: box.id }, '');
+    window.addEventListener('popstate', function (e) {
+      if (!e.state || e.state.lista !== box.id) return;
+      const params = new URLSearchParams(location.search);
+      if (form) preencher(form, params);
+      carregar(params, false);
+    });
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('[data-lista-parcial]').forEach(init);
+  });
+})();
@@ -0,0 +1,97 @@
+/* static/js/remote-select.js
+ * Selects remotos: <select data-remote-url="/lookups/<nome>/"> ganha um campo
+ * de busca acima e carrega as opções sob demanda (JSON paginado, ver
+ * mca/lookups.py). O servidor só renderiza a opção vazia + a selecionada.
+ *
+ *   RemoteSelect.setValue(select, id)  // define valor e resolve o rótulo (?ids=)
+ */
+(function () {
+  const DEBOUNCE_MS = 250;
+
+  function opcao(value, text, selected) {
+    const o = document.createElement('option');
+    o.value = value; o.textContent = text;
+    if (selected) o.selected = true;
+    return o;
+  }
+
+  function init(sel) {
+    if (sel._remote) return sel._remote;
+    const url = sel.dataset.remoteUrl;
+    const placeholder = sel.dataset.placeholder || '--';
+
+    const busca = document.createElement('input');
+    busca.type = 'search';
+    busca.className = 'form-control form-control-sm mb-1';
+    busca.placeholder = 'Digite para buscar…';
+    busca.autocomplete = 'off';
+
+    const mais = document.createElement('button');
+    mais.type = 'button';
+    mais.className = 'btn btn-link btn-sm p-0 d-none';
+    mais.textContent = 'Carregar mais…';
+
+    sel.parentNode.insertBefore(busca, sel);
+    sel.parentNode.insertBefore(mais, sel.nextSibling);
+
+    const st = { termo: null, page: 1, timer: null, ctrl: null };
+
+    function carregar(termo, page) {
+      if (st.ctrl) st.ctrl.abort();
+      st.ctrl = new AbortController();
+      const qs = new URLSearchParams({ q: termo, page: String(page) });
+      return fetch(url + '?' + qs, { signal: st.ctrl.signal, credentials: 'same-origin' })
+        .then(r => r.ok ? r.json() : { results: [], more: false })
+        .then(data => {
+          const atual = sel.value;
+          if (page === 1) {
+            // mantém a opção vazia e a selecionada; troca o resto
+            Array.from(sel.options).forEach(o => { if (o.value && o.value !== atual) o.remove(); });
+          }
+          const existentes = new Set(Array.from(sel.options).map(o => o.value));
+          data.results.forEach(r => {
+            if (!existentes.has(String(r.id))) sel.appendChild(opcao(r.id, r.text, false));
+          });
+          st.termo = termo; st.page = page;
+          mais.classList.toggle('d-none', !data.more);
+        })
+        .catch(() => {});
+    }
+
+    busca.addEventListener('input', () => {
+      clearTimeout(st.timer);
+      st.timer = setTimeout(() => carregar(busca.value.trim(), 1), DEBOUNCE_MS);
+    });
+    // primeira página só quando o usuário interage com o campo
+    const primeira = () => { if (st.termo === null) carregar('', 1); };
+    sel.addEventListener('focus', primeira);
+    sel.addEventListener('mousedown', primeira);
+    busca.addEventListener('focus', primeira);
+    mais.addEventListener('click', () => carregar(st.termo || '', st.page + 1));
+
+    if (!sel.querySelector('option[value=""]')) sel.insertBefore(opcao('', placeholder, false), sel.firstChild);
+
+    sel._remote = { busca, mais, carregar };
+    return sel._remote;
+  }
+
+  function setValue(sel, id) {
+    init(sel);
+    id = (id === null || id === undefined || id === 'None') ? '' : String(id);
+    if (!id) { sel.value = ''; return Promise.resolve(); }
+    if (Array.from(sel.options).some(o => o.value === id)) { sel.value = id; return Promise.resolve(); }
+    const url = sel.dataset.remoteUrl + '?' + new URLSearchParams({ ids: id });
+    return fetch(url, { credentials: 'same-origin' })
+      .then(r => r.ok ? r.json() : { results: [] })
+      .then(data => {
+        data.results.forEach(r => sel.appendChild(opcao(r.id, r.text, false)));
+        sel.value = id;
+      });
+  }
+
+  document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('select[data-remote-url]').forEach(init);
+  });
+
+  window.RemoteSelect = { init, setValue };
+})();
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class TurmasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'turmas'
+
+    def ready(self):
+        # renomear condomínio/modalidade/cliente refaz as chaves de ordenação
+        from .ordenacao import conectar
+        conectar()
@@ -2,6 +2,8 @@ from __future__ import annotations
 from django import forms
 from django.core.exceptions import ValidationError
 
+from mca.lookups import RemoteSelect
+
 from .models import Turma, DIAS_SEMANA
 
 
@@ -37,6 +39,8 @@ class TurmaForm(forms.ModelForm):
         ]
 
         widgets = {
+            "professor": RemoteSelect("professores"),
+            "modalidade": RemoteSelect("modalidades"),
             "hora_inicio": forms.TimeInput(attrs={"type": "time"}),
             "inicio_vigencia": forms.DateInput(attrs={"type": "date"}),
             "fim_vigencia": forms.DateInput(attrs={"type": "date"}),
@@ -0,0 +1,57 @@
+# turmas/jobs.py
+"""Tarefas em segundo plano de turmas e presenças (ver mca/jobs.py)."""
+from datetime import date
+
+from django.db.models import Count, Q
+
+from mca import condicional, referencias
+from mca.jobs import tarefa
+
+from . import services as ts
+from . import services_presenca as ps
+
+
+def _int(valor):
+    return int(valor) if valor not in (None, "") else None
+
+
+def _turmas(*, q: str = "", condominio: str = "", modalidade: str = "", professor: str = "",
+            dia_semana: str = "", ativos: str = ""):
+    return ts.buscar_turmas(
+        q=q.strip(),
+        condominio_id=_int(condominio),
+        modalidade_id=_int(modalidade),
+        professor_id=_int(professor),
+        dia_semana=_int(dia_semana),
+        ativos=(None if ativos == "" else (ativos == "1")),
+    )
+
+
+def _validador_turmas(**filtros):
+    return condicional.validador(
+        _turmas(**filtros), relacionados=("matriculas",),
+        agregados={"ativas": Count("matriculas", filter=Q(matriculas__ativa=True))},
+        extras=referencias.versoes(),
+    )
+
+
+@tarefa("turmas.exportar", titulo="Exportação de turmas", replica=True, validador=_validador_turmas)
+def exportar(ex, **filtros) -> dict:
+    filename, content = ts.exportar_turmas_excel(_turmas(**filtros))
+    ex.salvar_arquivo(filename, content)
+    return {"mensagem": "Planilha de turmas gerada."}
+
+
+@tarefa("turmas.gerar_listas", titulo="Geração de listas de presença")
+def gerar_listas(ex, *, turma_id: int, data_de: str, data_ate: str) -> dict:
+    rel = ps.gerar_listas_automaticas(
+        turma_id=turma_id,
+        data_de=date.fromisoformat(data_de),
+        data_ate=date.fromisoformat(data_ate),
+        progresso=ex.progresso,
+    )
+    return {
+        **rel,
+        "mensagem": (f"Gerado: {rel['criadas']} nova(s). Já existiam: {rel['existentes']}. "
+                     f"Ignoradas: {rel['ignoradas_fora_vigencia']}."),
+    }
@@ -0,0 +1,19 @@
+# turmas/lookups.py — selects remotos (ver mca/lookups.py)
+from django.db.models import Q
+
+from mca.lookups import registrar
+
+from .models import Turma
+
+
+registrar(
+    "turmas",
+    # __str__ usa modalidade e condomínio: select_related evita 2 consultas por opção
+    queryset=lambda: Turma.objects.select_related("modalidade__condominio")
+    .order_by("sort_key", "id"),
+    busca=lambda qs, q: qs.filter(
+        Q(nome_exibicao__icontains=q)
+        | Q(modalidade__nome__icontains=q)
+        | Q(modalidade__condominio__nome__icontains=q)
+    ),
+)
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:11
+
+from django.db import migrations, models
+
+from turmas.ordenacao import chave_nome, chave_turma
+
+
+def preencher_chaves(apps, schema_editor):
+    Turma = apps.get_model("turmas", "Turma")
+    Matricula = apps.get_model("turmas", "Matricula")
+
+    turmas = list(Turma.objects.select_related("modalidade__condominio"))
+    for t in turmas:
+        t.sort_key = chave_turma(t.modalidade.condominio.nome, t.modalidade.nome, t.hora_inicio)
+    Turma.objects.bulk_update(turmas, ["sort_key"], batch_size=500)
+
+    mats = list(Matricula.objects.select_related("cliente").only("id", "cliente__nome_razao"))
+    for m in mats:
+        m.sort_nome = chave_nome(m.cliente.nome_razao)
+    Matricula.objects.bulk_update(mats, ["sort_nome"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0002_busca_indexada'),
+        ('funcionarios', '0004_funcionario_data_admissao_funcionario_registro_cref_and_more'),
+        ('modalidades', '0001_initial'),
+        ('turmas', '0006_listapresenca_ocorrencia_aula'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='matricula',
+            options={'ordering': ['-ativa', 'sort_nome', 'id']},
+        ),
+        migrations.AlterModelOptions(
+            name='turma',
+            options={'ordering': ['sort_key', 'id'], 'verbose_name': 'Turma', 'verbose_name_plural': 'Turmas'},
+        ),
+        migrations.RemoveIndex(
+            model_name='itempresenca',
+            name='turmas_item_lista_i_1f3be8_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='matricula',
+            name='turmas_matr_turma_i_7050cf_idx',
+        ),
+        migrations.AddField(
+            model_name='matricula',
+            name='sort_nome',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='turma',
+            name='sort_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='itempresenca',
+            index=models.Index(fields=['lista', 'cliente_nome_snapshot', 'id'], name='turmas_item_lista_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matricula',
+            index=models.Index(fields=['turma', '-ativa', 'sort_nome', 'id'], name='turmas_mat_turma_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turma',
+            index=models.Index(fields=['sort_key', 'id'], name='turmas_turm_sort_ke_846a47_idx'),
+        ),
+        migrations.RunPython(preencher_chaves, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0003_indices_parciais'),
+        ('funcionarios', '0004_funcionario_data_admissao_funcionario_registro_cref_and_more'),
+        ('modalidades', '0001_initial'),
+        ('turmas', '0007_sort_keys'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='itempresenca',
+            name='turmas_item_cliente_b9a4a5_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='itempresenca',
+            name='turmas_item_matricu_0fcd6a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listapresenca',
+            name='turmas_list_turma_i_f2bda0_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='matricula',
+            name='turmas_matr_cliente_883a4e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='turma',
+            name='turmas_turm_ativo_88fc2e_idx',
+        ),
+        migrations.AlterField(
+            model_name='itempresenca',
+            name='lista',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='turmas.listapresenca'),
+        ),
+        migrations.AlterField(
+            model_name='listapresenca',
+            name='turma',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='listas_presenca', to='turmas.turma'),
+        ),
+        migrations.AlterField(
+            model_name='matricula',
+            name='turma',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='matriculas', to='turmas.turma'),
+        ),
+        migrations.AlterField(
+            model_name='turma',
+            name='professor',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='turmas', to='funcionarios.funcionario'),
+        ),
+        migrations.AddIndex(
+            model_name='matricula',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['data_inicio', 'data_fim'], name='turmas_mat_vigentes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turma',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['sort_key', 'id'], name='turmas_turma_ativas_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:17
+
+import datetime
+from django.db import migrations, models
+
+
+def preencher_vigencia(apps, schema_editor):
+    Matricula = apps.get_model("turmas", "Matricula")
+    Matricula.objects.filter(data_fim__isnull=False).update(vigente_ate=models.F("data_fim"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0003_indices_parciais'),
+        ('turmas', '0008_indices_parciais'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='matricula',
+            name='turmas_mat_vigentes_idx',
+        ),
+        migrations.AddField(
+            model_name='matricula',
+            name='vigente_ate',
+            field=models.DateField(default=datetime.date(9999, 12, 31), editable=False),
+        ),
+        migrations.RunPython(preencher_vigencia, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='matricula',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['vigente_ate', 'data_inicio'], name='turmas_mat_vigencia_idx'),
+        ),
+    ]
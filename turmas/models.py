@@ -1,12 +1,18 @@
 from __future__ import annotations
+from calendar import monthrange
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import List
 
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models
 
+from mca import referencias
+from mca.alteracoes import RastreiaAlteracoes
+
+from . import ordenacao
+
 # Conveniência para exibir nome dos dias quando necessário (útil em formulários/filtros)
 DIAS_SEMANA = [
     (0, "Segunda"),
@@ -26,12 +32,13 @@ from datetime import datetime, timedelta
 from typing import List
 from django.core.exceptions import ValidationError
 
-class Turma(models.Model):
+class Turma(RastreiaAlteracoes, models.Model):
     # Relações
     professor = models.ForeignKey(
         "funcionarios.Funcionario",
         on_delete=models.PROTECT,
         related_name="turmas",
+        db_index=False,  # coberto por (professor, hora_inicio)
     )
     modalidade = models.ForeignKey(
         "modalidades.Modalidade",
@@ -77,11 +84,17 @@ class Turma(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # condomínio␟modalidade␟hora, normalizado (ver turmas/ordenacao.py): ordena sem JOIN
+    sort_key = models.CharField(max_length=255, blank=True, default="", editable=False)
+
     class Meta:
-        ordering = ["modalidade__condominio__nome", "modalidade__nome", "hora_inicio", "id"]
+        ordering = ["sort_key", "id"]
         indexes = [
+            models.Index(fields=["sort_key", "id"]),
             models.Index(fields=["professor", "hora_inicio"]),
-            models.Index(fields=["ativo"]),
+            # turmas ativas (cobranças, pagamentos, presença) já na ordem padrão
+            models.Index(fields=["sort_key", "id"], condition=models.Q(ativo=True),
+                         name="turmas_turma_ativas_idx"),
         ]
         verbose_name = "Turma"
         verbose_name_plural = "Turmas"
@@ -93,6 +106,13 @@ class Turma(models.Model):
         if self.fim_vigencia and self.fim_vigencia < self.inicio_vigencia:
             raise ValidationError("A data de fim da vigência não pode ser anterior ao início.")
 
+    def save(self, *args, **kwargs):
+        self.sort_key = ordenacao.chave_da_turma(self)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "sort_key" not in update_fields:
+            kwargs["update_fields"] = list(update_fields) + ["sort_key"]
+        super().save(*args, **kwargs)
+
     @property
     def condominio(self):
         return self.modalidade.condominio
@@ -113,6 +133,9 @@ class Turma(models.Model):
 
     @property
     def ocupacao(self) -> int:
+        # listagens anotam `ocupacao_agg` (ver services.buscar_turmas) e evitam 1 COUNT por linha
+        if "ocupacao_agg" in self.__dict__:
+            return self.ocupacao_agg or 0
         return self.matriculas.filter(ativa=True).count()
 
     @property
@@ -122,7 +145,13 @@ class Turma(models.Model):
     def __str__(self):
         nomes = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
         dias = ", ".join(nomes[i] for i in self.dias_ativos()) or "—"
-        base = self.nome_exibicao or f"{self.modalidade} - {self.modalidade.condominio}"
+        if self.nome_exibicao:
+            base = self.nome_exibicao
+        else:
+            # modalidade/condomínio vêm do cache de referências quando não houve select_related
+            modalidade = referencias.relacionado(self, "modalidade", "modalidades")
+            condominio = referencias.relacionado(modalidade, "condominio", "condominios")
+            base = f"{modalidade} - {condominio}"
         return f"{base} ({dias} {self.hora_inicio:%H:%M})"
 
 
@@ -136,7 +165,8 @@ class ListaPresenca(models.Model):
     ]
 
     turma = models.ForeignKey(
-        "turmas.Turma", on_delete=models.PROTECT, related_name="listas_presenca"
+        "turmas.Turma", on_delete=models.PROTECT, related_name="listas_presenca",
+        db_index=False,  # coberto pelo unique_together (turma, data)
     )
     data = models.DateField()
 
@@ -156,7 +186,7 @@ class ListaPresenca(models.Model):
     class Meta:
         unique_together = [("turma", "data")]
         ordering = ["-data", "-id"]
-        indexes = [models.Index(fields=["turma", "data"])]
+        # (turma, data) já é coberto pelo índice do unique_together
         verbose_name = "Lista de presença"
         verbose_name_plural = "Listas de presença"
 
@@ -174,7 +204,8 @@ class ListaPresenca(models.Model):
 
 class ItemPresenca(models.Model):
     lista = models.ForeignKey(
-        ListaPresenca, on_delete=models.CASCADE, related_name="itens"
+        ListaPresenca, on_delete=models.CASCADE, related_name="itens",
+        db_index=False,  # coberto por (lista, matricula) e (lista, nome)
     )
     # referencia opcional à matrícula (AGORA ÚNICA por lista)
     matricula = models.ForeignKey(
@@ -204,9 +235,8 @@ class ItemPresenca(models.Model):
         unique_together = [("lista", "matricula")]
         ordering = ["cliente_nome_snapshot", "id"]
         indexes = [
-            models.Index(fields=["lista"]),
-            models.Index(fields=["cliente"]),
-            models.Index(fields=["matricula"]),
+            # serve `lista.itens` já na ordem padrão (e o filtro por lista)
+            models.Index(fields=["lista", "cliente_nome_snapshot", "id"], name="turmas_item_lista_ordem_idx"),
         ]
         verbose_name = "Item de presença"
         verbose_name_plural = "Itens de presença"
@@ -217,10 +247,32 @@ class ItemPresenca(models.Model):
 
 SEXO_CHOICES = (("M", "Masculino"), ("F", "Feminino"), ("O", "Outro"))
 
+# fim da vigência de matrícula sem data_fim (intervalo fechado, sem NULL)
+VIGENCIA_ABERTA = date(9999, 12, 31)
+
+
+class MatriculaQuerySet(models.QuerySet):
+    """
+    Vigência: ativa=True e [data_inicio, vigente_ate] cruza o período.
+    `vigente_ate` é o data_fim com NULL trocado por VIGENCIA_ABERTA, então o
+    filtro é só comparação de intervalo (sem OR), servido por
+    turmas_mat_vigencia_idx.
+    """
+
+    def ativas_entre(self, inicio: date, fim: date):
+        return self.filter(ativa=True, data_inicio__lte=fim, vigente_ate__gte=inicio)
+
+    def ativas_em(self, d: date):
+        return self.ativas_entre(d, d)
+
+    def ativas_no_mes(self, ano: int, mes: int):
+        return self.ativas_entre(date(ano, mes, 1), date(ano, mes, monthrange(ano, mes)[1]))
+
 
 class Matricula(models.Model):
     turma = models.ForeignKey(
-        "turmas.Turma", on_delete=models.PROTECT, related_name="matriculas"
+        "turmas.Turma", on_delete=models.PROTECT, related_name="matriculas",
+        db_index=False,  # coberto por turmas_mat_turma_ordem_idx
     )
     cliente = models.ForeignKey(
         "clientes.Cliente", on_delete=models.PROTECT, related_name="matriculas"
@@ -228,6 +280,8 @@ class Matricula(models.Model):
     data_inicio = models.DateField()
     data_fim = models.DateField(null=True, blank=True)
     ativa = models.BooleanField(default=True)
+    # data_fim ou VIGENCIA_ABERTA (preenchido no save)
+    vigente_ate = models.DateField(default=VIGENCIA_ABERTA, editable=False)
 
     # Participante (se vazio => o aluno é o próprio cliente)
     participante_nome = models.CharField(max_length=255, blank=True)
@@ -240,13 +294,37 @@ class Matricula(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # nome do cliente normalizado (ver turmas/ordenacao.py): ordena sem JOIN em cliente
+    sort_nome = models.CharField(max_length=255, blank=True, default="", editable=False)
+
     class Meta:
-        ordering = ["-ativa", "cliente__nome_razao", "id"]
+        ordering = ["-ativa", "sort_nome", "id"]
         indexes = [
-            models.Index(fields=["turma", "ativa"]),
-            models.Index(fields=["cliente"]),
+            models.Index(fields=["turma", "-ativa", "sort_nome", "id"], name="turmas_mat_turma_ordem_idx"),
+            # ativas_em/ativas_no_mes: o fim vem primeiro porque as encerradas
+            # (que só crescem com o tempo) ficam fora da faixa
+            models.Index(fields=["vigente_ate", "data_inicio"], condition=models.Q(ativa=True),
+                         name="turmas_mat_vigencia_idx"),
         ]
 
+    objects = MatriculaQuerySet.as_manager()
+
+    def vigente_em(self, d: date) -> bool:
+        """Mesma regra de `ativas_em`, em memória (sem checar `ativa`)."""
+        return self.data_inicio <= d <= (self.data_fim or VIGENCIA_ABERTA)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "data_fim" in update_fields:
+            self.vigente_ate = self.data_fim or VIGENCIA_ABERTA
+            if update_fields is not None and "vigente_ate" not in update_fields:
+                update_fields = kwargs["update_fields"] = list(update_fields) + ["vigente_ate"]
+        if update_fields is None or "cliente" in update_fields or "cliente_id" in update_fields:
+            self.sort_nome = ordenacao.chave_nome(ordenacao.nome_do_cliente(self))
+            if update_fields is not None and "sort_nome" not in update_fields:
+                kwargs["update_fields"] = list(update_fields) + ["sort_nome"]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         who = self.participante_nome or self.cliente.nome_razao
         return f"{who} @ {self.turma}"
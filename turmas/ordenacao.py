@@ -0,0 +1,120 @@
+# turmas/ordenacao.py
+"""
+Chaves de ordenação desnormalizadas.
+
+As ordenações padrão faziam JOIN em toda consulta, inclusive em
+`turma.matriculas` e afins:
+- Turma: condomínio → modalidade → hora (JOIN em modalidade e condomínio);
+- Matricula: nome do cliente (JOIN em cliente).
+
+Agora cada linha guarda a própria chave, indexada:
+- `Turma.sort_key`  = "condomínio␟modalidade␟HH:MM" (minúsculas, sem acento);
+- `Matricula.sort_nome` = nome do cliente normalizado.
+
+As chaves são calculadas no save() e refeitas em lote quando um
+condomínio, modalidade ou cliente é renomeado (sinais ligados em
+TurmasConfig.ready). Escritas em massa (bulk_create/update) devem usar
+`chave_turma`/`chave_nome` ao montar os objetos.
+"""
+from __future__ import annotations
+
+from django.db.models.signals import post_save
+
+from clientes.busca import normalizar_busca
+from mca import referencias
+
+# separador abaixo de qualquer caractere imprimível: "ab" vem antes de "ab c"
+SEP = "\x1f"
+MAX_LEN = 255
+
+
+def chave_nome(nome) -> str:
+    return normalizar_busca(nome)[:MAX_LEN]
+
+
+def chave_turma(condominio_nome, modalidade_nome, hora) -> str:
+    hora_txt = hora.strftime("%H:%M") if hasattr(hora, "strftime") else str(hora or "")[:5]
+    partes = [normalizar_busca(condominio_nome)[:110], normalizar_busca(modalidade_nome)[:110], hora_txt]
+    return SEP.join(partes)
+
+
+def chave_da_turma(turma) -> str:
+    modalidade = referencias.relacionado(turma, "modalidade", "modalidades")
+    condominio = referencias.relacionado(modalidade, "condominio", "condominios") if modalidade else None
+    return chave_turma(
+        condominio.nome if condominio else "",
+        modalidade.nome if modalidade else "",
+        turma.hora_inicio,
+    )
+
+
+def nome_do_cliente(matricula) -> str:
+    from clientes.models import Cliente
+
+    fk = matricula._meta.get_field("cliente")
+    if fk.is_cached(matricula) and matricula.cliente is not None:
+        return matricula.cliente.nome_razao
+    return Cliente.objects.filter(pk=matricula.cliente_id).values_list("nome_razao", flat=True).first() or ""
+
+
+# ---------------- Atualização em lote ----------------
+
+def recalcular_turmas(qs) -> int:
+    """Recalcula `sort_key` das turmas do queryset; grava só as que mudaram."""
+    from .models import Turma
+
+    turmas = list(qs.select_related("modalidade__condominio").only(
+        "id", "sort_key", "hora_inicio", "modalidade__nome", "modalidade__condominio__nome",
+    ))
+    mudaram = []
+    for t in turmas:
+        nova = chave_turma(t.modalidade.condominio.nome, t.modalidade.nome, t.hora_inicio)
+        if nova != t.sort_key:
+            t.sort_key = nova
+            mudaram.append(t)
+    if mudaram:
+        Turma.objects.bulk_update(mudaram, ["sort_key"], batch_size=500)
+    return len(mudaram)
+
+
+def recalcular_matriculas_do_cliente(cliente_id: int, nome: str) -> int:
+    from .models import Matricula
+
+    chave = chave_nome(nome)
+    return Matricula.objects.filter(cliente_id=cliente_id).exclude(sort_nome=chave).update(sort_nome=chave)
+
+
+# ---------------- Sinais (renomeações) ----------------
+# Sem pre_save: recalcular é uma consulta pequena (turmas) ou um UPDATE que
+# só toca linhas cuja chave mudou (matrículas), igual ao custo de comparar.
+
+def _tocou(update_fields, *campos) -> bool:
+    return update_fields is None or any(c in update_fields for c in campos)
+
+
+def _condominio_salvo(sender, instance, created, update_fields=None, **kwargs):
+    from .models import Turma
+    if not created and _tocou(update_fields, "nome"):
+        recalcular_turmas(Turma.objects.filter(modalidade__condominio_id=instance.pk))
+
+
+def _modalidade_salva(sender, instance, created, update_fields=None, **kwargs):
+    from .models import Turma
+    if not created and _tocou(update_fields, "nome", "condominio", "condominio_id"):
+        recalcular_turmas(Turma.objects.filter(modalidade_id=instance.pk))
+
+
+def _cliente_salvo(sender, instance, created, update_fields=None, **kwargs):
+    if not created and _tocou(update_fields, "nome_razao"):
+        recalcular_matriculas_do_cliente(instance.pk, instance.nome_razao)
+
+
+def conectar() -> None:
+    from django.apps import apps
+
+    post_save.connect(_condominio_salvo, sender=apps.get_model("condominios", "Condominio"),
+                      dispatch_uid="ordenacao_condominio")
+    post_save.connect(_modalidade_salva, sender=apps.get_model("modalidades", "Modalidade"),
+                      dispatch_uid="ordenacao_modalidade")
+    post_save.connect(_cliente_salvo, sender=apps.get_model("clientes", "Cliente"),
+                      dispatch_uid="ordenacao_cliente")
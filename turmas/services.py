@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import logging
 from datetime import date, time
 from decimal import Decimal
 from typing import Dict, Optional, Tuple, List, Any
 
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.db import transaction
-from django.db.models import Q, QuerySet
+from django.db.models import Count, IntegerField, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+
+from mca import alteracoes
 
 from .models import Turma
 
+logger = logging.getLogger(__name__)
+
 # Mapa de dia da semana
 _DIA_FIELD = {1: "seg", 2: "ter", 3: "qua", 4: "qui", 5: "sex", 6: "sab", 7: "dom"}
 
@@ -37,6 +43,9 @@ def _flags_from_data(data: Dict[str, Any], fallback: Optional[Turma] = None) ->
 
 
 # Validação de conflitos de horário/professor
+_CAMPOS_HORARIO = {"professor", "hora_inicio", "duracao_minutos", "inicio_vigencia", "fim_vigencia",
+                   "seg", "ter", "qua", "qui", "sex", "sab", "dom"}
+
 def _checar_conflito_professor(
     professor_id: int,
     flags: Dict[str, bool],
@@ -108,29 +117,22 @@ def atualizar_turma(turma_id: int, data: Dict[str, Any]) -> Turma:
     if not t:
         raise ObjectDoesNotExist("Turma não encontrada.")
 
-    flags = _flags_from_data(data, fallback=t)
-
-    professor_data = data.get("professor", t.professor_id)
-    professor_id = professor_data.id if hasattr(professor_data, "id") else int(professor_data)
-
-    _checar_conflito_professor(
-        professor_id=professor_id,
-        flags=flags,
-        hora_inicio=data.get("hora_inicio", t.hora_inicio),
-        duracao_minutos=int(data.get("duracao_minutos", t.duracao_minutos)),
-        inicio_vigencia=data.get("inicio_vigencia", t.inicio_vigencia),
-        fim_vigencia=data.get("fim_vigencia", t.fim_vigencia),
-        turma_id_excluir=t.id,
-    )
-
-    for k, v in data.items():
-        setattr(t, k, v)
-
-    if t.fim_vigencia and t.fim_vigencia < t.inicio_vigencia:
-        raise ValidationError("A data de fim da vigência não pode ser anterior ao início.")
+    def validar(alterados: set) -> None:
+        if t.fim_vigencia and t.fim_vigencia < t.inicio_vigencia:
+            raise ValidationError("A data de fim da vigência não pode ser anterior ao início.")
+        # horário/dias/professor iguais: o conflito já foi checado quando foram gravados
+        if alterados & _CAMPOS_HORARIO:
+            _checar_conflito_professor(
+                professor_id=t.professor_id,
+                flags=_flags_from_data(data, fallback=t),
+                hora_inicio=t.hora_inicio,
+                duracao_minutos=int(t.duracao_minutos),
+                inicio_vigencia=t.inicio_vigencia,
+                fim_vigencia=t.fim_vigencia,
+                turma_id_excluir=t.id,
+            )
 
-    t.full_clean()
-    t.save()
+    alteracoes.atualizar_campos(t, data, validar=validar)
     return t
 
 
@@ -141,8 +143,6 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional, Tuple, List, Any, Dict
 from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
 
 from .models import Turma
 from .models import Matricula
@@ -170,9 +170,9 @@ def matricular_cliente(
     turma = Turma.objects.get(id=turma_id)
     cliente = Cliente.objects.get(id=cliente_id)
 
-    print(
-        f"Tentando matricular: turma={turma}, cliente={cliente}, "
-        f"proprio_cliente={proprio_cliente}, participante={participante_nome}"
+    logger.debug(
+        "tentando matricular",
+        extra={"turma_id": turma.id, "cliente_id": cliente.id, "proprio_cliente": proprio_cliente},
     )
 
     # 🚫 Checa se a turma já está lotada (usa a propriedade do model)
@@ -249,7 +249,13 @@ def buscar_turmas(
     dia_semana: Optional[int] = None,
     ativos: Optional[bool] = None,
 ) -> QuerySet[Turma]:
-    qs = Turma.objects.select_related("modalidade__condominio", "professor").all()
+    ocupacao = (
+        Matricula.objects.filter(turma_id=OuterRef("pk"), ativa=True)
+        .order_by().values("turma_id").annotate(c=Count("id")).values("c")
+    )
+    qs = Turma.objects.select_related("modalidade__condominio", "professor").annotate(
+        ocupacao_agg=Coalesce(Subquery(ocupacao, output_field=IntegerField()), 0),
+    )
 
     if q:
         qs = qs.filter(
@@ -278,13 +284,16 @@ def buscar_turmas(
     if ativos is not None:
         qs = qs.filter(ativo=bool(ativos))
 
-    return qs.order_by("modalidade__condominio__nome", "modalidade__nome", "hora_inicio", "id")
+    return qs.order_by("sort_key", "id")
 
 
 # ------------------------------------------------------------
 # Exportação de Turmas para Excel (com campos novos)
 # ------------------------------------------------------------
 def exportar_turmas_excel(qs: Optional[QuerySet[Turma]] = None) -> Tuple[str, bytes]:
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
     qs = qs or Turma.objects.select_related("modalidade__condominio", "professor").all()
 
     wb = Workbook()
@@ -312,9 +321,9 @@ def exportar_turmas_excel(qs: Optional[QuerySet[Turma]] = None) -> Tuple[str, by
             t.capacidade,
             f"{t.valor:.2f}",
             f"{getattr(t, 'valor_dsr', Decimal('0.00')):.2f}",
-            f"{getattr(t, 'vt_va', Decimal('0.00')):.2f}",
+            f"{t.vale_transporte or Decimal('0.00'):.2f}",
             f"{getattr(t, 'bonificacao', Decimal('0.00')):.2f}",
-            t.obs or "",
+            t.observacoes or "",
             "SIM" if t.ativo else "NÃO",
             t.inicio_vigencia.strftime("%d/%m/%Y"),
             t.fim_vigencia.strftime("%d/%m/%Y") if t.fim_vigencia else "",
@@ -1,13 +1,16 @@
 from __future__ import annotations
 from django.shortcuts import get_object_or_404
-from typing import Optional, Iterable, Dict
+from typing import Callable, Optional, Iterable, Dict
 from datetime import date, timedelta
 
 from django.db import transaction
-from django.db.models import Q, Count, Sum, IntegerField, Case, When
+from django.utils import timezone
+from django.db.models import Count, Sum, IntegerField, Case, When
 from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 
+from mca import escrita, metricas
+
 from .models import Turma, Matricula, ListaPresenca, ItemPresenca
 
 
@@ -15,20 +18,21 @@ class ListaJaExiste(Exception):
     pass
 
 
+SINCRONIZACOES = metricas.Contador("mca_presenca_listas_sincronizadas_total",
+                                   "Listas de presença sincronizadas com as matrículas.")
+ITENS_SINCRONIZADOS = metricas.Contador("mca_presenca_itens_sincronizados_total",
+                                        "Itens de presença gravados pela sincronização.", ("operacao",))
+
+
 # ===== Helpers =====
 
 def _matriculas_ativas_na_data(lista: ListaPresenca):
     d = lista.data
     return (
-        Matricula.objects
+        Matricula.objects.ativas_em(d)
         .select_related("cliente")
-        .filter(
-            turma=lista.turma,
-            ativa=True,
-            data_inicio__lte=d
-        )
-        .filter(Q(data_fim__isnull=True) | Q(data_fim__gte=d))
-        .order_by("cliente__nome_razao", "id")
+        .filter(turma=lista.turma)
+        .order_by("sort_nome", "id")
     )
 
 def _snapshots_from_matricula(m: Matricula) -> tuple[str, str]:
@@ -88,7 +92,7 @@ def abrir_lista(lista_id: int):
     itens = list(
         lista.itens
         .select_related("cliente")
-        .order_by("cliente__nome_razao", "id")
+        .order_by("cliente_nome_snapshot", "id")  # ordem padrão, coberta pelo índice (lista, nome, id)
     )
     return lista, itens
 
@@ -127,9 +131,8 @@ def criar_lista_presenca(*, turma_id: int, d: date, observacao_geral: str = "")
     )
 
     # cria itens para as matrículas ativas na data (1 item por MATRÍCULA)
-    for m in _matriculas_ativas_na_data(turma_id, d):
-        nome_snap = (m.participante_nome or m.cliente.nome_razao).strip()
-        doc_snap = (m.participante_cpf or m.cliente.cpf_cnpj)
+    for m in _matriculas_ativas_na_data(lista):
+        nome_snap, doc_snap = _snapshots_from_matricula(m)
         ItemPresenca.objects.create(
             lista=lista,
             cliente=m.cliente,
@@ -157,45 +160,86 @@ def criar_lista_presenca(*, turma_id: int, d: date, observacao_geral: str = "")
 @transaction.atomic
 def sincronizar_itens_lista(lista_id: int) -> None:
     lista = get_object_or_404(ListaPresenca, id=lista_id)
+    _sincronizar_listas(lista.turma_id, [lista])
 
-    ativos = list(_matriculas_ativas_na_data(lista))
-    ativos_ids = {m.id for m in ativos}
 
-    existentes = list(
-        ItemPresenca.objects.filter(lista=lista).select_related("matricula", "cliente")
-    )
-    by_matricula = {it.matricula_id: it for it in existentes}
+@transaction.atomic
+def sincronizar_listas_da_turma(turma_id: int, lista_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Sincroniza os itens de várias listas da turma de uma vez (todas, se
+    `lista_ids` for None): 1 consulta de listas, 1 de matrículas, 1 de itens
+    e as escritas em lote — em vez de ~4 consultas por lista.
+    """
+    listas_qs = ListaPresenca.objects.filter(turma_id=turma_id)
+    if lista_ids is not None:
+        listas_qs = listas_qs.filter(id__in=list(lista_ids))
+    _sincronizar_listas(turma_id, list(listas_qs.only("id", "turma_id", "data")))
 
-    # cria/atualiza itens de matrículas ativas
-    for m in ativos:
-        it = by_matricula.get(m.id)
-        nome_snap, doc_snap = _snapshots_from_matricula(m)
-        if it is None:
-            ItemPresenca.objects.create(
-                lista=lista,
-                #turma=lista.turma,
-                matricula=m,
-                cliente=m.cliente,
-                cliente_nome_snapshot=nome_snap,
-                cliente_doc_snapshot=doc_snap,
-                presente=False,
-            )
-        else:
-            # garante snapshots atualizados
-            changed = False
-            if it.cliente_nome_snapshot != nome_snap:
+
+def _sincronizar_listas(turma_id: int, listas: list) -> None:
+    if not listas:
+        return
+
+    matriculas = list(
+        Matricula.objects.select_related("cliente")
+        .filter(turma_id=turma_id, ativa=True)
+        .order_by("sort_nome", "id")
+    )
+    snapshots = {m.id: _snapshots_from_matricula(m) for m in matriculas}
+
+    existentes_por_lista: Dict[int, list] = {}
+    for it in ItemPresenca.objects.filter(lista__in=listas).only(
+        "id", "lista_id", "matricula_id", "cliente_nome_snapshot", "cliente_doc_snapshot"
+    ):
+        existentes_por_lista.setdefault(it.lista_id, []).append(it)
+
+    novos, alterados, sobrando = [], [], []
+    agora = timezone.now()
+    for lista in listas:
+        d = lista.data
+        # mesma regra de _matriculas_ativas_na_data, aplicada em memória
+        ativos = [m for m in matriculas if m.vigente_em(d)]
+        ativos_ids = {m.id for m in ativos}
+        existentes = existentes_por_lista.get(lista.id, [])
+        by_matricula = {it.matricula_id: it for it in existentes}
+
+        # cria/atualiza itens de matrículas ativas
+        for m in ativos:
+            it = by_matricula.get(m.id)
+            nome_snap, doc_snap = snapshots[m.id]
+            if it is None:
+                novos.append(ItemPresenca(
+                    lista=lista,
+                    #turma=lista.turma,
+                    matricula=m,
+                    cliente=m.cliente,
+                    cliente_nome_snapshot=nome_snap,
+                    cliente_doc_snapshot=doc_snap,
+                    presente=False,
+                ))
+            elif it.cliente_nome_snapshot != nome_snap or it.cliente_doc_snapshot != doc_snap:
+                # garante snapshots atualizados
                 it.cliente_nome_snapshot = nome_snap
-                changed = True
-            if it.cliente_doc_snapshot != doc_snap:
                 it.cliente_doc_snapshot = doc_snap
-                changed = True
-            if changed:
-                it.save(update_fields=["cliente_nome_snapshot", "cliente_doc_snapshot"])
+                it.updated_at = agora
+                alterados.append(it)
 
-    # remove itens de matrículas que não estão mais ativas no dia
-    for it in existentes:
-        if it.matricula_id not in ativos_ids:
-            it.delete()
+        # remove itens de matrículas que não estão mais ativas no dia
+        sobrando.extend(it.id for it in existentes if it.matricula_id not in ativos_ids)
+
+    if novos:
+        ItemPresenca.objects.bulk_create(novos, batch_size=500)
+    if alterados:
+        ItemPresenca.objects.bulk_update(
+            alterados, ["cliente_nome_snapshot", "cliente_doc_snapshot", "updated_at"], batch_size=500
+        )
+    for i in range(0, len(sobrando), 500):
+        ItemPresenca.objects.filter(id__in=sobrando[i:i + 500]).delete()
+
+    SINCRONIZACOES.inc(len(listas))
+    ITENS_SINCRONIZADOS.inc(len(novos), operacao="criado")
+    ITENS_SINCRONIZADOS.inc(len(alterados), operacao="atualizado")
+    ITENS_SINCRONIZADOS.inc(len(sobrando), operacao="removido")
 
 
 # ===== Operações =====
@@ -228,16 +272,22 @@ def salvar_presenca(*, lista_id: int, presentes_ids: list[int], obs_por_item: di
 
 # ===== Geração automática =====
 
-@transaction.atomic
+# dias por transação: cada lista grava seus itens, então o lote é pequeno
+LOTE_LISTAS = 10
+
+
 def gerar_listas_automaticas(
     *,
     turma_id: int,
     data_de: date,
     data_ate: date,
+    progresso: Optional[Callable[[int, Optional[int]], None]] = None,
 ) -> Dict[str, int]:
     """
     Gera listas entre [data_de, data_ate] apenas nos dias que batem com a turma
     (usando flags seg..dom) e dentro da vigência. Ignora as que já existirem.
+    Grava em lotes curtos (mca/escrita.py): um período longo não trava o banco
+    e, como pula as listas existentes, pode ser repetido após uma falha.
     """
     turma = Turma.objects.filter(id=turma_id, ativo=True).first()
     if not turma:
@@ -245,21 +295,29 @@ def gerar_listas_automaticas(
     if data_ate < data_de:
         raise ValidationError("Período inválido.")
 
-    criadas = existentes = ignoradas = 0
-
+    dias, ignoradas = [], 0
     d = data_de
     while d <= data_ate:
-        try:
-            if _vigente_na_data(turma, d) and _weekday_matches(turma, d):
-                if ListaPresenca.objects.filter(turma_id=turma_id, data=d).exists():
+        if _vigente_na_data(turma, d) and _weekday_matches(turma, d):
+            dias.append(d)
+        else:
+            ignoradas += 1
+        d += timedelta(days=1)
+
+    def _gravar(lote) -> tuple[int, int]:
+        criadas = existentes = 0
+        for dia in lote:
+            try:
+                if ListaPresenca.objects.filter(turma_id=turma_id, data=dia).exists():
                     existentes += 1
                 else:
-                    criar_lista_presenca(turma_id=turma_id, d=d, observacao_geral="")
+                    criar_lista_presenca(turma_id=turma_id, d=dia, observacao_geral="")
                     criadas += 1
-            else:
-                ignoradas += 1
-        except ListaJaExiste:
-            existentes += 1
-        d += timedelta(days=1)
+            except ListaJaExiste:
+                existentes += 1
+        return criadas, existentes
 
+    parciais = escrita.em_lotes(dias, _gravar, tamanho=LOTE_LISTAS, progresso=progresso)
+    criadas = sum(c for c, _ in parciais)
+    existentes = sum(e for _, e in parciais)
     return {"criadas": criadas, "existentes": existentes, "ignoradas_fora_vigencia": ignoradas}
@@ -1,3 +1,18 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from mca.testes import OrcamentoViewsTestCase
+
+from .models import ListaPresenca
+
+
+class OrcamentoConsultasTests(OrcamentoViewsTestCase):
+    def test_lista(self):
+        self.assertDentroDoOrcamento(reverse("turmas:list"))
+
+    def test_listas_da_turma(self):
+        lista = ListaPresenca.objects.order_by("id").first()
+        self.assertDentroDoOrcamento(reverse("turmas:presencas_turma", args=[lista.turma_id]))
+
+    def test_presenca_detalhe(self):
+        lista = ListaPresenca.objects.filter(itens__isnull=False).order_by("id").first()
+        self.assertDentroDoOrcamento(reverse("turmas:presenca_detalhe", args=[lista.id]))
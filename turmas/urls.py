@@ -8,6 +8,7 @@ app_name = "turmas"
 urlpatterns = [
     # Turmas
     path("turmas/", views.list_turmas, name="list"),
+    path("turmas/tabela/", views.list_turmas, {"parcial": True}, name="tabela"),
     path("turmas/criar/", views.create_turma, name="create"),
     path("turmas/<int:turma_id>/atualizar/", views.update_turma, name="update"),
     path("turmas/exportar/", views.exportar_turmas, name="exportar"),
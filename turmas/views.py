@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import logging
 from typing import Optional
 from datetime import date as _date
 from django.contrib import messages
@@ -13,6 +14,7 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Count, Q
 from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest
 from django.shortcuts import render, redirect
 from django.urls import reverse
@@ -22,13 +24,12 @@ from .forms import TurmaForm
 from .models import Turma
 from . import services as ts
 
-from modalidades.models import Modalidade
-from funcionarios.models import Funcionario
 
 from django.contrib.auth.decorators import login_required, user_passes_test
 
 try:
     from clientes.models import Cliente
+    from clientes.busca import filtro_busca
 except Exception:
     Cliente = None
 
@@ -45,29 +46,21 @@ DIAS_SEMANA = (
 # ------------------------------------------------------------
 # 📌 LISTAGEM DE TURMAS
 # ------------------------------------------------------------
-def is_diretor(user):
-    return user.groups.filter(name='Diretoria').exists() or user.is_superuser
+from mca.roles import is_diretor, is_professor, is_estagiario, papel_do_usuario
+from mca.query_budget import orcamento_consultas
+from mca.paginacao import paginar_duas_fases, querystring_filtros
+from mca import condicional, jobs, referencias
 
-def is_professor(user):
-    return user.groups.filter(name='Professor').exists()
-
-def is_estagiario(user):
-    return user.groups.filter(name='Estagiario').exists()
+logger = logging.getLogger(__name__)
 
 
 
 
+@orcamento_consultas(8)
 @login_required
-def list_turmas(request: HttpRequest) -> HttpResponse:
-
-    user = request.user
-
-    # Se for professor, exibe apenas as turmas dele
-    if hasattr(user, "funcionario") and user.funcionario.cargo == "PROF":
-        turmas = Turma.objects.filter(professor=user.funcionario)
-    else:
-        turmas = Turma.objects.all()
+def list_turmas(request: HttpRequest, parcial: bool = False) -> HttpResponse:
 
+    papel = papel_do_usuario(request.user)
 
     q = (request.GET.get("q") or "").strip()
     condominio_id = request.GET.get("condominio") or ""
@@ -85,26 +78,28 @@ def list_turmas(request: HttpRequest) -> HttpResponse:
         ativos=(None if ativos_param == "" else (ativos_param == "1")),
     )
 
-    if hasattr(request.user, "funcionario") and request.user.funcionario.cargo == "PROF":
-        qs = qs.filter(professor=request.user.funcionario)
-
-    page = max(1, int(request.GET.get("page", "1") or 1))
-    page_obj = Paginator(qs, 20).get_page(page)
+    # Se for professor, exibe apenas as turmas dele
+    if papel.cargo_professor:
+        qs = qs.filter(professor_id=papel.funcionario_id)
+
+    # nada mudou desde a última visita (turmas filtradas, matrículas delas,
+    # nomes de condomínio/modalidade/professor): 304 sem montar a página.
+    # Matrícula não tem updated_at: a ocupação entra como contagem das ativas.
+    validador = condicional.para_request(
+        request, qs, relacionados=("matriculas",),
+        agregados={"ativas": Count("matriculas", filter=Q(matriculas__ativa=True))},
+        extras=referencias.versoes(),
+    )
+    if (nao_modificado := condicional.nao_modificado(request, validador)) is not None:
+        return nao_modificado
 
-    # Combos de filtro
-    try:
-        from condominios.models import Condominio
-        condominios = Condominio.objects.filter(modalidade__isnull=False).distinct()
-    except Exception:
-        condominios = []
+    # cursor na ordenação da lista (condomínio, modalidade, hora, id), em duas fases:
+    # a ocupação (subquery) e os select_related só rodam para as 20 turmas exibidas
+    page_obj = paginar_duas_fases(qs, request.GET.get("cursor"), por_pagina=20)
 
-    modalidades = Modalidade.objects.all().order_by("nome")
-    professores = Funcionario.objects.filter(ativo=True).order_by("nome")
+    # Combos de filtro (condomínio/modalidade/professor): selects remotos, ver <app>/lookups.py
 
-    # Clientes (para modal de matrícula, se existir)
-    clientes = []
-    if Cliente is not None:
-        clientes = Cliente.objects.filter(ativo=True).order_by("nome_razao")[:500]
+    # Clientes do modal de matrícula: carregados sob demanda via clientes:api_buscar
 
     # Query string para manter filtros
     def _v(v: str) -> str:
@@ -112,6 +107,11 @@ def list_turmas(request: HttpRequest) -> HttpResponse:
     base_qs = f"q={_v(q)}&condominio={_v(condominio_id)}&modalidade={_v(modalidade_id)}&professor={_v(professor_id)}&dia_semana={_v(dia_param)}&ativos={_v(ativos_param)}"
     suffix = "&" + base_qs if base_qs else ""
 
+    # só tabela + paginação (filtro/página trocados pela própria lista)
+    if parcial:
+        ctx = {"page_obj": page_obj, "base_qs": base_qs, "suffix": suffix}
+        return condicional.aplicar(render(request, "turmas/tabela.html", ctx), validador)
+
     ctx = {
         "page_obj": page_obj,
         "q": q,
@@ -121,17 +121,12 @@ def list_turmas(request: HttpRequest) -> HttpResponse:
         "dia_param": str(dia_param),
         "ativos_param": ativos_param,
 
-        "condominios": condominios,
-        "modalidades": modalidades,
-        "professores": professores,
-        "clientes": clientes,
-
         "DIAS_SEMANA": DIAS_SEMANA,
 
         "base_qs": base_qs,
         "suffix": suffix,
     }
-    return render(request, "turmas/list.html", ctx)
+    return condicional.aplicar(render(request, "turmas/list.html", ctx), validador)
 
 # ------------------------------------------------------------
 # CREATE / UPDATE
@@ -196,36 +191,21 @@ def update_turma(request: HttpRequest, turma_id: int) -> HttpResponse:
 @user_passes_test(is_diretor,login_url="/turmas/")
 def exportar_turmas(request: HttpRequest) -> HttpResponse:
     """
-    Exporta turmas para Excel respeitando filtros atuais da lista.
+    Exporta turmas para Excel respeitando filtros atuais da lista (em segundo plano).
     """
-    q = (request.GET.get("q") or "").strip()
-    condominio_id = request.GET.get("condominio") or ""
-    modalidade_id = request.GET.get("modalidade") or ""
-    professor_id = request.GET.get("professor") or ""
-    dia_param = request.GET.get("dia_semana") or ""
-    ativos_param = request.GET.get("ativos", "")
-
-    qs = ts.buscar_turmas(
-        q=q,
-        condominio_id=int(condominio_id) if condominio_id else None,
-        modalidade_id=int(modalidade_id) if modalidade_id else None,
-        professor_id=int(professor_id) if professor_id else None,
-        dia_semana=int(dia_param) if dia_param else None,
-        ativos=(None if ativos_param == "" else (ativos_param == "1")),
-    )
-
-    filename, content = ts.exportar_turmas_excel(qs)
-    resp = HttpResponse(
-        content,
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    campos = ("q", "condominio", "modalidade", "professor", "dia_semana", "ativos")
+    job = jobs.enfileirar(
+        "turmas.exportar",
+        params={c: (request.GET.get(c) or "").strip() for c in campos},
+        usuario=request.user, voltar_para=reverse("turmas:list"),
     )
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return resp
+    return redirect(job)
 
 # ------------------------------------------------------------
 # Alunos de uma turma (visualização detalhada da turma)
 # ------------------------------------------------------------
 
+@orcamento_consultas(7)
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
 def alunos_turma(request: HttpRequest, turma_id: int) -> HttpResponse:
@@ -246,7 +226,7 @@ def alunos_turma(request: HttpRequest, turma_id: int) -> HttpResponse:
             turma.matriculas
             .select_related("cliente")
             .filter(ativa=True)
-            .order_by("cliente__nome_razao")
+            .order_by("sort_nome", "id")
         )
     except Exception:
         qs = []
@@ -366,6 +346,7 @@ def toggle_status(request: HttpRequest, turma_id: int) -> HttpResponse:
 # Selecionar cliente dentro de um modal ou popup (iframe)
 # ------------------------------------------------------------
 
+@orcamento_consultas(4)
 @login_required
 @user_passes_test(is_diretor,login_url="/turmas/")
 def selecionar_cliente(request: HttpRequest, turma_id: int) -> HttpResponse:
@@ -407,6 +388,7 @@ from datetime import date as _date
 from .forms import MatriculaForm
 from .models import Matricula
 
+@orcamento_consultas(7)
 @user_passes_test(is_diretor,login_url="/turmas/")
 @login_required
 def matriculas_turma_view(request: HttpRequest, turma_id: int) -> HttpResponse:
@@ -426,10 +408,7 @@ def matriculas_turma_view(request: HttpRequest, turma_id: int) -> HttpResponse:
     q = (request.GET.get("q") or "").strip()
     clientes_qs = Cliente.objects.filter(condominio=condominio, ativo=True)
     if q:
-        clientes_qs = clientes_qs.filter(
-            Q(nome_razao__icontains=q) |
-            Q(cpf_cnpj__icontains=q)
-        )
+        clientes_qs = clientes_qs.filter(filtro_busca(q))
 
     # paginação
     page = max(1, int(request.GET.get("page", "1") or 1))
@@ -460,11 +439,10 @@ from datetime import date
 @require_POST
 def matricular_cliente_direto(request: HttpRequest, turma_id: int) -> HttpResponse:
     form = MatriculaForm(request.POST)
-    cliente_id = request.POST.get("cliente_id")
-    print(cliente_id,form.data)
     if not form.is_valid():
         messages.error(request, "Dados inválidos para matrícula.")
-        print('erro',request)
+        logger.info("matrícula direta com formulário inválido",
+                    extra={"turma_id": turma_id, "erros": form.errors.get_json_data()})
         #return redirect(reverse("turmas:matriculas_turma", args=[turma_id]))
 
     try:
@@ -480,7 +458,7 @@ def matricular_cliente_direto(request: HttpRequest, turma_id: int) -> HttpRespon
         )
         messages.success(request, "Matrícula criada com sucesso.")
     except Exception as e:
-        print(e )
+        logger.warning("falha na matrícula direta", extra={"turma_id": turma_id}, exc_info=True)
         messages.error(request, f"Erro ao matricular: {e}")
 
     return redirect(reverse("turmas:matriculas_turma", args=[turma_id]))
@@ -503,8 +481,8 @@ def cadastrar_dependente_view(request: HttpRequest) -> HttpResponse:
         participante_sexo = request.POST.get("participante_sexo")
         data_inicio_str = request.POST.get("data_inicio")
 
-        # 🧩 Log de debug opcional
-        print(f"[DEBUG] turma_id={turma_id}, cliente_id={cliente_id}, participante={participante_nome}, nascimento={participante_data_nascimento}, sexo={participante_sexo}, data_inicio={data_inicio_str}")
+        logger.debug("cadastrando dependente",
+                     extra={"turma_id": turma_id, "cliente_id": cliente_id, "data_inicio": data_inicio_str})
 
         # 🔍 Validação básica
         if not turma_id or not cliente_id or not participante_nome:
@@ -552,9 +530,7 @@ def cadastrar_dependente_view(request: HttpRequest) -> HttpResponse:
     except ValidationError as e:
         messages.error(request, f"Não foi possível cadastrar o dependente: {e}")
     except Exception as e:
-        import traceback
-        print("❌ Erro ao cadastrar dependente:", e)
-        traceback.print_exc()
+        logger.exception("erro ao cadastrar dependente", extra={"turma_id": request.POST.get("turma_id")})
         messages.error(request, f"Erro inesperado ao matricular dependente: {e}")
 
     return redirect(request.META.get("HTTP_REFERER", reverse("turmas:list")))
@@ -3,12 +3,15 @@ from typing import Dict, Set
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
-from django.db.models import Q
 from django.http import HttpRequest, HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils.timezone import localdate
 
+from mca import jobs
+from mca.query_budget import orcamento_consultas
+from mca.roles import papel_do_usuario
+
 from .models import Turma, ListaPresenca, ItemPresenca, Matricula
 from .forms import (
     ListaPresencaCreateForm,
@@ -26,16 +29,11 @@ def _matriculas_ativas_na_data(lista: ListaPresenca):
     Matrículas ativas na data da lista e pertencentes à turma.
     Ativa = (ativa=True) AND data_inicio <= data <= (data_fim or +inf).
     """
-    d = lista.data
     return (
-        Matricula.objects
+        Matricula.objects.ativas_em(lista.data)
         .select_related("cliente", "turma")
-        .filter(
-            turma=lista.turma,
-            ativa=True
-        )
-        .filter(Q(data_fim__isnull=True) | Q(data_fim__gte=d))
-        .order_by("cliente__nome_razao", "id")
+        .filter(turma=lista.turma)
+        .order_by("sort_nome", "id")
     )
 
 
@@ -51,6 +49,7 @@ def _snapshots_from_matricula(m: Matricula) -> tuple[str, str]:
 # ----------------- Listagem de listas da turma -----------------
 from django.db.models import Count, Sum, Case, When, IntegerField
 
+@orcamento_consultas(13)
 @login_required
 def listas_da_turma(request: HttpRequest, turma_id: int):
     turma = (
@@ -60,15 +59,15 @@ def listas_da_turma(request: HttpRequest, turma_id: int):
     )
 
 
-    if hasattr(request.user, "funcionario") and request.user.funcionario.cargo == "PROF":
-        if turma.professor != request.user.funcionario:
-            messages.error(request, "Você não tem permissão para acessar esta turma.")
-            return redirect("turmas:list")
-        
     if not turma:
         messages.error(request, "Turma não encontrada.")
         return redirect(reverse("turmas:list"))
 
+    papel = papel_do_usuario(request.user)
+    if papel.cargo_professor and turma.professor_id != papel.funcionario_id:
+        messages.error(request, "Você não tem permissão para acessar esta turma.")
+        return redirect("turmas:list")
+
     filtro = ListaFiltroForm(request.GET or None)
     data_de = filtro.cleaned_data.get("data_de") if filtro.is_valid() else None
     data_ate = filtro.cleaned_data.get("data_ate") if filtro.is_valid() else None
@@ -91,8 +90,7 @@ def listas_da_turma(request: HttpRequest, turma_id: int):
         .order_by("-data", "-id")
     )
 
-    for lid in qs.values_list("id", flat=True):
-        ps.sincronizar_itens_lista(lid)
+    ps.sincronizar_listas_da_turma(turma.id)
 
     if data_de:
         qs = qs.filter(data__gte=data_de)
@@ -177,33 +175,12 @@ def gerar_listas_automaticas_view(request: HttpRequest):
     d2 = form.cleaned_data["data_ate"]
 
     turma = get_object_or_404(Turma, id=turma_id)
-
-    # Geração simples por intervalo respeitando dias ativos e vigência
-    from datetime import timedelta
-    criadas = 0
-    existentes = 0
-    ignoradas = 0
-
-    cur = d1
-    while cur <= d2:
-        # validar vigência e dia ativo
-        if cur < turma.inicio_vigencia or (turma.fim_vigencia and cur > turma.fim_vigencia):
-            ignoradas += 1
-        elif cur.weekday() not in turma.dias_ativos():
-            ignoradas += 1
-        else:
-            _, created = ListaPresenca.objects.get_or_create(turma=turma, data=cur)
-            if created:
-                criadas += 1
-            else:
-                existentes += 1
-        cur += timedelta(days=1)
-
-    messages.success(
-        request,
-        f"Gerado: {criadas} nova(s). Já existiam: {existentes}. Ignoradas: {ignoradas}."
+    job = jobs.enfileirar(
+        "turmas.gerar_listas",
+        params={"turma_id": turma.id, "data_de": d1.isoformat(), "data_ate": d2.isoformat()},
+        usuario=request.user, voltar_para=reverse("turmas:presencas_turma", args=[turma.id]),
     )
-    return redirect(reverse("turmas:presencas_turma", args=[turma.id]))
+    return redirect(job)
 
 
 # ----------------- Tela baseada em MATRÍCULA -----------------
@@ -211,6 +188,7 @@ def gerar_listas_automaticas_view(request: HttpRequest):
 from . import services_presenca as ps
 from . import services_presenca as ps
 
+@orcamento_consultas(10)
 @login_required
 def presenca_detalhe(request: HttpRequest, lista_id: int):
     # 1) garante que itens de novas matrículas sejam criados